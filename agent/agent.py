@@ -5,7 +5,10 @@ from __future__ import annotations
 import logging
 import os
 import subprocess
+import threading
 import time
+from collections import deque
+from itertools import islice
 from pathlib import Path
 from typing import Any
 from uuid import uuid4
@@ -18,10 +21,14 @@ from pydantic import BaseModel, Field, PositiveFloat
 app = typer.Typer(help="maa-cli remote control polling agent.")
 logger = logging.getLogger("maa_agent")
 
+# Matches the server's default MAA_MAX_REPORTS_PER_BATCH.
+REPORT_BATCH_SIZE = 100
+
 
 class TaskStatus(str):
     """Mirror of server side task status values."""
 
+    RUNNING = "Running"
     SUCCEEDED = "Succeeded"
     FAILED = "Failed"
 
@@ -35,6 +42,16 @@ class AgentConfig(BaseModel):
     poll_interval: PositiveFloat = Field(
         default=2.0, description="Seconds between task polling requests."
     )
+    long_poll: float = Field(
+        default=0.0,
+        ge=0,
+        description="Seconds the server may hold an empty poll open (0 disables).",
+    )
+    max_tasks: int = Field(
+        default=1,
+        ge=1,
+        description="Tasks accepted per poll; above 1 the server leases a batch.",
+    )
     maa_binary: str = Field(default="maa", description="Path to maa-cli executable.")
     work_dir: str | None = Field(
         default=None, description="Working directory where maa-cli runs."
@@ -42,6 +59,27 @@ class AgentConfig(BaseModel):
     agent_version: str = Field(default="maa-termux-agent/0.1.0")
     get_task_path: str = Field(default="/maa/getTask")
     report_status_path: str = Field(default="/maa/reportStatus")
+    report_status_batch_path: str = Field(default="/maa/reportStatusBatch")
+    append_log_path: str = Field(default="/maa/appendLog")
+    renew_leases_path: str = Field(default="/maa/renewLeases")
+    log_stream_interval: float = Field(
+        default=2.0,
+        ge=0,
+        description="Seconds between live log chunks sent while a task runs (0 disables).",
+    )
+    log_chunk_max_chars: int = Field(
+        default=8000, ge=1, description="Largest live log chunk sent at once."
+    )
+    log_queue_max_chunks: int = Field(
+        default=20,
+        ge=1,
+        description="Live log chunks waiting to be sent before older ones are dropped.",
+    )
+    max_pending_reports: int = Field(
+        default=100,
+        ge=0,
+        description="Reports kept while the server is unreachable (0 disables).",
+    )
     request_timeout: PositiveFloat = Field(default=30.0)
     report_log_max_chars: int = Field(default=4000)
     env: dict[str, str] = Field(
@@ -62,6 +100,161 @@ def load_config(path: Path) -> AgentConfig:
     return AgentConfig(**data)
 
 
+class LogStreamer:
+    """Buffer maa-cli output and send it as numbered chunks at an interval.
+
+    The thread reading maa-cli output only buffers it; a background thread
+    cuts the buffer into chunks every ``log_stream_interval`` seconds (even
+    while maa-cli is quiet) and posts them, so a slow or unreachable server
+    never stalls the pipe (and maa-cli with it). At most
+    ``log_queue_max_chunks`` chunks wait: past that a new chunk is merged
+    into the last queued one while it fits, otherwise the oldest is dropped,
+    keeping the live view on the newest output. Sequence numbers are assigned
+    as chunks are sent, so chunks dropped from the queue leave no gaps; a
+    chunk whose send fails still uses up its number, since the server may
+    have stored it, and shows up as a gap.
+    """
+
+    def __init__(self, agent: "MaaCliAgent", task_id: str) -> None:
+        self._agent = agent
+        self._task_id = task_id
+        self._interval = agent.config.log_stream_interval
+        self._max_chars = agent.config.log_chunk_max_chars
+        self._max_queued = agent.config.log_queue_max_chunks
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._seq = 0
+        self._last_flush = time.monotonic()
+        self._queue: deque[str] = deque()
+        self._dropped = 0
+        self._closing = False
+        # Guards the buffer and the queue, shared by write() and the sender.
+        self._ready = threading.Condition()
+        self._sender = threading.Thread(
+            target=self._send_queued, name=f"maa-log-{task_id}", daemon=True
+        )
+        self._sender.start()
+
+    def write(self, text: str) -> None:
+        with self._ready:
+            self._buffer.append(text)
+            self._buffered += len(text)
+            if self._buffered >= self._max_chars:
+                self._cut()
+                self._ready.notify()
+
+    def close(self) -> None:
+        """Send the rest, waiting at most one request timeout for the backlog."""
+
+        with self._ready:
+            self._cut()
+            self._closing = True
+            self._ready.notify()
+        self._sender.join(self._agent.config.request_timeout)
+        with self._ready:
+            dropped = self._dropped + sum(len(chunk) for chunk in self._queue)
+            self._queue.clear()
+        if dropped:
+            logger.warning(
+                "任务 %s 有 %d 个字符的实时日志因发送积压未上传", self._task_id, dropped
+            )
+
+    def _cut(self) -> None:
+        """Move the buffer to the send queue; the caller holds ``_ready``."""
+
+        self._last_flush = time.monotonic()
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        for start in range(0, len(data), self._max_chars):
+            self._enqueue(data[start : start + self._max_chars])
+
+    def _enqueue(self, chunk: str) -> None:
+        if len(self._queue) < self._max_queued:
+            self._queue.append(chunk)
+        elif len(self._queue[-1]) + len(chunk) <= self._max_chars:
+            self._queue[-1] += chunk
+        else:
+            self._dropped += len(self._queue.popleft())
+            self._queue.append(chunk)
+
+    def _send_queued(self) -> None:
+        while True:
+            with self._ready:
+                while True:
+                    if time.monotonic() - self._last_flush >= self._interval:
+                        self._cut()
+                    if self._queue or self._closing:
+                        break
+                    self._ready.wait(
+                        self._last_flush + self._interval - time.monotonic()
+                    )
+                if not self._queue:
+                    return
+                chunk = self._queue.popleft()
+            self._agent.append_log(self._task_id, self._seq, chunk)
+            self._seq += 1
+
+
+class LeaseKeeper:
+    """Renew the leases of batch-dispatched tasks until each is started.
+
+    The agent runs a batch one task at a time; without renewal, tasks near
+    the end of a long batch would lose their lease and be handed back to the
+    queue while still waiting here. A background thread renews the tasks not
+    started yet every third of the lease.
+    """
+
+    def __init__(
+        self, agent: "MaaCliAgent", task_ids: list[str], lease_seconds: float
+    ) -> None:
+        self._agent = agent
+        self._waiting = set(task_ids)
+        self._lock = threading.Lock()
+        self._interval = lease_seconds / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="maa-lease-keeper", daemon=True
+        )
+
+    def __enter__(self) -> "LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def started(self, task_id: str) -> None:
+        """Stop renewing ``task_id``; it has been reported or skipped."""
+
+        with self._lock:
+            self._waiting.discard(task_id)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            with self._lock:
+                waiting = sorted(self._waiting)
+            if not waiting:
+                return
+            try:
+                renewed = self._agent.renew_leases(waiting)
+            except httpx.HTTPError as exc:
+                if (
+                    isinstance(exc, httpx.HTTPStatusError)
+                    and exc.response.status_code == httpx.codes.NOT_FOUND
+                ):
+                    logger.warning("服务端不支持租约续期，批量任务可能超时退回")
+                    return
+                logger.warning("续期 %d 个任务租约失败：%s", len(waiting), exc)
+                continue
+            lost = set(waiting).difference(renewed)
+            if lost:
+                logger.warning("任务 %s 租约已失效", ", ".join(sorted(lost)))
+            with self._lock:
+                self._waiting.difference_update(lost)
+
+
 class MaaCliAgent:
     """Long-running polling agent orchestrating maa-cli commands."""
 
@@ -72,6 +265,11 @@ class MaaCliAgent:
             logger.warning(
                 "未在配置中提供 device_id，当前会话将使用临时 ID：%s", self.device_id
             )
+        self._poll_interval = config.poll_interval
+        self._lease_seconds: float | None = None
+        self._pending_reports: deque[dict[str, Any]] = deque(
+            maxlen=config.max_pending_reports or None
+        )
         self._client = httpx.Client(
             base_url=self.config.normalized_server_base(),
             timeout=self.config.request_timeout,
@@ -83,12 +281,15 @@ class MaaCliAgent:
         logger.info("MAA agent 启动，设备 %s", self.device_id)
         while True:
             try:
+                started = time.monotonic()
+                self.flush_pending_reports()
                 tasks = self.fetch_tasks()
                 if not tasks:
-                    time.sleep(self.config.poll_interval)
+                    # 长轮询已在服务端等待过，只补足剩余的轮询间隔
+                    elapsed = time.monotonic() - started
+                    time.sleep(max(0.0, self._poll_interval - elapsed))
                     continue
-                for task in tasks:
-                    self.process_task(task)
+                self.process_batch(tasks)
             except KeyboardInterrupt:
                 logger.info("收到中断信号，正在退出...")
                 raise
@@ -96,27 +297,73 @@ class MaaCliAgent:
                 logger.exception("轮询任务时发生异常: %s", exc)
                 time.sleep(self.config.poll_interval)
 
+    def process_batch(self, tasks: list[dict[str, Any]]) -> None:
+        """Run polled tasks in order, keeping the leases of the rest alive."""
+
+        if self.config.max_tasks <= 1 or len(tasks) <= 1 or not self._lease_seconds:
+            for task in tasks:
+                self.process_task(task)
+            return
+        with LeaseKeeper(
+            self, [task.get("id") for task in tasks], self._lease_seconds
+        ) as leases:
+            for task in tasks:
+                self.process_task(task, leases=leases)
+
     def fetch_tasks(self) -> list[dict[str, Any]]:
         """Call backend to obtain pending tasks."""
 
-        payload = {
+        payload: dict[str, Any] = {
             "user": self.config.user_key,
             "device": self.device_id,
             "agentVersion": self.config.agent_version,
         }
-        response = self._client.post(self.config.get_task_path, json=payload)
+        timeout = self.config.request_timeout
+        capabilities: dict[str, Any] = {}
+        if self.config.long_poll > 0:
+            capabilities["longPoll"] = self.config.long_poll
+            timeout += self.config.long_poll
+        if self.config.max_tasks > 1:
+            capabilities["maxTasks"] = self.config.max_tasks
+        if capabilities:
+            payload["capabilities"] = capabilities
+        response = self._client.post(
+            self.config.get_task_path, json=payload, timeout=timeout
+        )
         response.raise_for_status()
         body = response.json()
+        self._poll_interval = self._next_poll_interval(body.get("pollInterval"))
+        self._lease_seconds = body.get("leaseSeconds")
         tasks = body.get("tasks", [])
         logger.debug("拉取到 %d 个任务", len(tasks))
         return tasks
 
-    def process_task(self, task: dict[str, Any]) -> None:
+    def _next_poll_interval(self, hint: Any) -> float:
+        """Prefer the server-suggested interval, falling back to the config."""
+
+        try:
+            interval = float(hint)
+        except (TypeError, ValueError):
+            return self.config.poll_interval
+        return interval if interval > 0 else self.config.poll_interval
+
+    def process_task(
+        self, task: dict[str, Any], leases: LeaseKeeper | None = None
+    ) -> None:
         """Execute maa-cli for a single task envelope."""
 
         task_id = task.get("id")
         task_type = task.get("type")
         params = task.get("params") or {}
+        if self.config.max_tasks > 1:
+            try:
+                started = self.start_leased_task(task_id)
+            finally:
+                if leases is not None:
+                    leases.started(task_id)
+            if not started:
+                logger.warning("任务 %s 租约已失效，跳过执行", task_id)
+                return
         logger.info("开始执行任务 %s (%s)", task_id, task_type)
         status = TaskStatus.FAILED
         log_text = ""
@@ -124,7 +371,7 @@ class MaaCliAgent:
 
         try:
             command = self.build_command(task_type, params)
-            output = self.invoke_maa(command)
+            output = self.invoke_maa(command, task_id=task_id)
             status = TaskStatus.SUCCEEDED
             log_text = output
             result = {"command": command, "returnCode": 0}
@@ -143,6 +390,33 @@ class MaaCliAgent:
                 result=result,
             )
 
+    def start_leased_task(self, task_id: str) -> bool:
+        """Report a batch-dispatched task as started; False if its lease lapsed."""
+
+        payload = {
+            "user": self.config.user_key,
+            "device": self.device_id,
+            "taskId": task_id,
+            "status": TaskStatus.RUNNING,
+        }
+        response = self._client.post(self.config.report_status_path, json=payload)
+        if response.status_code == httpx.codes.CONFLICT:
+            return False
+        response.raise_for_status()
+        return True
+
+    def renew_leases(self, task_ids: list[str]) -> list[str]:
+        """Extend the leases of batch tasks not started yet; return those kept."""
+
+        payload = {
+            "user": self.config.user_key,
+            "device": self.device_id,
+            "taskIds": task_ids,
+        }
+        response = self._client.post(self.config.renew_leases_path, json=payload)
+        response.raise_for_status()
+        return response.json().get("renewed", [])
+
     def build_command(self, task_type: str, params: dict[str, Any]) -> list[str]:
         """Translate Maa remote task into maa-cli command."""
 
@@ -158,22 +432,65 @@ class MaaCliAgent:
 
         raise ValueError(f"未知任务类型: {task_type}")
 
-    def invoke_maa(self, command: list[str]) -> str:
-        """Execute maa-cli command and return captured logs."""
+    def invoke_maa(self, command: list[str], task_id: str | None = None) -> str:
+        """Execute maa-cli command and return captured logs.
+
+        With ``task_id`` and ``log_stream_interval`` set, output is also sent
+        to the server in chunks while the command runs.
+        """
 
         env = os.environ.copy()
         env.update(self.config.env)
         work_dir = Path(self.config.work_dir).expanduser() if self.config.work_dir else None
-        completed = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            cwd=work_dir,
-            env=env,
-            check=True,
+        streamer = (
+            LogStreamer(self, task_id)
+            if task_id and self.config.log_stream_interval > 0
+            else None
         )
-        return self._truncate_log(completed.stdout or "")
+        tail: deque[str] = deque()
+        tail_chars = 0
+        try:
+            with subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                cwd=work_dir,
+                env=env,
+            ) as process:
+                assert process.stdout is not None
+                for line in process.stdout:
+                    tail.append(line)
+                    tail_chars += len(line)
+                    while len(tail) > 1 and (
+                        tail_chars - len(tail[0]) >= self.config.report_log_max_chars
+                    ):
+                        tail_chars -= len(tail.popleft())
+                    if streamer is not None:
+                        streamer.write(line)
+        finally:
+            if streamer is not None:
+                streamer.close()
+        output = self._truncate_log("".join(tail))
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command, output=output)
+        return output
+
+    def append_log(self, task_id: str, seq: int, data: str) -> None:
+        """Send one live log chunk; failures only cost live visibility."""
+
+        payload = {
+            "user": self.config.user_key,
+            "device": self.device_id,
+            "taskId": task_id,
+            "seq": seq,
+            "data": data,
+        }
+        try:
+            response = self._client.post(self.config.append_log_path, json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            logger.debug("发送任务 %s 实时日志第 %d 段失败：%s", task_id, seq, exc)
 
     def report_status(
         self,
@@ -183,21 +500,112 @@ class MaaCliAgent:
         log: str | None,
         result: dict[str, Any] | None,
     ) -> None:
-        """Send execution result back to backend."""
+        """Send execution result back to backend.
 
-        log_payload = self._truncate_log(log or "")
-        payload = {
-            "user": self.config.user_key,
-            "device": self.device_id,
+        While the server is unreachable, reports are kept (up to
+        ``max_pending_reports``) and later sent in order as one batch.
+        """
+
+        report = {
             "taskId": task_id,
             "status": status,
-            "log": log_payload,
+            "log": self._truncate_log(log or ""),
             "result": result,
         }
         logger.debug("汇报任务 %s 状态：%s", task_id, status)
-        response = self._client.post(self.config.report_status_path, json=payload)
+        if self._pending_reports:
+            # 保持上报顺序：已有积压时追加到积压后一起批量发送
+            self._keep_report(report)
+            self.flush_pending_reports()
+            return
+        payload = {"user": self.config.user_key, "device": self.device_id, **report}
+        try:
+            response = self._client.post(self.config.report_status_path, json=payload)
+        except httpx.TransportError as exc:
+            if self.config.max_pending_reports <= 0:
+                raise
+            logger.warning("汇报任务 %s 失败（%s），稍后批量重试", task_id, exc)
+            self._keep_report(report)
+            return
+        if response.is_server_error and self.config.max_pending_reports > 0:
+            logger.warning(
+                "汇报任务 %s 失败（HTTP %d），稍后批量重试", task_id, response.status_code
+            )
+            self._keep_report(report)
+            return
+        if response.is_client_error:
+            # 重试也不会成功（任务已被回收、取消或不属于本设备），直接放弃
+            logger.error(
+                "汇报任务 %s 被拒绝（HTTP %d）：%s",
+                task_id,
+                response.status_code,
+                response.text,
+            )
+            return
         response.raise_for_status()
 
+    def _keep_report(self, report: dict[str, Any]) -> None:
+        """Queue a report for the batch retry, logging any report it evicts."""
+
+        maxlen = self._pending_reports.maxlen
+        if maxlen is not None and len(self._pending_reports) >= maxlen:
+            evicted = self._pending_reports[0]
+            logger.error(
+                "积压上报已达上限 %d 条，丢弃最早的任务 %s（%s）的结果",
+                maxlen,
+                evicted["taskId"],
+                evicted["status"],
+            )
+        self._pending_reports.append(report)
+
+    def flush_pending_reports(self) -> None:
+        """Send reports kept while offline through the batch endpoint.
+
+        Transport errors and 5xx responses leave the backlog for the next
+        attempt. A 4xx for the whole batch would fail the same way forever,
+        so that batch is dropped (and logged) instead of blocking polling.
+        """
+
+        while self._pending_reports:
+            reports = list(islice(self._pending_reports, REPORT_BATCH_SIZE))
+            payload = {
+                "user": self.config.user_key,
+                "device": self.device_id,
+                "agentVersion": self.config.agent_version,
+                "reports": reports,
+            }
+            try:
+                response = self._client.post(
+                    self.config.report_status_batch_path, json=payload
+                )
+            except httpx.TransportError as exc:
+                logger.warning("批量补报 %d 条结果失败（%s），稍后重试", len(reports), exc)
+                return
+            if response.is_server_error:
+                logger.warning(
+                    "批量补报 %d 条结果失败（HTTP %d），稍后重试",
+                    len(reports),
+                    response.status_code,
+                )
+                return
+            for _ in reports:
+                self._pending_reports.popleft()
+            if response.is_client_error:
+                logger.error(
+                    "批量补报被拒绝（HTTP %d：%s），放弃任务 %s 的结果",
+                    response.status_code,
+                    response.text,
+                    ", ".join(report["taskId"] for report in reports),
+                )
+                continue
+            response.raise_for_status()
+            for item in response.json().get("results", []):
+                if item.get("status") != httpx.codes.OK:
+                    logger.warning(
+                        "补报任务 %s 被拒绝：%s", item.get("taskId"), item.get("detail")
+                    )
+            logger.info("已批量补报 %d 条任务结果", len(reports))
+
     def _truncate_log(self, text: str) -> str:
         """Ensure logs do not exceed configured length."""
 
@@ -2,10 +2,13 @@
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.core.lazy import lazy
+
 _BASE_DIR = Path(__file__).resolve().parents[2]
 _DEFAULT_DB_PATH = _BASE_DIR / "data" / "maa_remote.db"
 
@@ -19,12 +22,243 @@ class Settings(BaseSettings):
         default=f"sqlite:///{_DEFAULT_DB_PATH}",
         description="Database connection string.",
     )
+    fast_json: bool = Field(
+        default=False,
+        description="Serve hot list endpoints as row dicts rendered by orjson.",
+    )
+    async_db: bool = Field(
+        default=True,
+        description="Serve agent protocol routes through the asyncio engine.",
+    )
+    async_database_url: str | None = Field(
+        default=None,
+        description="Async connection string; derived from database_url if unset.",
+    )
+    db_profile: Literal["default", "production"] = Field(
+        default="production",
+        description="Engine tuning profile (pool sizing, SQLite PRAGMAs, PG timeouts).",
+    )
+    db_pool_size: int | None = Field(
+        default=None, ge=1, description="Override the profile's connection pool size."
+    )
+    db_max_overflow: int | None = Field(
+        default=None, ge=0, description="Override the profile's pool overflow."
+    )
+    db_sqlite_pragmas: dict[str, str | int] = Field(
+        default_factory=dict,
+        description="Extra/overriding SQLite PRAGMAs, e.g. {\"busy_timeout\": 10000}.",
+    )
+    db_postgresql_options: dict[str, str] = Field(
+        default_factory=dict,
+        description="Extra/overriding PostgreSQL session settings.",
+    )
     allowed_origins: list[str] = Field(
         default_factory=lambda: ["*"], description="CORS origins for REST API."
     )
     api_prefix: str = "/api"
     maa_get_task_endpoint: str = "/maa/getTask"
     maa_report_status_endpoint: str = "/maa/reportStatus"
+    long_poll_max_seconds: float = Field(
+        default=25.0,
+        ge=0,
+        description="Upper bound for agent long-poll waits on getTask (0 disables).",
+    )
+    long_poll_recheck_seconds: float = Field(
+        default=2.0,
+        ge=0,
+        description="Interval at which a held getTask re-checks the database for "
+        "tasks enqueued by other workers; in-process wake-ups are immediate. "
+        "0 relies on wake-ups alone, which only suits a single worker.",
+    )
+    identity_cache_size: int = Field(
+        default=10_000,
+        ge=0,
+        description="Max cached user/device identities per process (0 disables).",
+    )
+    identity_cache_ttl: float = Field(
+        default=300.0,
+        gt=0,
+        description="Seconds a cached user/device identity stays valid.",
+    )
+    max_tasks_per_poll: int = Field(
+        default=10,
+        ge=1,
+        description="Upper bound for the agent-advertised capabilities.maxTasks.",
+    )
+    max_bulk_tasks: int = Field(
+        default=5_000,
+        ge=1,
+        description="Upper bound for devices targeted by one /api/tasks/bulk call.",
+    )
+    max_reports_per_batch: int = Field(
+        default=100,
+        ge=1,
+        description="Upper bound for reports accepted by /maa/reportStatusBatch.",
+    )
+    task_log_chunk_max_chars: int = Field(
+        default=16_384,
+        ge=1,
+        description="Largest output chunk accepted by /maa/appendLog.",
+    )
+    task_log_max_chunks: int = Field(
+        default=2_000,
+        ge=1,
+        description="Streamed chunks kept per task; older ones are evicted.",
+    )
+    blob_codec: Literal["zlib", "zstd"] = Field(
+        default="zlib",
+        description="Compression for stored task logs/results (zstd needs the extra).",
+    )
+    blob_compression_level: int = Field(
+        default=6, ge=1, le=19, description="Compression level for new blobs."
+    )
+    blob_gc_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Interval for deleting blobs no task references (0 disables).",
+    )
+    blob_gc_grace_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Unreferenced blobs are kept this long after their last store.",
+    )
+    blob_gc_batch_size: int = Field(
+        default=1000, ge=1, description="Blobs deleted per garbage collection run."
+    )
+    task_retention_days: float = Field(
+        default=90.0,
+        gt=0,
+        description="Finished tasks older than this move to the archive.",
+    )
+    archive_dir: Path = Field(
+        default=_BASE_DIR / "data" / "archive",
+        description="Root directory of archived task history (gzip NDJSON).",
+    )
+    archive_batch_size: int = Field(
+        default=500, ge=1, description="Tasks moved to the archive per transaction."
+    )
+    archive_max_batches: int = Field(
+        default=20, ge=1, description="Upper bound for batches per archive sweep."
+    )
+    archive_sweep_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Interval for archiving old finished tasks (0 disables).",
+    )
+    log_tail_keepalive_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        description="Idle interval between keep-alive comments on log tail streams.",
+    )
+    change_feed_queue_size: int = Field(
+        default=256,
+        ge=1,
+        description="Events buffered per change feed subscriber before it is dropped.",
+    )
+    change_feed_resync_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        description="Keep-alive and cross-worker change check interval of the feed.",
+    )
+    device_event_interval_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Minimum gap between plain heartbeat events per device "
+        "(0 publishes presence changes only).",
+    )
+    task_lease_seconds: float = Field(
+        default=300.0,
+        gt=0,
+        description="How long a batch-claimed task may wait for its first report "
+        "or a renewal from the agent.",
+    )
+    lease_sweep_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="Interval for returning expired leases to Pending (0 disables).",
+    )
+    task_run_timeout_seconds: float = Field(
+        default=7200.0,
+        gt=0,
+        description="How long a task may stay Running before it is considered stuck.",
+    )
+    task_run_timeouts: dict[str, float] = Field(
+        default_factory=dict,
+        description="Per task-type overrides of task_run_timeout_seconds.",
+    )
+    task_max_retries: int = Field(
+        default=1,
+        ge=0,
+        description="Requeues of a stuck task before it is marked Failed.",
+    )
+    stuck_task_sweep_seconds: float = Field(
+        default=60.0,
+        ge=0,
+        description="Interval for reaping stuck Running tasks (0 disables).",
+    )
+    poll_interval_min: float = Field(
+        default=2.0, gt=0, description="pollInterval hint for busy devices (s)."
+    )
+    poll_interval_max: float = Field(
+        default=30.0, gt=0, description="pollInterval hint cap for idle devices (s)."
+    )
+    poll_busy_window_seconds: float = Field(
+        default=120.0,
+        ge=0,
+        description="How long after a dispatch a device keeps the minimum interval.",
+    )
+    poll_backoff_factor: float = Field(
+        default=1.5, ge=1, description="Interval growth per idle poll after the window."
+    )
+    poll_latency_target_ms: float = Field(
+        default=50.0,
+        ge=0,
+        description="Poll DB time above which all hints stretch (0 disables).",
+    )
+    task_count_repair_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Interval for reconciling per-device task counters (0 disables).",
+    )
+    scheduler_enabled: bool = Field(
+        default=True,
+        description="Materialize recurring schedules into tasks in this process.",
+    )
+    schedule_refresh_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        description="Interval for reloading due times changed by other workers.",
+    )
+    schedule_batch_size: int = Field(
+        default=500, ge=1, description="Due schedules materialized per transaction."
+    )
+    slow_query_ms: float = Field(
+        default=200.0,
+        ge=0,
+        description="Log statements slower than this (ms, 0 disables).",
+    )
+    n_plus_one_threshold: int = Field(
+        default=10,
+        ge=0,
+        description="Log requests repeating one SELECT this often (0 disables).",
+    )
+    sql_debug_headers: bool = Field(
+        default=False,
+        description="Add X-DB-* query stats headers to responses (always in debug).",
+    )
+    metrics_enabled: bool = Field(
+        default=True, description="Record Prometheus metrics and serve /metrics."
+    )
+    metrics_active_device_seconds: float = Field(
+        default=120.0,
+        gt=0,
+        description="Devices seen within this window count as active (s).",
+    )
+    heartbeat_flush_seconds: float = Field(
+        default=5.0,
+        ge=0,
+        description="Interval for batched last_seen_at writes (0 writes every poll).",
+    )
 
     model_config = SettingsConfigDict(
         env_prefix="MAA_",
@@ -41,7 +275,8 @@ def get_settings() -> Settings:
     return Settings()
 
 
-settings = get_settings()
+# Read from the environment on first use, so importing the app loads nothing.
+settings: Settings = lazy(get_settings)
 
 __all__ = ["Settings", "settings", "get_settings"]
 
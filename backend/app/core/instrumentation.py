@@ -0,0 +1,201 @@
+"""Per-request SQL instrumentation built on cursor execution events.
+
+Every statement sent to the database, by the sync engine or by the async
+engine's greenlets, is timed. Within a request the counts add up to one
+:class:`QueryStats`, which feeds the metrics, the debug response headers
+and the N+1 check. Statements slower than ``MAA_SLOW_QUERY_MS`` are logged
+wherever they run, background jobs included.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+_STARTED_KEY = "maa_statement_started"
+_WHITESPACE = re.compile(r"\s+")
+_MAX_STATEMENT_CHARS = 500
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Statements executed within one request (or other tracked scope)."""
+
+    count: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+    executions: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        self.executions[statement] += 1
+
+    def repeated_selects(self, threshold: int) -> list[tuple[str, int]]:
+        """SELECTs run at least ``threshold`` times: the N+1 signature.
+
+        An ORM loop issuing one query per row renders the same SQL each
+        time with different parameters, so identical statement text is
+        counted rather than identical parameters.
+        """
+
+        return [
+            (statement, executions)
+            for statement, executions in self.executions.most_common()
+            if executions >= threshold and statement.lstrip()[:6].upper() == "SELECT"
+        ]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar(
+    "maa_query_stats", default=None
+)
+
+
+def current_query_stats() -> QueryStats | None:
+    """Stats of the innermost tracked scope, None outside of one."""
+
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements of the enclosed block into a new QueryStats.
+
+    The context is copied into threadpool workers and async greenlets, so
+    statements executed on their behalf are counted too.
+    """
+
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def one_line(statement: str, limit: int = _MAX_STATEMENT_CHARS) -> str:
+    """Collapse whitespace and truncate a statement for logs and headers."""
+
+    text = _WHITESPACE.sub(" ", statement).strip()
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn: Any, *_args: Any) -> None:
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(
+    conn: Any,
+    _cursor: Any,
+    statement: str,
+    _parameters: Any,
+    _context: Any,
+    executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - conn.info[_STARTED_KEY].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        # Parameters are left out: they carry task payloads and logs.
+        logger.warning(
+            "slow query duration_ms=%.1f executemany=%s statement=%s",
+            elapsed * 1000,
+            executemany,
+            one_line(statement),
+            extra={"duration_ms": elapsed * 1000, "statement": statement},
+        )
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route, e.g. ``/api/devices/{device_id}``."""
+
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _header_value(value: str) -> str:
+    return value.encode("latin-1", "replace").decode("latin-1")
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware tracking the statements of each HTTP request.
+
+    With ``MAA_DEBUG`` (or ``MAA_SQL_DEBUG_HEADERS``) the response carries
+    ``X-DB-Query-Count``, ``X-DB-Time-Ms``, ``X-DB-Slowest-Ms`` and
+    ``X-DB-Slowest-Statement`` for the statements run before the headers
+    were sent. Requests repeating one SELECT ``MAA_N_PLUS_ONE_THRESHOLD``
+    times or more are logged as likely N+1 patterns.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.debug_headers = settings.debug or settings.sql_debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_headers(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.count)
+                    headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+                    headers["X-DB-Slowest-Ms"] = f"{stats.slowest_seconds * 1000:.2f}"
+                    if stats.slowest_statement is not None:
+                        headers["X-DB-Slowest-Statement"] = _header_value(
+                            one_line(stats.slowest_statement, 200)
+                        )
+                await send(message)
+
+            await self.app(
+                scope, receive, send_with_headers if self.debug_headers else send
+            )
+
+        threshold = settings.n_plus_one_threshold
+        if threshold:
+            for statement, executions in stats.repeated_selects(threshold):
+                logger.warning(
+                    "possible N+1 route=%s method=%s executions=%d statement=%s",
+                    route_template(scope),
+                    scope["method"],
+                    executions,
+                    one_line(statement),
+                )
+
+
+__all__ = [
+    "QueryStats",
+    "QueryStatsMiddleware",
+    "current_query_stats",
+    "one_line",
+    "route_template",
+    "track_queries",
+]
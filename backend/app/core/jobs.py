@@ -0,0 +1,74 @@
+"""Periodic background jobs run inside the FastAPI lifespan."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PeriodicJob:
+    """A maintenance callable invoked every ``interval`` seconds.
+
+    ``run`` receives a fresh session and is responsible for committing.
+    Jobs run in the threadpool so blocking database work never stalls the
+    event loop. Jobs with ``run_on_shutdown`` get one final invocation when
+    the application stops.
+    """
+
+    name: str
+    interval: float
+    run: Callable[[Session], None]
+    run_on_shutdown: bool = False
+
+
+def run_job(job: PeriodicJob) -> None:
+    """Invoke a job once with its own session, logging any failure."""
+
+    session = SessionLocal()
+    try:
+        job.run(session)
+    except Exception:  # pylint: disable=broad-except
+        session.rollback()
+        logger.exception("Background job %s failed", job.name)
+    finally:
+        session.close()
+
+
+async def _run_forever(job: PeriodicJob) -> None:
+    while True:
+        await asyncio.sleep(job.interval)
+        await run_in_threadpool(run_job, job)
+
+
+@asynccontextmanager
+async def periodic_jobs(jobs: Sequence[PeriodicJob]) -> AsyncIterator[None]:
+    """Run ``jobs`` in the background for the duration of the context."""
+
+    active = [job for job in jobs if job.interval > 0]
+    tasks = [
+        asyncio.create_task(_run_forever(job), name=f"job:{job.name}")
+        for job in active
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in active:
+            if job.run_on_shutdown:
+                await run_in_threadpool(run_job, job)
+
+
+__all__ = ["PeriodicJob", "periodic_jobs", "run_job"]
@@ -0,0 +1,76 @@
+"""Module-level singletons that are built on first use instead of at import."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar, cast
+
+_T = TypeVar("_T")
+
+_UNSET: Any = object()
+
+
+class LazyProxy(Generic[_T]):
+    """Forward attribute access to an object built by ``factory`` on first use.
+
+    Modules keep exporting a plain singleton (``settings``, ``engine``, the
+    service caches) that call sites use as before, while importing them
+    reads no configuration and opens nothing. The factory runs at most once
+    per process, under a lock, so concurrent first uses from the threadpool
+    share one instance. Equality and hashing follow the built object, so the
+    proxy and the object are interchangeable as dict keys (SQLAlchemy
+    sessions key their connections by engine).
+    """
+
+    __slots__ = ("_factory", "_lock", "_target")
+
+    def __init__(self, factory: Callable[[], _T]) -> None:
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_target", _UNSET)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(resolve(self), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(resolve(self), name, value)
+
+    def __eq__(self, other: object) -> bool:
+        return bool(resolve(self) == other)
+
+    def __hash__(self) -> int:
+        return hash(resolve(self))
+
+    def __repr__(self) -> str:
+        if self._target is _UNSET:
+            return f"<lazy {getattr(self._factory, '__qualname__', self._factory)}>"
+        return repr(self._target)
+
+
+def lazy(factory: Callable[[], _T]) -> _T:
+    """Return a :class:`LazyProxy` for ``factory``, typed as what it builds."""
+
+    return cast(_T, LazyProxy(factory))
+
+
+def resolve(proxy: Any) -> Any:
+    """Build (once) and return the object behind ``proxy``."""
+
+    target = proxy._target
+    if target is _UNSET:
+        with proxy._lock:
+            target = proxy._target
+            if target is _UNSET:
+                target = proxy._factory()
+                object.__setattr__(proxy, "_target", target)
+    return target
+
+
+def is_built(proxy: Any) -> bool:
+    """Whether the object behind ``proxy`` has been built yet."""
+
+    return proxy._target is not _UNSET
+
+
+__all__ = ["LazyProxy", "is_built", "lazy", "resolve"]
@@ -0,0 +1,159 @@
+"""Prometheus metrics for the HTTP layer and the dispatch pipeline.
+
+Metrics aggregate across uvicorn workers through prometheus_client's
+multiprocess mode: start the server with ``PROMETHEUS_MULTIPROC_DIR``
+pointing at an empty directory, shared by all workers and wiped before each
+start. Without it the process-local default registry is exported.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterable
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.instrumentation import current_query_stats, route_template
+
+REQUEST_LATENCY = Histogram(
+    "maa_http_request_duration_seconds",
+    "Time until the response headers were sent, by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REQUEST_DB_TIME = Histogram(
+    "maa_http_request_db_seconds",
+    "Time spent in database statements per request, by route template.",
+    ["route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+POLLS = Counter(
+    "maa_polls",
+    "getTask requests by outcome: dispatched (>= 1 task) or empty.",
+    ["outcome"],
+)
+TASKS_CLAIMED = Histogram(
+    "maa_poll_claimed_tasks",
+    "Tasks handed out per getTask request.",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+DISPATCH_WAIT = Histogram(
+    "maa_task_dispatch_wait_seconds",
+    "Time from creation to dispatch (started_at - created_at), by task type.",
+    ["type"],
+    buckets=(1, 5, 15, 30, 60, 300, 900, 3600, 4 * 3600, 24 * 3600),
+)
+RUN_DURATION = Histogram(
+    "maa_task_run_duration_seconds",
+    "Execution time (finished_at - started_at) of finished tasks, by type.",
+    ["type", "status"],
+    buckets=(10, 30, 60, 300, 600, 1800, 3600, 2 * 3600, 4 * 3600, 12 * 3600),
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and database time.
+
+    Latency stops when the response headers go out, so long polls count
+    their wait but streamed responses (SSE) do not count their stream.
+    Route templates, not raw paths, label the series, keeping cardinality
+    bounded. Database time comes from the :class:`QueryStatsMiddleware`
+    wrapping this one.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_with_metrics(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                REQUEST_LATENCY.labels(
+                    scope["method"], route_template(scope), str(message["status"])
+                ).observe(time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            stats = current_query_stats()
+            if stats is not None:
+                REQUEST_DB_TIME.labels(route_template(scope)).observe(stats.seconds)
+
+
+def observe_poll(claimed: int) -> None:
+    """Record one getTask request that handed out ``claimed`` tasks."""
+
+    POLLS.labels("dispatched" if claimed else "empty").inc()
+    TASKS_CLAIMED.observe(claimed)
+
+
+def observe_dispatch_waits(waits: Iterable[tuple[str, float]]) -> None:
+    """Record ``(task type, seconds from creation to dispatch)`` pairs."""
+
+    for task_type, seconds in waits:
+        DISPATCH_WAIT.labels(task_type).observe(max(seconds, 0.0))
+
+
+def observe_run_durations(runs: Iterable[tuple[str, str, float]]) -> None:
+    """Record ``(task type, final status, seconds of execution)`` triples."""
+
+    for task_type, status, seconds in runs:
+        RUN_DURATION.labels(task_type, status).observe(max(seconds, 0.0))
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def render_metrics(extra: Collector | None = None) -> bytes:
+    """Exposition text of every worker's metrics plus ``extra``.
+
+    ``extra`` is collected once at scrape time (e.g. gauges read from the
+    database), so it is exported once no matter how many workers run.
+    """
+
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry)
+    if extra is not None:
+        scraped = CollectorRegistry(auto_describe=False)
+        scraped.register(extra)
+        output += generate_latest(scraped)
+    return output
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauge files on shutdown (multiprocess mode)."""
+
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+__all__ = [
+    "MetricsMiddleware",
+    "mark_process_dead",
+    "multiprocess_enabled",
+    "observe_dispatch_waits",
+    "observe_poll",
+    "observe_run_durations",
+    "render_metrics",
+]
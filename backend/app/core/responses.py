@@ -0,0 +1,33 @@
+"""JSON response rendering for the fast serialization path (``MAA_FAST_JSON``)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+try:  # Optional: pip install -e .[orjson]
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """Render plain dicts and lists without any model validation.
+
+    Uses orjson when installed and pydantic-core's serializer otherwise.
+    Both write datetimes and enums the way pydantic does (UTC as ``Z``,
+    enums by value), so the bytes match what a ``response_model`` would
+    produce for the same data.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(
+                content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+            )
+        return pydantic_core.to_json(content)
+
+
+__all__ = ["FastJSONResponse"]
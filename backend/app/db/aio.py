@@ -0,0 +1,192 @@
+"""Async database engine and session factory for the agent protocol routes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import AsyncGenerator, Callable
+from typing import Any, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.profile import active_profile, configure_engine
+from app.db.session import SessionLocal, _build_engine_kwargs, engine
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto the matching asyncio driver."""
+
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No asyncio driver configured for {parsed.drivername!r}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+class ThreadpoolSession:
+    """``AsyncSession`` look-alike that runs a sync ``Session`` in the threadpool.
+
+    Used when the async engine is disabled or its driver is unavailable, so
+    async route handlers and services work unchanged on the sync path.
+
+    A session keeps its pooled connection between ``run_sync`` calls until
+    the transaction ends. If more sessions than the pool holds were allowed
+    into a transaction, threadpool workers would block on checkout while the
+    connection owners wait for a free worker. ``slots`` therefore admits at
+    most pool-capacity sessions into a transaction at a time, and the wait
+    for a slot happens on the event loop.
+    """
+
+    def __init__(self, session: Session, slots: asyncio.Semaphore) -> None:
+        self.sync_session = session
+        self._slots = slots
+        self._holding = False
+
+    async def run_sync(
+        self, fn: Callable[..., _T], *args: Any, **kwargs: Any
+    ) -> _T:
+        if not self._holding:
+            await self._slots.acquire()
+            self._holding = True
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def commit(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.commit)
+        finally:
+            self._release()
+
+    async def rollback(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.rollback)
+        finally:
+            self._release()
+
+    async def close(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.close)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        if self._holding:
+            self._holding = False
+            self._slots.release()
+
+
+def _pool_capacity() -> int:
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    if not callable(size):
+        # Singleton/static pools (in-memory SQLite) hand out one connection.
+        return 1
+    return size() + max(0, getattr(pool, "_max_overflow", 0))
+
+
+_threadpool_slots: asyncio.Semaphore | None = None
+
+
+def _get_threadpool_slots() -> asyncio.Semaphore:
+    global _threadpool_slots  # noqa: PLW0603
+    if _threadpool_slots is None:
+        _threadpool_slots = asyncio.Semaphore(_pool_capacity())
+    return _threadpool_slots
+
+
+AnyAsyncSession = AsyncSession | ThreadpoolSession
+
+
+def _build_async_engine() -> AsyncEngine | None:
+    if not settings.async_db:
+        return None
+    url = settings.async_database_url or async_database_url(settings.database_url)
+    try:
+        built = create_async_engine(url, **_build_engine_kwargs(url))
+    except (ImportError, ValueError) as exc:
+        logger.warning("Async database engine unavailable (%s); using threadpool", exc)
+        return None
+    configure_engine(built.sync_engine, active_profile())
+    return built
+
+
+_async_lock = threading.Lock()
+_async_built = False
+_async_engine: AsyncEngine | None = None
+_async_sessions: async_sessionmaker[AsyncSession] | None = None
+
+
+def _async_sessionmaker() -> async_sessionmaker[AsyncSession] | None:
+    global _async_built, _async_engine, _async_sessions  # noqa: PLW0603
+    if not _async_built:
+        with _async_lock:
+            if not _async_built:
+                _async_engine = _build_async_engine()
+                if _async_engine is not None:
+                    _async_sessions = async_sessionmaker(
+                        bind=_async_engine, autoflush=False, expire_on_commit=False
+                    )
+                _async_built = True
+    return _async_sessions
+
+
+def get_async_engine() -> AsyncEngine | None:
+    """The asyncio engine, built on first use; None when disabled or unavailable."""
+
+    _async_sessionmaker()
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close the asyncio engine's pooled connections if it was ever built."""
+
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def new_async_session() -> AnyAsyncSession:
+    """Open an async session (or its threadpool stand-in); the caller closes it."""
+
+    sessions = _async_sessionmaker()
+    if sessions is not None:
+        return sessions()
+    return ThreadpoolSession(SessionLocal(), _get_threadpool_slots())
+
+
+async def get_async_db() -> AsyncGenerator[AnyAsyncSession, None]:
+    """Yield an async session (or its threadpool stand-in) for a request."""
+
+    session = new_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+__all__ = [
+    "AnyAsyncSession",
+    "ThreadpoolSession",
+    "async_database_url",
+    "dispose_async_engine",
+    "get_async_db",
+    "get_async_engine",
+    "new_async_session",
+]
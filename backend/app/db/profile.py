@@ -0,0 +1,216 @@
+"""Engine tuning profiles (pool sizing, SQLite PRAGMAs, PostgreSQL options)."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+
+from app.core.config import settings
+
+# Settings reported by the diagnostics endpoint even when a profile leaves
+# them at the server default.
+_SQLITE_REPORTED = (
+    "journal_mode",
+    "synchronous",
+    "busy_timeout",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+)
+_POSTGRESQL_REPORTED = (
+    "statement_timeout",
+    "lock_timeout",
+    "idle_in_transaction_session_timeout",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EngineProfile:
+    """Connection settings applied to every engine built for a backend.
+
+    ``pool_size``/``max_overflow`` of ``None`` keep SQLAlchemy's defaults.
+    ``sqlite_pragmas`` run on each new SQLite connection; ``postgresql_options``
+    are sent as ``-c name=value`` startup options (psycopg2) or server
+    settings (asyncpg) so they also hold for the whole connection lifetime.
+    """
+
+    name: str
+    pool_size: int | None = None
+    max_overflow: int | None = None
+    pool_timeout: float | None = None
+    pool_recycle: int | None = None
+    pool_pre_ping: bool = False
+    sqlite_pragmas: dict[str, str | int] = field(default_factory=dict)
+    postgresql_options: dict[str, str] = field(default_factory=dict)
+
+
+PROFILES: dict[str, EngineProfile] = {
+    # Pre-existing behaviour: rollback journal, driver defaults, default pool.
+    "default": EngineProfile(name="default"),
+    "production": EngineProfile(
+        name="production",
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        sqlite_pragmas={
+            # Readers no longer block the single writer (and vice versa).
+            "journal_mode": "WAL",
+            # Durable across application crashes in WAL mode; only an OS crash
+            # can lose the last transactions, never corrupt the file.
+            "synchronous": "NORMAL",
+            # Wait for the write lock instead of failing with "database is locked".
+            "busy_timeout": 5000,
+            # Negative values are KiB: 64 MiB page cache per connection.
+            "cache_size": -65536,
+            "mmap_size": 268_435_456,
+            "temp_store": "MEMORY",
+        },
+        postgresql_options={
+            "statement_timeout": "30s",
+            "lock_timeout": "5s",
+            "idle_in_transaction_session_timeout": "60s",
+        },
+    ),
+}
+
+
+def active_profile() -> EngineProfile:
+    """Return the configured profile with any per-setting overrides applied."""
+
+    base = PROFILES[settings.db_profile]
+    return EngineProfile(
+        name=base.name,
+        pool_size=(
+            settings.db_pool_size if settings.db_pool_size is not None else base.pool_size
+        ),
+        max_overflow=(
+            settings.db_max_overflow
+            if settings.db_max_overflow is not None
+            else base.max_overflow
+        ),
+        pool_timeout=base.pool_timeout,
+        pool_recycle=base.pool_recycle,
+        pool_pre_ping=base.pool_pre_ping,
+        sqlite_pragmas={**base.sqlite_pragmas, **settings.db_sqlite_pragmas},
+        postgresql_options={**base.postgresql_options, **settings.db_postgresql_options},
+    )
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def pool_kwargs(url: str, profile: EngineProfile) -> dict[str, Any]:
+    """``create_engine`` pool arguments for ``url`` under ``profile``."""
+
+    # In-memory SQLite uses a SingletonThreadPool/StaticPool, which has no
+    # overflow and must not be resized.
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        return {}
+    kwargs: dict[str, Any] = {"pool_pre_ping": profile.pool_pre_ping}
+    if profile.pool_size is not None:
+        kwargs["pool_size"] = profile.pool_size
+    if profile.max_overflow is not None:
+        kwargs["max_overflow"] = profile.max_overflow
+    if profile.pool_timeout is not None:
+        kwargs["pool_timeout"] = profile.pool_timeout
+    if profile.pool_recycle is not None:
+        kwargs["pool_recycle"] = profile.pool_recycle
+    return kwargs
+
+
+def postgresql_connect_args(url: str, profile: EngineProfile) -> dict[str, Any]:
+    """Driver-specific ``connect_args`` carrying the PostgreSQL session options."""
+
+    if not profile.postgresql_options:
+        return {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        return {"server_settings": dict(profile.postgresql_options)}
+    return {
+        "options": " ".join(
+            f"-c {name}={value}" for name, value in profile.postgresql_options.items()
+        )
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """Run ``pragmas`` on every new DBAPI connection of ``engine``.
+
+    Pass ``AsyncEngine.sync_engine`` for asyncio engines; the aiosqlite
+    adapter exposes the same cursor API inside ``connect`` events.
+    """
+
+    if not pragmas:
+        return
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def configure_engine(engine: Engine, profile: EngineProfile) -> None:
+    """Install per-connection hooks of ``profile`` on a freshly built engine."""
+
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine, profile.sqlite_pragmas)
+
+
+def read_connection_settings(
+    connection: Connection, profile: EngineProfile
+) -> dict[str, str]:
+    """Read back the effective per-connection settings of ``profile``."""
+
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        names = dict.fromkeys([*_SQLITE_REPORTED, *profile.sqlite_pragmas])
+        return {
+            name: str(connection.exec_driver_sql(f"PRAGMA {name}").scalar())
+            for name in names
+        }
+    if dialect == "postgresql":
+        names = dict.fromkeys([*_POSTGRESQL_REPORTED, *profile.postgresql_options])
+        return {
+            name: str(connection.exec_driver_sql(f"SHOW {name}").scalar())
+            for name in names
+        }
+    return {}
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    """Summarise the connection pool of ``engine`` for diagnostics."""
+
+    pool = engine.pool
+    summary: dict[str, Any] = {"class": type(pool).__name__, "status": pool.status()}
+    for attribute in ("size", "checkedin", "checkedout", "overflow"):
+        value = getattr(pool, attribute, None)
+        if callable(value):
+            summary[attribute] = value()
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if max_overflow is not None:
+        summary["max_overflow"] = max_overflow
+    return summary
+
+
+__all__ = [
+    "EngineProfile",
+    "PROFILES",
+    "active_profile",
+    "apply_sqlite_pragmas",
+    "configure_engine",
+    "pool_kwargs",
+    "pool_status",
+    "postgresql_connect_args",
+    "read_connection_settings",
+]
@@ -1,12 +1,27 @@
 """SQLAlchemy session and base class declarations."""
 
-from collections.abc import Generator
+import logging
+from collections.abc import Callable, Generator
 from typing import Any
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy import Insert, create_engine, event, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, SessionTransaction, sessionmaker
 
 from app.core.config import settings
+from app.core.lazy import lazy
+from app.db.profile import (
+    active_profile,
+    configure_engine,
+    pool_kwargs,
+    postgresql_connect_args,
+)
+
+logger = logging.getLogger(__name__)
+
+_AFTER_COMMIT_KEY = "after_commit_callbacks"
 
 
 class Base(DeclarativeBase):
@@ -14,13 +29,25 @@ class Base(DeclarativeBase):
 
 
 def _build_engine_kwargs(url: str) -> dict[str, Any]:
-    kwargs: dict[str, Any] = {"future": True}
+    profile = active_profile()
+    kwargs: dict[str, Any] = {"future": True, **pool_kwargs(url, profile)}
     if url.startswith("sqlite"):
         kwargs["connect_args"] = {"check_same_thread": False}
+    elif url.startswith("postgresql"):
+        kwargs["connect_args"] = postgresql_connect_args(url, profile)
     return kwargs
 
 
-engine = create_engine(settings.database_url, **_build_engine_kwargs(settings.database_url))
+def _build_engine() -> Engine:
+    built = create_engine(
+        settings.database_url, **_build_engine_kwargs(settings.database_url)
+    )
+    configure_engine(built, active_profile())
+    return built
+
+
+# Built on first use; creating an engine never connects, but it needs settings.
+engine: Engine = lazy(_build_engine)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
 
@@ -35,5 +62,63 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"]
+def run_after_commit(session: Session, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the session's current transaction commits.
+
+    Callbacks are dropped if the transaction is rolled back instead, so side
+    effects (waking pollers, publishing events) never refer to rows that were
+    never persisted.
+    """
+
+    session.info.setdefault(_AFTER_COMMIT_KEY, []).append(callback)
+
+
+def insert_ignore(session: Session, model: type[Base]) -> Insert:
+    """``INSERT`` for ``model`` that skips rows whose unique key already exists.
+
+    Uses ``ON CONFLICT DO NOTHING`` on SQLite and PostgreSQL, so concurrent
+    writers racing on the same key never fail with an IntegrityError. Works
+    for single rows and executemany parameter lists alike.
+    """
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql_insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+def insert_if_absent(session: Session, model: type[Base], values: dict[str, Any]) -> bool:
+    """Insert a row unless a unique key already exists; True if inserted."""
+
+    session.flush()
+    return session.execute(insert_ignore(session, model).values(values)).rowcount == 1
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_AFTER_COMMIT_KEY, ()):
+        try:
+            callback()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("after-commit callback %r failed", callback)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_after_commit_callbacks(
+    session: Session, transaction: SessionTransaction
+) -> None:
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT_KEY, None)
+
 
+__all__ = [
+    "Base",
+    "engine",
+    "SessionLocal",
+    "get_db",
+    "insert_if_absent",
+    "insert_ignore",
+    "run_after_commit",
+]
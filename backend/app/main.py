@@ -1,24 +1,112 @@
-"""FastAPI application bootstrap."""
+"""FastAPI application bootstrap.
+
+Importing this module has no side effects: settings, engines and the app
+itself are built on first use, logging is configured when a server starts
+the app, and the schema is left to ``alembic upgrade head`` at deploy time.
+"""
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from functools import lru_cache
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core.jobs import PeriodicJob, periodic_jobs
 from app.core.logging import configure_logging
-from app.db.session import Base, engine
+from app.core.metrics import MetricsMiddleware, mark_process_dead
+from app.core.responses import FastJSONResponse
+from app.db.aio import dispose_async_engine
+from app.routes.admin import NEXT_CURSOR_HEADER
 from app.routes.admin import router as admin_router
+from app.routes.diagnostics import router as diagnostics_router
 from app.routes.maa import router as maa_router
+from app.routes.metrics import router as metrics_router
+from app.services import (
+    archive_finished_tasks,
+    collect_orphan_blobs,
+    flush_heartbeats,
+    reap_stuck_tasks,
+    recurring_scheduler,
+    release_expired_leases,
+    repair_task_counts,
+)
+
+
+def _background_jobs() -> list[PeriodicJob]:
+    return [
+        PeriodicJob(
+            name="heartbeat-flush",
+            interval=settings.heartbeat_flush_seconds,
+            run=flush_heartbeats,
+            run_on_shutdown=True,
+        ),
+        PeriodicJob(
+            name="lease-sweep",
+            interval=settings.lease_sweep_seconds,
+            run=release_expired_leases,
+        ),
+        PeriodicJob(
+            name="stuck-task-reaper",
+            interval=settings.stuck_task_sweep_seconds,
+            run=reap_stuck_tasks,
+        ),
+        PeriodicJob(
+            name="task-archiver",
+            interval=settings.archive_sweep_seconds,
+            run=archive_finished_tasks,
+        ),
+        PeriodicJob(
+            name="blob-gc",
+            interval=settings.blob_gc_seconds,
+            run=collect_orphan_blobs,
+        ),
+        PeriodicJob(
+            name="task-count-repair",
+            interval=settings.task_count_repair_seconds,
+            run=repair_task_counts,
+        ),
+    ]
+
+
+def _scheduler() -> AbstractAsyncContextManager[None]:
+    if not settings.scheduler_enabled:
+        return nullcontext()
+    return recurring_scheduler.running()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Run background maintenance jobs and the scheduler while serving."""
+
+    configure_logging()
+    async with periodic_jobs(_background_jobs()), _scheduler():
+        yield
+    await dispose_async_engine()
+    mark_process_dead()
+
+
+def health_check() -> dict[str, str]:
+    """Simple health check endpoint."""
+
+    return {"status": "ok"}
 
 
 def create_app() -> FastAPI:
     """Application factory."""
 
-    configure_logging()
-    Base.metadata.create_all(bind=engine)
-
-    app = FastAPI(title=settings.app_name, debug=settings.debug)
+    app = FastAPI(
+        title=settings.app_name,
+        debug=settings.debug,
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse if settings.fast_json else JSONResponse,
+    )
 
     if settings.allowed_origins:
         app.add_middleware(
@@ -27,20 +115,30 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["ETag", NEXT_CURSOR_HEADER],
         )
 
+    app.add_api_route("/healthz", health_check, methods=["GET"], tags=["health"])
     app.include_router(maa_router)
     app.include_router(admin_router)
+    app.include_router(diagnostics_router)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+    # Outermost, so the stats scope covers the metrics middleware's reads.
+    app.add_middleware(QueryStatsMiddleware)
 
     return app
 
 
-app = create_app()
+@lru_cache
+def _default_app() -> FastAPI:
+    return create_app()
 
 
-@app.get("/healthz", tags=["health"])
-def health_check() -> dict[str, str]:
-    """Simple health check endpoint."""
-
-    return {"status": "ok"}
+def __getattr__(name: str) -> Any:
+    # ``app`` is built on first access (``uvicorn app.main:app``), not at import.
+    if name == "app":
+        return _default_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
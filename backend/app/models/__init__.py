@@ -1,8 +1,20 @@
 """ORM model exports."""
 
-from .device import Device
-from .task import Task, TaskLog, TaskStatus
+from .blob import Blob
+from .device import Device, DeviceTag
+from .schedule import Schedule
+from .task import FINISHED_STATUSES, Task, TaskCount, TaskLog, TaskStatus
 from .user import User
 
-__all__ = ["User", "Device", "Task", "TaskLog", "TaskStatus"]
-
+__all__ = [
+    "Blob",
+    "User",
+    "Device",
+    "DeviceTag",
+    "Schedule",
+    "Task",
+    "TaskCount",
+    "TaskLog",
+    "TaskStatus",
+    "FINISHED_STATUSES",
+]
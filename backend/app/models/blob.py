@@ -0,0 +1,32 @@
+"""Content-addressed compressed blob storage."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class Blob(Base):
+    """Immutable payload (task log, result, stats) keyed by its SHA-256.
+
+    Identical payloads are stored once. ``data`` holds the encoded bytes;
+    ``codec`` says how to decode them and ``size`` is the decoded length.
+    """
+
+    __tablename__ = "blobs"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(16))
+    size: Mapped[int]
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+__all__ = ["Blob"]
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -17,6 +17,8 @@ class Device(Base):
     __tablename__ = "devices"
     __table_args__ = (
         UniqueConstraint("user_key", "device_id", name="uq_device_user_device"),
+        # Keyset pagination of a user's devices on (created_at, id).
+        Index("ix_devices_user_created", "user_key", "created_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -40,5 +42,18 @@ class Device(Base):
     tasks: Mapped[list["Task"]] = relationship(back_populates="device")
 
 
-__all__ = ["Device"]
+class DeviceTag(Base):
+    """A free-form label on a device, used to address groups of devices."""
+
+    __tablename__ = "device_tags"
+    # Serves tag selectors: every device carrying a tag, without a scan.
+    __table_args__ = (Index("ix_device_tags_tag", "tag", "device_id"),)
+
+    device_id: Mapped[int] = mapped_column(
+        ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+
+__all__ = ["Device", "DeviceTag"]
 
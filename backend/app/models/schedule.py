@@ -0,0 +1,55 @@
+"""Recurring task schedule model definition."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, true
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+from app.models.task import _PAYLOAD_TYPE
+
+
+class Schedule(Base):
+    """Creates a task on a device every ``interval_seconds`` from ``anchor_at``.
+
+    Runs fall on ``anchor_at + k * interval_seconds``; ``next_run_at`` is the
+    next of them still to be materialized. Like :class:`Task`, the owner and
+    device identifiers are denormalized so due schedules turn into task rows
+    without joins.
+    """
+
+    __tablename__ = "schedules"
+    # The scheduler only ever asks for the earliest enabled due times.
+    __table_args__ = (Index("ix_schedules_due", "enabled", "next_run_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    user_key: Mapped[str] = mapped_column(String(64), index=True)
+    device_id: Mapped[int] = mapped_column(
+        ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    device_identifier: Mapped[str] = mapped_column(String(128))
+    name: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    type: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[dict[str, Any]] = mapped_column(_PAYLOAD_TYPE, default=dict)
+    priority: Mapped[int] = mapped_column(default=0)
+    interval_seconds: Mapped[int] = mapped_column()
+    anchor_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    next_run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_run_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    enabled: Mapped[bool] = mapped_column(default=True, server_default=true())
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+__all__ = ["Schedule"]
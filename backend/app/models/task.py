@@ -7,7 +7,7 @@ from enum import Enum
 from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import JSON, DateTime, Enum as SAEnum, ForeignKey, String, Text
+from sqlalchemy import JSON, DateTime, Enum as SAEnum, ForeignKey, Index, String, Text
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -27,6 +27,12 @@ class TaskStatus(str, Enum):
     CANCELLED = "Cancelled"
 
 
+# States a task never leaves on its own; no further reports or output follow.
+FINISHED_STATUSES = frozenset(
+    {TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.CANCELLED}
+)
+
+
 class Task(Base):
     """Represents a remote execution task assigned to an agent device."""
 
@@ -46,12 +52,30 @@ class Task(Base):
         SAEnum(TaskStatus, native_enum=False, length=16), default=TaskStatus.PENDING
     )
     priority: Mapped[int] = mapped_column(default=0)
+    retry_count: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
-    log: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Indexed for the retention sweep, which walks finished history by age.
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    # Final log, result and stats live compressed in ``blobs``; the hot
+    # tasks row only carries their digests. Read them via BlobStore. The
+    # indexes let archiving find blobs that are no longer referenced.
+    log_digest: Mapped[str | None] = mapped_column(
+        ForeignKey("blobs.digest"), nullable=True, index=True
+    )
+    result_digest: Mapped[str | None] = mapped_column(
+        ForeignKey("blobs.digest"), nullable=True, index=True
+    )
+    stats_digest: Mapped[str | None] = mapped_column(
+        ForeignKey("blobs.digest"), nullable=True, index=True
+    )
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="tasks")
@@ -60,6 +84,32 @@ class Task(Base):
         back_populates="task", cascade="all, delete-orphan"
     )
 
+    @property
+    def has_log(self) -> bool:
+        return self.log_digest is not None
+
+
+# Serves the agent queue scan (fetch_next_pending_task / fetch_pending_batch):
+# equality on user/device/status, then the dispatch order. Finished history is
+# skipped by the index seek instead of being scanned row by row.
+Index(
+    "ix_tasks_queue",
+    Task.user_key,
+    Task.device_identifier,
+    Task.status,
+    Task.priority.desc(),
+    Task.created_at,
+    Task.id,
+)
+
+# Serves the admin task listing: newest first per device, paged by keyset on
+# (created_at, id) so deep pages cost the same as the first one.
+Index("ix_tasks_device_created", Task.device_id, Task.created_at, Task.id)
+
+# Serves the stuck-task reaper: Running rows ordered by start time, so each
+# sweep only touches tasks older than the cut-off.
+Index("ix_tasks_status_started_at", Task.status, Task.started_at)
+
 
 class TaskLog(Base):
     """Fine-grained logging entries associated with a task."""
@@ -70,6 +120,8 @@ class TaskLog(Base):
     task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"))
     level: Mapped[str] = mapped_column(String(16), default="INFO")
     message: Mapped[str] = mapped_column(Text)
+    # Position of a streamed output chunk; NULL for structured entries.
+    seq: Mapped[int | None] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -77,5 +129,29 @@ class TaskLog(Base):
     task: Mapped[Task] = relationship(back_populates="logs")
 
 
-__all__ = ["Task", "TaskLog", "TaskStatus"]
+# One row per streamed chunk: makes appends idempotent under agent retries
+# and serves resume-from-offset reads and ring eviction as range scans.
+Index("ix_task_logs_task_seq", TaskLog.task_id, TaskLog.seq, unique=True)
+
+
+class TaskCount(Base):
+    """Number of live tasks of a device in one status.
+
+    Maintained incrementally by every status change (see
+    app.services.counters), so dashboards read a handful of rows instead of
+    aggregating ``tasks``. Archived tasks are not counted.
+    """
+
+    __tablename__ = "task_counts"
+
+    device_id: Mapped[int] = mapped_column(
+        ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True
+    )
+    status: Mapped[TaskStatus] = mapped_column(
+        SAEnum(TaskStatus, native_enum=False, length=16), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+__all__ = ["FINISHED_STATUSES", "Task", "TaskCount", "TaskLog", "TaskStatus"]
 
@@ -2,32 +2,244 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import hashlib
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, TypeVar
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db.aio import new_async_session
 from app.db.session import get_db
-from app.schemas import DeviceOut, TaskCreate, TaskOut
-from app.services import DeviceService, TaskService
+from app.models import FINISHED_STATUSES, Schedule, TaskStatus
+from app.schemas import (
+    BulkTaskCreate,
+    BulkTaskCreateOut,
+    DashboardOut,
+    DeviceOut,
+    DeviceTagsIn,
+    DeviceTagsOut,
+    DeviceTaskCountsOut,
+    ScheduleCreate,
+    ScheduleOut,
+    ScheduleUpdate,
+    TaskCreate,
+    TaskLogChunksOut,
+    TaskLogOut,
+    TaskOut,
+    TaskOutputOut,
+)
+from app.services import (
+    OVERFLOW,
+    ArchiveService,
+    DeviceRef,
+    DeviceService,
+    PageCursor,
+    ScheduleService,
+    TaskService,
+    change_feed,
+    read_device_counts,
+    read_presence_version,
+    read_version,
+    task_log_key,
+    task_notifier,
+)
+from app.services.aio import AsyncTaskService
+from app.services.pagination import as_utc, row_sort_key
 
 router = APIRouter(prefix="/api", tags=["admin"])
 
+# Response header carrying the cursor of the next page; absent on the last one.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_Row = TypeVar("_Row")
+
+
+def _parse_cursor(cursor: str | None) -> PageCursor | None:
+    if cursor is None:
+        return None
+    try:
+        return PageCursor.decode(cursor)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+        ) from exc
+
+
+def _not_modified(
+    request: Request, response: Response, version: str | None, *query: object
+) -> Response | None:
+    """Attach an ETag for ``version``; return a 304 if the client has it.
+
+    ``query`` is the normalized set of parameters that select the rows
+    (cursor, limit, ...), so every page and variant of a listing gets its
+    own validator.
+    """
+
+    if version is None:
+        return None
+    key = "|".join([version, *("" if part is None else str(part) for part in query)])
+    digest = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+    headers = {"ETag": f'W/"{digest}"', "Cache-Control": "no-cache"}
+    response.headers.update(headers)
+    tags = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if headers["ETag"] in tags or "*" in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
+def _page(response: Response, rows: Sequence[_Row], limit: int) -> list[_Row]:
+    """Trim a ``limit + 1`` fetch to ``limit`` rows and advertise the next page."""
+
+    if len(rows) <= limit:
+        return list(rows)
+    page = list(rows[:limit])
+    response.headers[NEXT_CURSOR_HEADER] = PageCursor.after(page[-1]).encode()
+    return page
+
+
+def _reaches_archive(rows: Sequence[Row[Any]], limit: int) -> bool:
+    """Whether archived tasks may belong on the page of a ``limit + 1`` live fetch.
+
+    Only tasks finished, hence created, before the retention cutoff are
+    archived. A full live page whose last row is newer than the cutoff
+    therefore has no archived rows in between, and the archive files need
+    not be read.
+    """
+
+    if len(rows) <= limit:
+        return True
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.task_retention_days)
+    return as_utc(rows[limit - 1].created_at) <= cutoff
+
+
+def _fast_json(response: Response, content: object) -> FastJSONResponse:
+    """Serve ``content`` as is, keeping the headers set on ``response``.
+
+    Returning a response object bypasses ``response_model`` validation; the
+    caller builds ``content`` in the model's field order and types.
+    """
+
+    return FastJSONResponse(content, headers=dict(response.headers))
+
+
+_DEVICE_FIELDS = tuple(DeviceOut.model_fields)
+
+
+def _device_value(device: object, field: str) -> object:
+    """A ``DeviceOut`` field as the model would serialize it (UTC datetimes)."""
+
+    value = getattr(device, field)
+    return as_utc(value) if isinstance(value, datetime) else value
+
+
+def _resolve_device(
+    device_service: DeviceService, *, user_key: str, device_id: str
+) -> DeviceRef:
+    """Resolve a device through the identity cache or raise 404."""
+
+    device = device_service.resolve_device(
+        user_key=user_key, device_identifier=device_id
+    )
+    if device is not None:
+        return device
+    if device_service.get_user_id(user_key) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Device not found.")
+
 
 @router.get("/devices", response_model=list[DeviceOut])
 def list_devices(
+    request: Request,
+    response: Response,
     user: str | None = Query(
         default=None, description="Filter devices by user key (optional)."
     ),
+    limit: int = Query(100, ge=1, le=500, description="Number of devices to return."),
+    cursor: str | None = Query(
+        default=None, description=f"Page cursor from a previous {NEXT_CURSOR_HEADER}."
+    ),
     db: Session = Depends(get_db),
-) -> list[DeviceOut]:
-    """Return known devices, optionally filtered by user."""
+) -> list[DeviceOut] | Response:
+    """Return known devices newest first, optionally filtered by user.
+
+    Pages are chained through the ``X-Next-Cursor`` response header. The
+    ``ETag`` changes with the owner's revision counter and heartbeats,
+    buffered ones included; a matching ``If-None-Match`` gets a 304 without
+    loading any device.
+    """
 
+    page_cursor = _parse_cursor(cursor)
     device_service = DeviceService(db)
     if user:
         # If user does not exist yet, return empty list for clarity.
-        if not device_service.get_user(user):
+        if device_service.get_user_id(user) is None:
             return []
-    devices = device_service.list_devices(user)
-    return devices
+    not_modified = _not_modified(
+        request,
+        response,
+        read_presence_version(db, user or None),
+        page_cursor and page_cursor.encode(),
+        limit,
+    )
+    if not_modified is not None:
+        return not_modified
+    devices = device_service.list_devices(user, limit=limit + 1, cursor=page_cursor)
+    page = _page(response, devices, limit)
+    if settings.fast_json:
+        return _fast_json(
+            response,
+            [
+                {field: _device_value(device, field) for field in _DEVICE_FIELDS}
+                for device in page
+            ],
+        )
+    return page
+
+
+@router.get("/dashboard", response_model=DashboardOut)
+def read_dashboard(
+    request: Request,
+    response: Response,
+    user: str = Query(..., description="User key whose devices to summarize."),
+    db: Session = Depends(get_db),
+) -> DashboardOut | Response:
+    """Pending/running/finished task counts per device of a user.
+
+    Served from the incrementally maintained ``task_counts`` table, so the
+    cost depends on the number of devices, not tasks. Supports the same
+    ``ETag``/``If-None-Match`` revalidation as the lists.
+    """
+
+    version = read_version(db, user)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    not_modified = _not_modified(request, response, version)
+    if not_modified is not None:
+        return not_modified
+
+    totals: dict[TaskStatus, int] = {}
+    devices = []
+    for device_id, counts in read_device_counts(db, user).items():
+        for task_status, count in counts.items():
+            totals[task_status] = totals.get(task_status, 0) + count
+        devices.append(DeviceTaskCountsOut(device_id=device_id, counts=counts))
+    return DashboardOut(user_key=user, totals=totals, devices=devices)
 
 
 @router.get(
@@ -35,28 +247,80 @@ def list_devices(
     response_model=list[TaskOut],
 )
 def list_device_tasks(
+    request: Request,
+    response: Response,
     device_id: str,
     user: str = Query(..., description="User key that owns the device."),
     limit: int = Query(20, ge=1, le=100, description="Number of tasks to return."),
+    cursor: str | None = Query(
+        default=None, description=f"Page cursor from a previous {NEXT_CURSOR_HEADER}."
+    ),
+    include_archived: bool = Query(
+        default=False, description="Merge archived history into the listing."
+    ),
     db: Session = Depends(get_db),
-) -> list[TaskOut]:
-    """Return recent tasks for a specific device."""
+) -> list[TaskOut] | Response:
+    """Return tasks of a device newest first, paged by ``(created_at, id)``.
+
+    Conditional requests work as for ``GET /api/devices``. With
+    ``include_archived`` the archive is read only when the live rows do not
+    fill the page on their own (see :func:`_reaches_archive`). With
+    ``MAA_FAST_JSON`` live-only pages are serialized without building
+    ``TaskOut`` models.
+    """
 
+    page_cursor = _parse_cursor(cursor)
     device_service = DeviceService(db)
     task_service = TaskService(db)
 
-    user_obj = device_service.get_user(user)
-    if user_obj is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    device = _resolve_device(device_service, user_key=user, device_id=device_id)
+    not_modified = _not_modified(
+        request,
+        response,
+        read_version(db, user),
+        device_id,
+        page_cursor and page_cursor.encode(),
+        limit,
+        include_archived,
+    )
+    if not_modified is not None:
+        return not_modified
 
-    device = device_service.get_device(user_key=user, device_identifier=device_id)
-    if device is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Device not found."
-        )
+    rows = task_service.list_recent_task_rows(
+        device=device, limit=limit + 1, cursor=page_cursor
+    )
+    if not (include_archived and _reaches_archive(rows, limit)):
+        if settings.fast_json:
+            return _fast_json(
+                response,
+                [
+                    {**row._asdict(), "archived": False}
+                    for row in _page(response, rows, limit)
+                ],
+            )
+        return [
+            TaskOut.model_validate(row._asdict())
+            for row in _page(response, rows, limit)
+        ]
 
-    tasks = task_service.list_recent_tasks(device=device, limit=limit)
-    return list(tasks)
+    tasks = [TaskOut.model_validate(row._asdict()) for row in rows]
+    live = {task.task_uuid for task in tasks}
+    archived = ArchiveService(db).list_archived_tasks(
+        user_key=user,
+        device_identifier=device_id,
+        limit=limit + 1,
+        cursor=page_cursor,
+    )
+    tasks.extend(
+        TaskOut.model_validate(
+            {**record, "has_log": record["log"] is not None, "archived": True}
+        )
+        for record in archived
+        # Rows of a batch whose archiving did not commit are still live.
+        if record["task_uuid"] not in live
+    )
+    tasks.sort(key=row_sort_key, reverse=True)
+    return _page(response, tasks, limit)
 
 
 @router.post(
@@ -75,18 +339,9 @@ def create_task_for_device(
     device_service = DeviceService(db)
     task_service = TaskService(db)
 
-    user_obj = device_service.get_user(user)
-    if user_obj is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
-
-    device = device_service.get_device(user_key=user, device_identifier=device_id)
-    if device is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Device not found."
-        )
+    device = _resolve_device(device_service, user_key=user, device_id=device_id)
 
     task = task_service.enqueue_task(
-        user=user_obj,
         device=device,
         task_type=task_in.type,
         payload=task_in.params,
@@ -96,3 +351,333 @@ def create_task_for_device(
     db.refresh(task)
     return task
 
+
+@router.post(
+    "/tasks/bulk",
+    response_model=BulkTaskCreateOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_tasks_bulk(
+    bulk_in: BulkTaskCreate,
+    user: str = Query(..., description="User key that owns the devices."),
+    db: Session = Depends(get_db),
+) -> BulkTaskCreateOut:
+    """Create the same task on many devices of a user in one transaction.
+
+    The selector names devices explicitly, picks every device of the user
+    or every device carrying a tag. Unknown devices of an explicit list are
+    reported in ``missing_devices`` instead of failing the request. At most
+    ``MAA_MAX_BULK_TASKS`` devices may be targeted per call.
+    """
+
+    device_service = DeviceService(db)
+    if device_service.get_user_id(user) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    selector = bulk_in.selector
+    devices = device_service.select_devices(
+        user_key=user, device_identifiers=selector.devices, tag=selector.tag
+    )
+    if len(devices) > settings.max_bulk_tasks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Selector matches {len(devices)} devices; "
+            f"the limit is {settings.max_bulk_tasks}.",
+        )
+
+    task_uuids = TaskService(db).enqueue_bulk(
+        devices=devices,
+        task_type=bulk_in.task.type,
+        payload=bulk_in.task.params,
+        priority=bulk_in.task.priority,
+    )
+    db.commit()
+    found = {device.device_id for device in devices}
+    return BulkTaskCreateOut(
+        created=len(task_uuids),
+        task_uuids=task_uuids,
+        device_ids=[device.device_id for device in devices],
+        missing_devices=[
+            device_id
+            for device_id in dict.fromkeys(selector.devices or ())
+            if device_id not in found
+        ],
+    )
+
+
+@router.get("/devices/{device_id}/tags", response_model=DeviceTagsOut)
+def read_device_tags(
+    device_id: str,
+    user: str = Query(..., description="User key that owns the device."),
+    db: Session = Depends(get_db),
+) -> DeviceTagsOut:
+    """Return the tags of a device."""
+
+    device_service = DeviceService(db)
+    device = _resolve_device(device_service, user_key=user, device_id=device_id)
+    return DeviceTagsOut(device_id=device_id, tags=device_service.get_tags(device))
+
+
+@router.put("/devices/{device_id}/tags", response_model=DeviceTagsOut)
+def replace_device_tags(
+    device_id: str,
+    tags_in: DeviceTagsIn,
+    user: str = Query(..., description="User key that owns the device."),
+    db: Session = Depends(get_db),
+) -> DeviceTagsOut:
+    """Replace the tags of a device, which tag selectors of bulk calls match."""
+
+    device_service = DeviceService(db)
+    device = _resolve_device(device_service, user_key=user, device_id=device_id)
+    tags = device_service.set_tags(device, tags_in.tags)
+    db.commit()
+    return DeviceTagsOut(device_id=device_id, tags=tags)
+
+
+@router.post(
+    "/devices/{device_id}/schedules",
+    response_model=ScheduleOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_schedule(
+    device_id: str,
+    schedule_in: ScheduleCreate,
+    user: str = Query(..., description="User key that owns the device."),
+    db: Session = Depends(get_db),
+) -> ScheduleOut:
+    """Create a task on the device every ``interval_seconds`` from ``start_at``."""
+
+    device = _resolve_device(DeviceService(db), user_key=user, device_id=device_id)
+    schedule = ScheduleService(db).create_schedule(
+        device=device,
+        name=schedule_in.name,
+        task_type=schedule_in.task.type,
+        payload=schedule_in.task.params,
+        priority=schedule_in.task.priority,
+        interval_seconds=schedule_in.interval_seconds,
+        start_at=schedule_in.start_at,
+    )
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.get("/schedules", response_model=list[ScheduleOut])
+def list_schedules(
+    user: str = Query(..., description="User key whose schedules to list."),
+    db: Session = Depends(get_db),
+) -> list[ScheduleOut]:
+    """Return a user's recurring schedules, soonest due first."""
+
+    return ScheduleService(db).list_schedules(user)
+
+
+def _get_schedule(
+    schedule_service: ScheduleService, *, user_key: str, schedule_id: int
+) -> Schedule:
+    schedule = schedule_service.get_schedule(user_key=user_key, schedule_id=schedule_id)
+    if schedule is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found."
+        )
+    return schedule
+
+
+@router.patch("/schedules/{schedule_id}", response_model=ScheduleOut)
+def update_schedule(
+    schedule_id: int,
+    schedule_in: ScheduleUpdate,
+    user: str = Query(..., description="User key that owns the schedule."),
+    db: Session = Depends(get_db),
+) -> ScheduleOut:
+    """Pause or resume a schedule; runs missed while paused are skipped."""
+
+    schedule_service = ScheduleService(db)
+    schedule = _get_schedule(schedule_service, user_key=user, schedule_id=schedule_id)
+    schedule_service.set_enabled(schedule, schedule_in.enabled)
+    db.commit()
+    db.refresh(schedule)
+    return schedule
+
+
+@router.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_schedule(
+    schedule_id: int,
+    user: str = Query(..., description="User key that owns the schedule."),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Delete a schedule; tasks it already created are kept."""
+
+    schedule_service = ScheduleService(db)
+    schedule = _get_schedule(schedule_service, user_key=user, schedule_id=schedule_id)
+    schedule_service.delete_schedule(schedule)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/tasks/{task_uuid}/output", response_model=TaskOutputOut)
+def read_task_output(task_uuid: str, db: Session = Depends(get_db)) -> TaskOutputOut:
+    """Return the final log, result and stats a task reported."""
+
+    task_service = TaskService(db)
+    task = task_service.get_by_uuid(task_uuid)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found.")
+    return TaskOutputOut(task_uuid=task.task_uuid, **task_service.load_output(task))
+
+
+@router.get("/tasks/{task_uuid}/log", response_model=TaskLogChunksOut)
+def read_task_log(
+    task_uuid: str,
+    offset: int = Query(0, ge=0, description="First chunk sequence number to return."),
+    limit: int = Query(200, ge=1, le=1000, description="Maximum chunks to return."),
+    db: Session = Depends(get_db),
+) -> TaskLogChunksOut:
+    """Return streamed output of a task, resuming from ``offset``."""
+
+    task_service = TaskService(db)
+    task = task_service.get_by_uuid(task_uuid)
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found.")
+
+    chunks = task_service.read_log_chunks(task, offset=offset, limit=limit)
+    return TaskLogChunksOut(
+        task_uuid=task.task_uuid,
+        status=task.status,
+        chunks=[TaskLogOut.model_validate(chunk) for chunk in chunks],
+        next_offset=chunks[-1].seq + 1 if chunks else offset,
+        finished=task.status in FINISHED_STATUSES and len(chunks) < limit,
+    )
+
+
+def _sse(event: str, data: dict[str, object], event_id: int | None = None) -> str:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/tasks/{task_uuid}/log/stream")
+async def tail_task_log(
+    task_uuid: str,
+    request: Request,
+    offset: int = Query(0, ge=0, description="First chunk sequence number to send."),
+    last_event_id: int | None = Header(default=None),
+) -> StreamingResponse:
+    """Tail a task's output as Server-Sent Events.
+
+    Each ``chunk`` event carries one output chunk and its ``seq`` as the
+    event id, so a reconnecting ``EventSource`` resumes after the last chunk
+    it saw. An ``end`` event follows the last chunk of a finished task. The
+    stream holds no database connection while waiting for new output; new
+    chunks from other workers show up at the latest after the keep-alive
+    interval.
+    """
+
+    async def load(next_offset: int) -> tuple[TaskStatus | None, list[TaskLogOut]]:
+        session = new_async_session()
+        try:
+            task_service = AsyncTaskService(session)
+            task = await task_service.get_by_uuid(task_uuid)
+            if task is None:
+                return None, []
+            chunks = await task_service.read_log_chunks(task, offset=next_offset)
+            return task.status, [TaskLogOut.model_validate(chunk) for chunk in chunks]
+        finally:
+            await session.close()
+
+    next_offset = last_event_id + 1 if last_event_id is not None else offset
+    task_status, first_chunks = await load(next_offset)
+    if task_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found.")
+
+    async def events() -> AsyncIterator[str]:
+        nonlocal next_offset
+        key = task_log_key(task_uuid)
+        task_status_, chunks = task_status, first_chunks
+        while True:
+            # Subscribe before the next read so no append is missed.
+            waiter = task_notifier.subscribe(key)
+            try:
+                for chunk in chunks:
+                    next_offset = chunk.seq + 1
+                    yield _sse(
+                        "chunk", {"seq": chunk.seq, "data": chunk.message}, chunk.seq
+                    )
+                if not chunks:
+                    if task_status_ in FINISHED_STATUSES:
+                        yield _sse("end", {"status": task_status_})
+                        return
+                    if await request.is_disconnected():
+                        return
+                    if not await task_notifier.wait(
+                        waiter, settings.log_tail_keepalive_seconds
+                    ):
+                        yield ": keep-alive\n\n"
+            finally:
+                task_notifier.unsubscribe(key, waiter)
+            task_status_, chunks = await load(next_offset)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/events")
+async def stream_changes(
+    request: Request,
+    user: str = Query(..., description="User key whose changes to follow."),
+) -> StreamingResponse:
+    """Push task and device changes of a user as Server-Sent Events.
+
+    ``task`` events carry a task's new status (an unknown ``task_uuid`` is
+    a new task) and ``device`` events carry heartbeats and presence. They
+    come from this worker's in-memory hub. Every
+    ``MAA_CHANGE_FEED_RESYNC_SECONDS`` the stream also compares the user's
+    list version and sends ``resync`` if it moved, which covers changes made
+    by other workers; otherwise it sends a keep-alive. A client that falls
+    too far behind gets ``overflow`` and the stream ends: reconnect and
+    refetch the lists.
+    """
+
+    async def load_version() -> str | None:
+        session = new_async_session()
+        try:
+            return await session.run_sync(read_version, user)
+        finally:
+            await session.close()
+
+    version = await load_version()
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+
+    async def events() -> AsyncIterator[str]:
+        nonlocal version
+        subscription = change_feed.subscribe(user)
+        try:
+            while True:
+                event = await change_feed.next(
+                    subscription, settings.change_feed_resync_seconds
+                )
+                if event is OVERFLOW:
+                    yield _sse("overflow", {})
+                    return
+                if event is not None:
+                    yield _sse(event.kind, event.data)
+                    continue
+                if await request.is_disconnected():
+                    return
+                current = await load_version()
+                if current != version:
+                    version = current
+                    yield _sse("resync", {})
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
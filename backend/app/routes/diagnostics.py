@@ -0,0 +1,47 @@
+"""Operational diagnostics endpoints."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.aio import get_async_engine
+from app.db.profile import active_profile, pool_status, read_connection_settings
+from app.db.session import engine
+from app.schemas import DatabaseDiagnosticsOut, EngineDiagnosticsOut
+
+router = APIRouter(prefix="/api/diagnostics", tags=["diagnostics"])
+
+
+def _describe(target: Engine, connection: Connection) -> EngineDiagnosticsOut:
+    return EngineDiagnosticsOut(
+        url=target.url.render_as_string(hide_password=True),
+        dialect=target.dialect.name,
+        driver=target.dialect.driver,
+        pool=pool_status(target),
+        connection_settings=read_connection_settings(connection, active_profile()),
+    )
+
+
+def _describe_sync_engine() -> EngineDiagnosticsOut:
+    with engine.connect() as connection:
+        return _describe(engine, connection)
+
+
+@router.get("/db", response_model=DatabaseDiagnosticsOut)
+async def database_diagnostics() -> DatabaseDiagnosticsOut:
+    """Report the engine profile, pool state and settings read back per engine."""
+
+    async_diagnostics = None
+    async_engine = get_async_engine()
+    if async_engine is not None:
+        async with async_engine.connect() as connection:
+            async_diagnostics = await connection.run_sync(
+                lambda sync_connection: _describe(async_engine.sync_engine, sync_connection)
+            )
+    return DatabaseDiagnosticsOut(
+        profile=active_profile().name,
+        sync_engine=await run_in_threadpool(_describe_sync_engine),
+        async_engine=async_diagnostics,
+    )
@@ -2,21 +2,39 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Sequence
+import time
+from typing import Any, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from app.db.session import get_db
-from app.models import Task
+from app.core.config import settings
+from app.core.metrics import observe_poll
+from app.core.responses import FastJSONResponse
+from app.db.aio import AnyAsyncSession, get_async_db
+from app.models import Task, TaskStatus
 from app.schemas.maa import (
+    AppendLogRequest,
+    AppendLogResponse,
     GetTaskRequest,
     GetTaskResponse,
+    RenewLeasesRequest,
+    RenewLeasesResponse,
+    ReportStatusBatchRequest,
+    ReportStatusBatchResponse,
     ReportStatusRequest,
-    TaskEnvelope,
+    TaskReportResult,
 )
-from app.services import DeviceService, TaskService
+from app.services import (
+    DeviceRef,
+    ReportOutcome,
+    StatusReport,
+    device_key,
+    poll_advisor,
+    task_notifier,
+)
+from app.services.aio import AsyncDeviceService, AsyncTaskService
 
 logger = logging.getLogger(__name__)
 
@@ -24,106 +42,367 @@ MAX_LOG_CHARS = 4000
 
 router = APIRouter(prefix="/maa", tags=["maa"])
 
-
-def _serialize_tasks(tasks: Sequence[Task]) -> list[TaskEnvelope]:
-    envelopes: list[TaskEnvelope] = []
-    for task in tasks:
-        envelopes.append(
-            TaskEnvelope(
-                id=task.task_uuid,
-                type=task.type,
-                params=task.payload or {},
-                priority=task.priority,
-            )
-        )
-    return envelopes
+# Same status codes and messages as the single-report endpoint raises.
+_REPORT_OUTCOMES: dict[ReportOutcome, tuple[int, str | None]] = {
+    ReportOutcome.APPLIED: (status.HTTP_200_OK, None),
+    ReportOutcome.NOT_FOUND: (status.HTTP_404_NOT_FOUND, "Task not found."),
+    ReportOutcome.NOT_OWNED: (
+        status.HTTP_400_BAD_REQUEST,
+        "Task does not belong to the provided user/device.",
+    ),
+    ReportOutcome.CONFLICT: (
+        status.HTTP_409_CONFLICT,
+        "Task is no longer dispatched to this device.",
+    ),
+}
 
 
-@router.post("/getTask", response_model=GetTaskResponse)
-def get_task(
-    payload: GetTaskRequest,
-    db: Session = Depends(get_db),
-) -> GetTaskResponse:
-    """Agent polling endpoint fetching pending tasks."""
+def _serialize_tasks(tasks: Sequence[Task]) -> list[dict[str, Any]]:
+    # Plain dicts in TaskEnvelope's shape: validated once by the response
+    # model, or not at all on the MAA_FAST_JSON path.
+    return [
+        {
+            "id": task.task_uuid,
+            "type": task.type,
+            "params": task.payload or {},
+            "priority": task.priority,
+        }
+        for task in tasks
+    ]
 
-    device_service = DeviceService(db)
-    task_service = TaskService(db)
 
-    user = device_service.ensure_user(payload.user)
-    device = device_service.register_or_touch_device(
-        user=user,
-        device_identifier=payload.device,
-        agent_version=payload.agentVersion,
-    )
+def _long_poll_seconds(payload: GetTaskRequest) -> float:
+    """Return how long the agent asked us to hold an empty poll, capped."""
 
-    task = task_service.fetch_next_pending_task(
-        user_key=user.user_key,
-        device_identifier=device.device_id,
-    )
+    requested = (payload.capabilities or {}).get("longPoll")
+    try:
+        seconds = float(requested or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, min(seconds, settings.long_poll_max_seconds))
 
-    tasks = _serialize_tasks([task]) if task else []
-    db.commit()
-    return GetTaskResponse(tasks=tasks)
 
+def _max_tasks(payload: GetTaskRequest) -> int:
+    """Return how many tasks the agent accepts per poll, capped."""
 
-@router.post("/reportStatus", status_code=status.HTTP_200_OK)
-def report_status(
-    payload: ReportStatusRequest,
-    db: Session = Depends(get_db),
-) -> None:
-    """Agent reporting execution results for a task."""
+    requested = (payload.capabilities or {}).get("maxTasks")
+    try:
+        count = int(requested or 1)
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(count, settings.max_tasks_per_poll))
 
-    device_service = DeviceService(db)
-    task_service = TaskService(db)
 
-    user = device_service.ensure_user(payload.user)
-    device = device_service.get_device(
-        user_key=user.user_key, device_identifier=payload.device
-    )
-    if device is None:
-        device = device_service.register_or_touch_device(
-            user=user, device_identifier=payload.device
-        )
+async def _owned_task(
+    task_service: AsyncTaskService, device: DeviceRef, task_uuid: str, *, what: str
+) -> Task:
+    """Load a task the reporting device owns, or raise 404/400."""
 
-    task = task_service.get_by_uuid(payload.taskId)
+    task = await task_service.get_by_uuid(task_uuid)
     if task is None:
         logger.warning(
-            "Report for unknown task %s from device %s",
-            payload.taskId,
-            payload.device,
+            "%s for unknown task %s from device %s", what, task_uuid, device.device_id
         )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Task not found."
         )
 
-    if task.user_key != user.user_key or task.device_identifier != device.device_id:
+    if task.user_key != device.user_key or task.device_identifier != device.device_id:
         logger.error(
             "Task ownership mismatch: task %s user/device %s/%s, got %s/%s",
-            payload.taskId,
+            task_uuid,
             task.user_key,
             task.device_identifier,
-            user.user_key,
+            device.user_key,
             device.device_id,
         )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Task does not belong to the provided user/device.",
         )
+    return task
+
+
+async def _poll_once(
+    db: AnyAsyncSession, payload: GetTaskRequest
+) -> dict[str, Any]:
+    started = time.perf_counter()
+    device_service = AsyncDeviceService(db)
+    task_service = AsyncTaskService(db)
+
+    device = await device_service.touch_device(
+        user_key=payload.user,
+        device_identifier=payload.device,
+        agent_version=payload.agentVersion,
+    )
+
+    max_tasks = _max_tasks(payload)
+    if max_tasks > 1:
+        claimed = await task_service.claim_pending_tasks(
+            user_key=device.user_key,
+            device_identifier=device.device_id,
+            limit=max_tasks,
+            lease_seconds=settings.task_lease_seconds,
+        )
+    else:
+        task = await task_service.fetch_next_pending_task(
+            user_key=device.user_key,
+            device_identifier=device.device_id,
+        )
+        claimed = [task] if task else []
+
+    tasks = _serialize_tasks(claimed)
+    await db.commit()
+
+    poll_advisor.observe_db_latency(time.perf_counter() - started)
+    poll_advisor.observe_poll(
+        device.id, dispatched=len(claimed), saturated=len(claimed) >= max_tasks
+    )
+    return {
+        "tasks": tasks,
+        "pollInterval": poll_advisor.interval_for(device.id),
+        "leaseSeconds": settings.task_lease_seconds if max_tasks > 1 else None,
+    }
+
+
+@router.post("/getTask", response_model=GetTaskResponse)
+async def get_task(
+    payload: GetTaskRequest,
+    db: AnyAsyncSession = Depends(get_async_db),
+) -> dict[str, Any] | Response:
+    """Agent polling endpoint fetching pending tasks.
+
+    Agents may advertise ``capabilities.longPoll`` (seconds) to have an empty
+    poll held open until a task is enqueued for the device or the wait
+    expires. The wait happens on the event loop, not in a threadpool worker,
+    and the database session holds no connection while waiting. Enqueues in
+    the same worker wake the poll at once; those in other workers are picked
+    up by a read-only re-check every ``MAA_LONG_POLL_RECHECK_SECONDS``.
+
+    Agents advertising ``capabilities.maxTasks`` receive up to that many tasks
+    at once. Each carries a lease of ``leaseSeconds``: the agent must report
+    on it (``Running`` when it starts) or renew it through
+    ``/maa/renewLeases`` before it expires, or it goes back to Pending.
+
+    ``pollInterval`` carries the server's suggestion for the next poll, short
+    while the device is busy and backing off while it stays idle.
+
+    With ``MAA_FAST_JSON`` the response is rendered directly, skipping the
+    response model's validation.
+    """
+
+    wait_seconds = _long_poll_seconds(payload)
+    if wait_seconds <= 0:
+        response = await _poll_once(db, payload)
+    else:
+        response = await _long_poll(db, payload, wait_seconds)
+    observe_poll(len(response["tasks"]))
+    if settings.fast_json:
+        return FastJSONResponse(response)
+    return response
+
+
+async def _long_poll(
+    db: AnyAsyncSession, payload: GetTaskRequest, wait_seconds: float
+) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait_seconds
+    key = device_key(payload.user, payload.device)
+    recheck = settings.long_poll_recheck_seconds
+    while True:
+        # Subscribe before querying so an enqueue racing with the poll is
+        # never missed.
+        waiter = task_notifier.subscribe(key)
+        try:
+            response = await _poll_once(db, payload)
+            while True:
+                remaining = deadline - loop.time()
+                if response["tasks"] or remaining <= 0:
+                    return response
+                # Wake-ups only reach waiters of the enqueuing process; tasks
+                # enqueued by other workers are found by the periodic re-check.
+                timeout = min(remaining, recheck) if recheck > 0 else remaining
+                if await task_notifier.wait(waiter, timeout):
+                    break
+                if await _has_pending(db, payload):
+                    break
+        finally:
+            task_notifier.unsubscribe(key, waiter)
+
+
+async def _has_pending(db: AnyAsyncSession, payload: GetTaskRequest) -> bool:
+    try:
+        return await AsyncTaskService(db).has_pending_tasks(
+            user_key=payload.user, device_identifier=payload.device
+        )
+    finally:
+        # End the read so no connection is held while waiting again.
+        await db.rollback()
+
+
+@router.post("/reportStatus", status_code=status.HTTP_200_OK)
+async def report_status(
+    payload: ReportStatusRequest,
+    db: AnyAsyncSession = Depends(get_async_db),
+) -> None:
+    """Agent reporting execution results for a task."""
+
+    device_service = AsyncDeviceService(db)
+    task_service = AsyncTaskService(db)
+
+    device = await device_service.touch_device(
+        user_key=payload.user,
+        device_identifier=payload.device,
+        agent_version=payload.result.get("agentVersion") if payload.result else None,
+    )
+
+    task = await _owned_task(task_service, device, payload.taskId, what="Report")
+
+    if payload.status == TaskStatus.RUNNING:
+        if task.status != TaskStatus.RUNNING:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Task is no longer dispatched to this device.",
+            )
+        await task_service.mark_running(task)
+        await db.commit()
+        return
 
     truncated_log = payload.log[:MAX_LOG_CHARS] if payload.log else None
 
-    task_service.update_status(
+    await task_service.update_status(
         task,
         status=payload.status,
         log=truncated_log,
         result=payload.result,
         stats=payload.stats,
     )
-    device_service.register_or_touch_device(
-        user=user,
-        device_identifier=device.device_id,
-        agent_version=payload.result.get("agentVersion") if payload.result else None,
+
+    await db.commit()
+
+
+@router.post("/reportStatusBatch", response_model=ReportStatusBatchResponse)
+async def report_status_batch(
+    payload: ReportStatusBatchRequest,
+    db: AnyAsyncSession = Depends(get_async_db),
+) -> ReportStatusBatchResponse:
+    """Apply several task reports from one agent in a single transaction.
+
+    Each report is validated exactly like ``/maa/reportStatus``; a rejected
+    report does not affect the others. ``results`` carries, per report, the
+    status code and detail the single endpoint would have returned.
+    """
+
+    if len(payload.reports) > settings.max_reports_per_batch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.max_reports_per_batch} reports per batch.",
+        )
+
+    device_service = AsyncDeviceService(db)
+    task_service = AsyncTaskService(db)
+
+    device = await device_service.touch_device(
+        user_key=payload.user,
+        device_identifier=payload.device,
+        agent_version=payload.agentVersion,
     )
+    outcomes = await task_service.apply_reports(
+        device=device,
+        reports=[
+            StatusReport(
+                task_uuid=report.taskId,
+                status=report.status,
+                log=report.log[:MAX_LOG_CHARS] if report.log else None,
+                result=report.result,
+                stats=report.stats,
+            )
+            for report in payload.reports
+        ],
+    )
+    await db.commit()
 
-    db.commit()
+    results: list[TaskReportResult] = []
+    for report, outcome in zip(payload.reports, outcomes, strict=True):
+        if outcome is not ReportOutcome.APPLIED:
+            logger.warning(
+                "Batched report for task %s from device %s rejected: %s",
+                report.taskId,
+                payload.device,
+                outcome.value,
+            )
+        code, detail = _REPORT_OUTCOMES[outcome]
+        results.append(TaskReportResult(taskId=report.taskId, status=code, detail=detail))
+    return ReportStatusBatchResponse(results=results)
 
+
+@router.post("/renewLeases", response_model=RenewLeasesResponse)
+async def renew_leases(
+    payload: RenewLeasesRequest,
+    db: AnyAsyncSession = Depends(get_async_db),
+) -> RenewLeasesResponse:
+    """Extend the leases of batch-dispatched tasks the agent has yet to start.
+
+    Agents run a batch one task at a time and renew the rest periodically,
+    so a batch may take longer than one lease. ``renewed`` lists the tasks
+    still leased to the agent; any other id was returned to Pending (or is
+    not the agent's) and must be skipped.
+    """
+
+    if len(payload.taskIds) > settings.max_tasks_per_poll:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.max_tasks_per_poll} tasks per renewal.",
+        )
+
+    device_service = AsyncDeviceService(db)
+    task_service = AsyncTaskService(db)
+
+    device = await device_service.touch_device(
+        user_key=payload.user, device_identifier=payload.device
+    )
+    renewed = await task_service.renew_leases(
+        device=device,
+        task_uuids=payload.taskIds,
+        lease_seconds=settings.task_lease_seconds,
+    )
+    await db.commit()
+    return RenewLeasesResponse(
+        renewed=renewed, leaseSeconds=settings.task_lease_seconds
+    )
+
+
+@router.post("/appendLog", response_model=AppendLogResponse)
+async def append_log(
+    payload: AppendLogRequest,
+    db: AnyAsyncSession = Depends(get_async_db),
+) -> AppendLogResponse:
+    """Store a chunk of live output for a task while it runs.
+
+    Chunks are numbered by the agent from 0 per task; resending a chunk is
+    harmless. The console reads them through ``/api/tasks/{id}/log`` or
+    tails them live through ``/api/tasks/{id}/log/stream``.
+    """
+
+    max_chars = settings.task_log_chunk_max_chars
+    if len(payload.data) > max_chars:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Log chunks are limited to {max_chars} characters.",
+        )
+
+    device_service = AsyncDeviceService(db)
+    task_service = AsyncTaskService(db)
+
+    device = await device_service.touch_device(
+        user_key=payload.user, device_identifier=payload.device
+    )
+    task = await _owned_task(task_service, device, payload.taskId, what="Log chunk")
+    accepted = await task_service.append_log_chunk(
+        task,
+        seq=payload.seq,
+        data=payload.data,
+        max_chunks=settings.task_log_max_chunks,
+    )
+    await db.commit()
+    return AppendLogResponse(accepted=accepted)
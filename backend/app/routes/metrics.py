@@ -0,0 +1,52 @@
+"""Prometheus scrape endpoint."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily, Metric
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import render_metrics
+from app.db.session import get_db
+from app.models import TaskStatus
+from app.services import DeviceService, read_status_totals
+
+router = APIRouter(tags=["metrics"])
+
+
+class _FleetCollector:
+    """Gauges read from the database once per scrape, not per worker."""
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def collect(self) -> Iterator[Metric]:
+        since = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.metrics_active_device_seconds
+        )
+        active = GaugeMetricFamily(
+            "maa_active_devices",
+            "Devices that polled within the active window.",
+            value=DeviceService(self._session).count_active_devices(since),
+        )
+        yield active
+
+        totals = read_status_totals(self._session)
+        tasks = GaugeMetricFamily(
+            "maa_tasks", "Tasks by status (queue depth is Pending).", labels=["status"]
+        )
+        for task_status in TaskStatus:
+            tasks.add_metric([task_status.value], totals.get(task_status, 0))
+        yield tasks
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(db: Session = Depends(get_db)) -> Response:
+    """Prometheus exposition of all workers' metrics plus fleet gauges."""
+
+    return Response(render_metrics(_FleetCollector(db)), media_type=CONTENT_TYPE_LATEST)
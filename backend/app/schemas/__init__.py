@@ -1,15 +1,70 @@
 """Pydantic schema exports."""
 
-from .admin import DeviceOut, TaskCreate, TaskOut
-from .maa import GetTaskRequest, GetTaskResponse, ReportStatusRequest, TaskEnvelope
+from .admin import (
+    BulkTaskCreate,
+    BulkTaskCreateOut,
+    DashboardOut,
+    DatabaseDiagnosticsOut,
+    DeviceOut,
+    DeviceSelector,
+    DeviceTagsIn,
+    DeviceTagsOut,
+    DeviceTaskCountsOut,
+    EngineDiagnosticsOut,
+    ScheduleCreate,
+    ScheduleOut,
+    ScheduleUpdate,
+    TaskCreate,
+    TaskLogChunksOut,
+    TaskLogOut,
+    TaskOut,
+    TaskOutputOut,
+)
+from .maa import (
+    AppendLogRequest,
+    AppendLogResponse,
+    GetTaskRequest,
+    GetTaskResponse,
+    RenewLeasesRequest,
+    RenewLeasesResponse,
+    ReportStatusBatchRequest,
+    ReportStatusBatchResponse,
+    ReportStatusRequest,
+    TaskEnvelope,
+    TaskReport,
+    TaskReportResult,
+)
 
 __all__ = [
+    "BulkTaskCreate",
+    "BulkTaskCreateOut",
+    "DashboardOut",
+    "DatabaseDiagnosticsOut",
     "DeviceOut",
+    "DeviceSelector",
+    "DeviceTaskCountsOut",
+    "DeviceTagsIn",
+    "DeviceTagsOut",
+    "EngineDiagnosticsOut",
+    "ScheduleCreate",
+    "ScheduleOut",
+    "ScheduleUpdate",
     "TaskCreate",
+    "TaskLogChunksOut",
+    "TaskLogOut",
     "TaskOut",
+    "TaskOutputOut",
+    "AppendLogRequest",
+    "AppendLogResponse",
     "GetTaskRequest",
     "GetTaskResponse",
+    "ReportStatusBatchRequest",
+    "ReportStatusBatchResponse",
     "ReportStatusRequest",
+    "RenewLeasesRequest",
+    "RenewLeasesResponse",
     "TaskEnvelope",
+    "TaskReport",
+    "TaskReportResult",
 ]
 
@@ -3,11 +3,23 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
+from typing import Annotated, Any
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    model_validator,
+)
 
 from app.models.task import TaskStatus
+from app.services.pagination import as_utc
+
+# SQLite hands back naive UTC datetimes, buffered heartbeats are aware; both
+# are written as UTC (``Z``) so a value keeps its form across a flush.
+UTCDateTime = Annotated[datetime, AfterValidator(as_utc)]
 
 
 class AdminBaseModel(BaseModel):
@@ -25,9 +37,9 @@ class DeviceOut(AdminBaseModel):
     display_name: str | None = None
     status: str
     agent_version: str | None = None
-    last_seen_at: datetime | None = None
-    created_at: datetime
-    updated_at: datetime
+    last_seen_at: UTCDateTime | None = None
+    created_at: UTCDateTime
+    updated_at: UTCDateTime
 
 
 class TaskCreate(AdminBaseModel):
@@ -40,6 +52,115 @@ class TaskCreate(AdminBaseModel):
     priority: int = Field(default=0, ge=0, description="Task priority ordering.")
 
 
+DeviceTagName = Annotated[str, StringConstraints(min_length=1, max_length=64)]
+
+
+class DeviceSelector(AdminBaseModel):
+    """Which of a user's devices a bulk operation targets; set exactly one."""
+
+    devices: list[str] | None = Field(
+        default=None, description="Explicit device identifiers."
+    )
+    all: bool = Field(default=False, description="Every device of the user.")
+    tag: DeviceTagName | None = Field(
+        default=None, description="Devices carrying this tag."
+    )
+
+    @model_validator(mode="after")
+    def _exactly_one(self) -> DeviceSelector:
+        chosen = [self.devices is not None, self.all, self.tag is not None]
+        if sum(chosen) != 1:
+            raise ValueError("Set exactly one of devices, all or tag.")
+        return self
+
+
+class BulkTaskCreate(AdminBaseModel):
+    """Payload for creating the same task on many devices at once."""
+
+    selector: DeviceSelector
+    task: TaskCreate
+
+
+class BulkTaskCreateOut(AdminBaseModel):
+    """Result of a bulk task creation."""
+
+    created: int
+    task_uuids: list[str] = Field(description="One per targeted device, in order.")
+    device_ids: list[str] = Field(description="Device of each created task.")
+    missing_devices: list[str] = Field(
+        default_factory=list, description="Explicitly listed devices that do not exist."
+    )
+
+
+class DeviceTagsIn(AdminBaseModel):
+    """Replacement set of tags for a device."""
+
+    tags: list[DeviceTagName] = Field(default_factory=list, max_length=64)
+
+
+class DeviceTagsOut(AdminBaseModel):
+    """Tags currently set on a device."""
+
+    device_id: str
+    tags: list[str]
+
+
+class DeviceTaskCountsOut(AdminBaseModel):
+    """Live task counts of one device, by status."""
+
+    device_id: str
+    counts: dict[TaskStatus, int] = Field(
+        description="Statuses without tasks are omitted."
+    )
+
+
+class DashboardOut(AdminBaseModel):
+    """Per-device queue summary of a user, read from maintained counters."""
+
+    user_key: str
+    totals: dict[TaskStatus, int]
+    devices: list[DeviceTaskCountsOut]
+
+
+class ScheduleCreate(AdminBaseModel):
+    """Payload for creating a recurring schedule on a device."""
+
+    name: str | None = Field(default=None, max_length=128)
+    task: TaskCreate
+    interval_seconds: int = Field(
+        ge=60, description="Seconds between runs, e.g. 86400 for daily."
+    )
+    start_at: datetime | None = Field(
+        default=None,
+        description="First run; with an offset, later runs keep its time of day. "
+        "Defaults to now.",
+    )
+
+
+class ScheduleUpdate(AdminBaseModel):
+    """Pause or resume a schedule."""
+
+    enabled: bool
+
+
+class ScheduleOut(AdminBaseModel):
+    """Serialized recurring schedule."""
+
+    id: int
+    name: str | None = None
+    user_key: str
+    device_identifier: str
+    type: str
+    payload: dict[str, Any]
+    priority: int
+    interval_seconds: int
+    anchor_at: datetime
+    next_run_at: datetime
+    last_run_at: datetime | None = None
+    enabled: bool
+    created_at: datetime
+
+
 class TaskUpdateStatus(AdminBaseModel):
     """Payload for updating a task state from admin interfaces."""
 
@@ -59,11 +180,24 @@ class TaskOut(AdminBaseModel):
     payload: dict[str, Any]
     status: TaskStatus
     priority: int
+    retry_count: int = 0
     created_at: datetime
     started_at: datetime | None = None
     finished_at: datetime | None = None
-    log: str | None = None
+    has_log: bool = False
     error_message: str | None = None
+    archived: bool = Field(
+        default=False, description="Served from the task archive, not the live tables."
+    )
+
+
+class TaskOutputOut(AdminBaseModel):
+    """Final log, result and stats of a task, decompressed on request."""
+
+    task_uuid: str
+    log: str | None = None
+    result: dict[str, Any] | None = None
+    stats: dict[str, Any] | None = None
 
 
 class TaskLogOut(AdminBaseModel):
@@ -72,6 +206,33 @@ class TaskLogOut(AdminBaseModel):
     id: int
     level: str
     message: str
+    seq: int | None = None
     created_at: datetime
 
 
+class TaskLogChunksOut(AdminBaseModel):
+    """A page of streamed task output, for resume-from-offset reads."""
+
+    task_uuid: str
+    status: TaskStatus
+    chunks: list[TaskLogOut]
+    next_offset: int = Field(description="Offset to pass to continue reading.")
+    finished: bool = Field(description="Task is finished; no more output follows.")
+
+
+class EngineDiagnosticsOut(BaseModel):
+    """Pool and effective connection settings of one database engine."""
+
+    url: str
+    dialect: str
+    driver: str
+    pool: dict[str, Any]
+    connection_settings: dict[str, str]
+
+
+class DatabaseDiagnosticsOut(BaseModel):
+    """Active engine tuning profile and what the database reports back."""
+
+    profile: str
+    sync_engine: EngineDiagnosticsOut
+    async_engine: EngineDiagnosticsOut | None = None
@@ -37,7 +37,10 @@ class GetTaskRequest(MaaBaseModel):
     )
     capabilities: dict[str, Any] | None = Field(
         default=None,
-        description="Optional capability advertisement.",
+        description=(
+            "Optional capability advertisement, e.g. `longPoll` (seconds to "
+            "hold an empty poll open) and `maxTasks` (tasks accepted per poll)."
+        ),
     )
     status: dict[str, Any] | None = Field(
         default=None,
@@ -53,6 +56,10 @@ class GetTaskResponse(MaaBaseModel):
         default=None,
         description="Optional override for agent polling interval (seconds).",
     )
+    leaseSeconds: float | None = Field(
+        default=None,
+        description="Lease of batch-dispatched tasks; renew through /maa/renewLeases.",
+    )
 
 
 class TaskReportPayload(MaaBaseModel):
@@ -85,3 +92,73 @@ class ReportStatusRequest(MaaBaseModel):
         default=None, description="Run statistics for the task."
     )
 
+
+class TaskReport(TaskReportPayload):
+    """One entry of a batched status report."""
+
+    taskId: str = Field(description="Task identifier to update.")
+
+
+class ReportStatusBatchRequest(MaaBaseModel):
+    """Several task reports from one agent, applied in order."""
+
+    user: str = Field(description="User key associated with the agent.")
+    device: str = Field(description="Unique identifier for the agent device.")
+    agentVersion: str | None = Field(
+        default=None, description="Agent software version string."
+    )
+    reports: list[TaskReport] = Field(
+        min_length=1, description="Reports in the order they happened."
+    )
+
+
+class TaskReportResult(MaaBaseModel):
+    """Outcome of one report in a batch, mirroring the single-report endpoint."""
+
+    taskId: str
+    status: int = Field(description="HTTP status the single endpoint would return.")
+    detail: str | None = None
+
+
+class ReportStatusBatchResponse(MaaBaseModel):
+    """Per-report outcomes, in request order."""
+
+    results: list[TaskReportResult] = Field(default_factory=list)
+
+
+class AppendLogRequest(MaaBaseModel):
+    """A chunk of live task output streamed by the agent."""
+
+    user: str = Field(description="User key associated with the agent.")
+    device: str = Field(description="Unique identifier for the agent device.")
+    taskId: str = Field(description="Task the output belongs to.")
+    seq: int = Field(ge=0, description="Chunk sequence number, from 0 per task.")
+    data: str = Field(description="Output text of this chunk.")
+
+
+class AppendLogResponse(MaaBaseModel):
+    """Acknowledgement for an appended log chunk."""
+
+    accepted: bool = Field(
+        description="False if a chunk with this seq was already stored (a retry)."
+    )
+
+
+class RenewLeasesRequest(MaaBaseModel):
+    """Batch-dispatched tasks the agent has not started yet."""
+
+    user: str = Field(description="User key associated with the agent.")
+    device: str = Field(description="Unique identifier for the agent device.")
+    taskIds: list[str] = Field(
+        min_length=1, description="Tasks whose leases should be extended."
+    )
+
+
+class RenewLeasesResponse(MaaBaseModel):
+    """Tasks still leased to the agent after renewal."""
+
+    renewed: list[str] = Field(
+        default_factory=list,
+        description="Renewed task ids; the others are no longer the agent's to run.",
+    )
+    leaseSeconds: float = Field(description="Seconds until the renewed leases expire.")
@@ -1,7 +1,69 @@
 """Business logic services."""
 
+from .archive import ArchiveService, TaskArchive, archive_finished_tasks
+from .blob import BlobStore, collect_orphan_blobs
+from .counters import (
+    count_status_changes,
+    read_device_counts,
+    read_status_totals,
+    repair_task_counts,
+)
 from .device import DeviceService
-from .task import TaskService
-
-__all__ = ["DeviceService", "TaskService"]
+from .feed import OVERFLOW, RESYNC, ChangeEvent, ChangeFeed, change_feed
+from .heartbeat import HeartbeatBuffer, flush_heartbeats, heartbeat_buffer
+from .identity import DeviceRef, IdentityCache, identity_cache
+from .notifier import TaskNotifier, device_key, task_log_key, task_notifier
+from .pagination import PageCursor
+from .polling import PollIntervalAdvisor, poll_advisor
+from .revision import mark_users_changed, read_presence_version, read_version
+from .schedule import ScheduleService, recurring_scheduler
+from .task import (
+    ReportOutcome,
+    StatusReport,
+    TaskService,
+    TaskSpec,
+    reap_stuck_tasks,
+    release_expired_leases,
+)
 
+__all__ = [
+    "DeviceService",
+    "TaskService",
+    "ScheduleService",
+    "recurring_scheduler",
+    "ArchiveService",
+    "TaskArchive",
+    "archive_finished_tasks",
+    "BlobStore",
+    "collect_orphan_blobs",
+    "count_status_changes",
+    "read_device_counts",
+    "read_status_totals",
+    "repair_task_counts",
+    "DeviceRef",
+    "OVERFLOW",
+    "RESYNC",
+    "ChangeEvent",
+    "ChangeFeed",
+    "change_feed",
+    "HeartbeatBuffer",
+    "flush_heartbeats",
+    "heartbeat_buffer",
+    "IdentityCache",
+    "identity_cache",
+    "TaskNotifier",
+    "device_key",
+    "task_log_key",
+    "task_notifier",
+    "PageCursor",
+    "PollIntervalAdvisor",
+    "poll_advisor",
+    "mark_users_changed",
+    "read_presence_version",
+    "read_version",
+    "ReportOutcome",
+    "StatusReport",
+    "TaskSpec",
+    "reap_stuck_tasks",
+    "release_expired_leases",
+]
@@ -0,0 +1,208 @@
+"""Async facades over the device and task services.
+
+The business logic lives once, in :class:`DeviceService` and
+:class:`TaskService`; these wrappers run it through ``AsyncSession.run_sync``
+so the database I/O happens on the asyncio driver without blocking the
+event loop or occupying a threadpool worker.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+from app.db.aio import AnyAsyncSession
+from app.models import Task, TaskLog, TaskStatus
+from app.services.device import DeviceService
+from app.services.identity import DeviceRef
+from app.services.pagination import PageCursor
+from app.services.task import ReportOutcome, StatusReport, TaskService
+
+
+class AsyncDeviceService:
+    """Async counterpart of :class:`DeviceService`."""
+
+    def __init__(self, session: AnyAsyncSession) -> None:
+        self._session = session
+
+    async def get_user_id(self, user_key: str) -> int | None:
+        return await self._session.run_sync(
+            lambda session: DeviceService(session).get_user_id(user_key)
+        )
+
+    async def ensure_user_id(self, user_key: str) -> int:
+        return await self._session.run_sync(
+            lambda session: DeviceService(session).ensure_user_id(user_key)
+        )
+
+    async def resolve_device(
+        self, *, user_key: str, device_identifier: str
+    ) -> DeviceRef | None:
+        return await self._session.run_sync(
+            lambda session: DeviceService(session).resolve_device(
+                user_key=user_key, device_identifier=device_identifier
+            )
+        )
+
+    async def touch_device(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        agent_version: str | None = None,
+    ) -> DeviceRef:
+        return await self._session.run_sync(
+            lambda session: DeviceService(session).touch_device(
+                user_key=user_key,
+                device_identifier=device_identifier,
+                agent_version=agent_version,
+            )
+        )
+
+
+class AsyncTaskService:
+    """Async counterpart of :class:`TaskService`."""
+
+    def __init__(self, session: AnyAsyncSession) -> None:
+        self._session = session
+
+    async def enqueue_task(
+        self,
+        *,
+        device: DeviceRef,
+        task_type: str,
+        payload: dict[str, Any],
+        priority: int = 0,
+    ) -> Task:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).enqueue_task(
+                device=device, task_type=task_type, payload=payload, priority=priority
+            )
+        )
+
+    async def get_by_uuid(self, task_uuid: str) -> Task | None:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).get_by_uuid(task_uuid)
+        )
+
+    async def fetch_next_pending_task(
+        self, *, user_key: str, device_identifier: str
+    ) -> Task | None:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).fetch_next_pending_task(
+                user_key=user_key, device_identifier=device_identifier
+            )
+        )
+
+    async def claim_pending_tasks(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        limit: int = 1,
+        lease_seconds: float | None = None,
+    ) -> list[Task]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).claim_pending_tasks(
+                user_key=user_key,
+                device_identifier=device_identifier,
+                limit=limit,
+                lease_seconds=lease_seconds,
+            )
+        )
+
+    async def has_pending_tasks(
+        self, *, user_key: str, device_identifier: str
+    ) -> bool:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).has_pending_tasks(
+                user_key=user_key, device_identifier=device_identifier
+            )
+        )
+
+    async def fetch_pending_batch(
+        self, *, user_key: str, device_identifier: str, limit: int = 1
+    ) -> Sequence[Task]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).fetch_pending_batch(
+                user_key=user_key, device_identifier=device_identifier, limit=limit
+            )
+        )
+
+    async def mark_running(self, task: Task) -> Task:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).mark_running(task)
+        )
+
+    async def renew_leases(
+        self,
+        *,
+        device: DeviceRef,
+        task_uuids: Sequence[str],
+        lease_seconds: float,
+    ) -> list[str]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).renew_leases(
+                device=device, task_uuids=task_uuids, lease_seconds=lease_seconds
+            )
+        )
+
+    async def update_status(
+        self,
+        task: Task,
+        *,
+        status: TaskStatus,
+        log: str | None = None,
+        result: dict[str, Any] | None = None,
+        stats: dict[str, Any] | None = None,
+        error_message: str | None = None,
+    ) -> Task:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).update_status(
+                task,
+                status=status,
+                log=log,
+                result=result,
+                stats=stats,
+                error_message=error_message,
+            )
+        )
+
+    async def apply_reports(
+        self, *, device: DeviceRef, reports: Sequence[StatusReport]
+    ) -> list[ReportOutcome]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).apply_reports(
+                device=device, reports=reports
+            )
+        )
+
+    async def append_log_chunk(
+        self, task: Task, *, seq: int, data: str, max_chunks: int
+    ) -> bool:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).append_log_chunk(
+                task, seq=seq, data=data, max_chunks=max_chunks
+            )
+        )
+
+    async def read_log_chunks(
+        self, task: Task, *, offset: int = 0, limit: int = 200
+    ) -> list[TaskLog]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).read_log_chunks(
+                task, offset=offset, limit=limit
+            )
+        )
+
+    async def list_recent_tasks(
+        self, *, device: DeviceRef, limit: int = 20, cursor: PageCursor | None = None
+    ) -> Sequence[Task]:
+        return await self._session.run_sync(
+            lambda session: TaskService(session).list_recent_tasks(
+                device=device, limit=limit, cursor=cursor
+            )
+        )
+
+
+__all__ = ["AsyncDeviceService", "AsyncTaskService"]
@@ -0,0 +1,279 @@
+"""Retention: move old finished tasks out of the live tables into archive files."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+from uuid import uuid4
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import FINISHED_STATUSES, Task, TaskLog
+from app.services.counters import count_status_changes
+from app.services.pagination import PageCursor, as_utc
+from app.services.revision import mark_users_changed
+from app.services.task import TaskService
+
+logger = logging.getLogger(__name__)
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return as_utc(value).isoformat() if value is not None else None
+
+
+class TaskArchive:
+    """Gzip NDJSON files of archived tasks, partitioned by user and month.
+
+    Layout: ``<root>/user=<key>/month=<YYYY-MM>/tasks-<first id>-<last id>.ndjson.gz``
+    where the month is the task's creation month. Each line is one task
+    with its output and log entries inlined, so an archived task no longer
+    depends on any database row.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def _user_dir(self, user_key: str) -> Path:
+        return self._root / f"user={quote(user_key, safe='')}"
+
+    def write(self, records: Sequence[dict[str, Any]]) -> list[Path]:
+        """Write ``records`` as one file per partition and return the paths.
+
+        Files are fsynced and renamed into place, so a file that exists is
+        complete before the caller deletes the live rows. Archiving the same
+        batch again replaces its files instead of duplicating them; every
+        writer uses its own temporary file, so concurrent writers of one
+        batch never interleave.
+        """
+
+        partitions: dict[Path, list[dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            month = record["created_at"][:7]
+            partitions[self._user_dir(record["user_key"]) / f"month={month}"].append(
+                record
+            )
+
+        paths = []
+        for directory, rows in partitions.items():
+            directory.mkdir(parents=True, exist_ok=True)
+            ids = [row["id"] for row in rows]
+            path = directory / f"tasks-{min(ids):010d}-{max(ids):010d}.ndjson.gz"
+            tmp = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+            with open(tmp, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+                    for row in rows:
+                        compressed.write(json.dumps(row, ensure_ascii=False).encode())
+                        compressed.write(b"\n")
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp, path)
+            paths.append(path)
+        return paths
+
+    def _records(self, path: Path) -> Iterator[dict[str, Any]]:
+        with gzip.open(path, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read_device_tasks(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        limit: int,
+        cursor: PageCursor | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return up to ``limit`` archived tasks of a device after ``cursor``.
+
+        Tasks come newest first in ``(created_at, id)`` order, like the live
+        listing they continue.
+
+        Months are read newest first and reading stops at the first month
+        that completes the page, so paging into recent history only
+        decompresses the partitions it needs.
+        """
+
+        user_dir = self._user_dir(user_key)
+        if not user_dir.is_dir():
+            return []
+        last_month = f"month={cursor.created_at:%Y-%m}" if cursor else None
+        months = sorted(
+            (path for path in user_dir.glob("month=*") if path.is_dir()), reverse=True
+        )
+
+        found: dict[str, dict[str, Any]] = {}
+        for month in months:
+            if last_month is not None and month.name > last_month:
+                continue
+            for path in month.glob("*.ndjson.gz"):
+                for record in self._records(path):
+                    if record["device_identifier"] != device_identifier:
+                        continue
+                    key = (datetime.fromisoformat(record["created_at"]), record["id"])
+                    if cursor is not None and key >= cursor.sort_key():
+                        continue
+                    # A batch archived twice (crash before the delete
+                    # committed) may sit in two files; keep one copy.
+                    found[record["task_uuid"]] = record
+            if len(found) >= limit:
+                break
+        records = sorted(
+            found.values(), key=lambda r: (r["created_at"], r["id"]), reverse=True
+        )
+        return records[:limit]
+
+
+class ArchiveService:
+    """Move finished tasks between the live tables and a :class:`TaskArchive`."""
+
+    def __init__(self, session: Session, archive: TaskArchive | None = None) -> None:
+        self._session = session
+        self._archive = archive or TaskArchive(settings.archive_dir)
+
+    def archive_batch(self, *, older_than: datetime, limit: int) -> int:
+        """Archive up to ``limit`` tasks that finished before ``older_than``.
+
+        The batch is written to the archive first and only then deleted from
+        ``tasks``/``task_logs``. The caller commits; a crash in between
+        leaves the rows live and the batch is simply archived again by the
+        next sweep. Blobs the batch referenced are left to
+        :func:`app.services.blob.collect_orphan_blobs`.
+
+        The batch is picked with ``FOR UPDATE SKIP LOCKED`` where supported,
+        so sweeps in several workers take disjoint batches. Elsewhere two
+        sweeps may both write a batch, but only the rows a sweep's own
+        DELETE removed move its counters and are reported as archived.
+        """
+
+        tasks = list(
+            self._session.scalars(
+                select(Task)
+                .where(Task.status.in_(FINISHED_STATUSES))
+                .where(Task.finished_at < older_than)
+                .order_by(Task.finished_at, Task.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        )
+        if not tasks:
+            return 0
+        task_ids = [task.id for task in tasks]
+
+        logs: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        for entry in self._session.scalars(
+            select(TaskLog)
+            .where(TaskLog.task_id.in_(task_ids))
+            .order_by(TaskLog.task_id, TaskLog.id)
+        ):
+            logs[entry.task_id].append(
+                {
+                    "level": entry.level,
+                    "message": entry.message,
+                    "seq": entry.seq,
+                    "created_at": _isoformat(entry.created_at),
+                }
+            )
+        outputs = TaskService(self._session).load_outputs(tasks)
+        self._archive.write(
+            [
+                {
+                    "id": task.id,
+                    "task_uuid": task.task_uuid,
+                    "user_key": task.user_key,
+                    "device_identifier": task.device_identifier,
+                    "type": task.type,
+                    "payload": task.payload,
+                    "status": task.status.value,
+                    "priority": task.priority,
+                    "retry_count": task.retry_count,
+                    "created_at": _isoformat(task.created_at),
+                    "started_at": _isoformat(task.started_at),
+                    "finished_at": _isoformat(task.finished_at),
+                    "error_message": task.error_message,
+                    **outputs[task.id],
+                    "logs": logs[task.id],
+                }
+                for task in tasks
+            ]
+        )
+
+        self._session.execute(
+            delete(TaskLog)
+            .where(TaskLog.task_id.in_(task_ids))
+            .execution_options(synchronize_session=False)
+        )
+        removed = self._delete_tasks(task_ids)
+        mark_users_changed(self._session, {row.user_id for row in removed})
+        count_status_changes(
+            self._session, [(row.device_id, row.status, None) for row in removed]
+        )
+        return len(removed)
+
+    def _delete_tasks(self, task_ids: list[int]) -> Sequence[Any]:
+        """Delete the finished ones of ``task_ids``; return the removed rows.
+
+        With ``DELETE ... RETURNING`` the rows come from the DELETE itself,
+        otherwise from a read of the same rows just before it.
+        """
+
+        where = [Task.id.in_(task_ids), Task.status.in_(FINISHED_STATUSES)]
+        columns = (Task.user_id, Task.device_id, Task.status)
+        stmt = delete(Task).where(*where).execution_options(synchronize_session=False)
+        if self._session.get_bind().dialect.delete_returning:
+            return self._session.execute(stmt.returning(*columns)).all()
+        rows = self._session.execute(select(*columns).where(*where)).all()
+        self._session.execute(stmt)
+        return rows
+
+    def list_archived_tasks(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        limit: int,
+        cursor: PageCursor | None = None,
+    ) -> list[dict[str, Any]]:
+        """Archived tasks of a device, newest first (see :class:`TaskArchive`)."""
+
+        return self._archive.read_device_tasks(
+            user_key=user_key,
+            device_identifier=device_identifier,
+            limit=limit,
+            cursor=cursor,
+        )
+
+
+def archive_finished_tasks(session: Session) -> None:
+    """Periodic job entry point for :meth:`ArchiveService.archive_batch`.
+
+    Commits after every batch so locks and transactions stay short, and
+    stops after ``archive_max_batches`` to bound a single sweep.
+    """
+
+    service = ArchiveService(session)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.task_retention_days)
+    archived = 0
+    for _ in range(settings.archive_max_batches):
+        moved = service.archive_batch(
+            older_than=cutoff, limit=settings.archive_batch_size
+        )
+        session.commit()
+        archived += moved
+        if moved < settings.archive_batch_size:
+            break
+    if archived:
+        logger.info("Archived %d finished tasks to %s", archived, settings.archive_dir)
+
+
+__all__ = ["ArchiveService", "TaskArchive", "archive_finished_tasks"]
@@ -0,0 +1,193 @@
+"""Compressed, content-addressed storage for task logs and payloads."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import zlib
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import Insert, delete, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import insert_ignore
+from app.models import Blob, Task
+
+logger = logging.getLogger(__name__)
+
+try:  # Optional: pip install -e .[zstd]
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+def _encode(data: bytes, codec: str, level: int) -> tuple[str, bytes]:
+    if codec == "zstd" and zstandard is not None:
+        encoded = zstandard.ZstdCompressor(level=level).compress(data)
+    else:
+        codec, encoded = "zlib", zlib.compress(data, min(level, 9))
+    # Tiny payloads do not shrink; keep them as they are.
+    if len(encoded) >= len(data):
+        return "identity", data
+    return codec, encoded
+
+
+def _decode(codec: str, data: bytes) -> bytes:
+    if codec == "identity":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown blob codec {codec!r}")
+
+
+def blob_digest(data: bytes) -> str:
+    """Return the content address of ``data``."""
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode_json(value: Any) -> bytes:
+    """Canonical JSON bytes, so equal values share one blob."""
+
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def _insert_or_touch(session: Session) -> Insert:
+    """``INSERT`` of blobs that refreshes ``created_at`` of existing rows.
+
+    Storing a payload again restarts its garbage collection grace period.
+    On PostgreSQL the update also locks the row, so a collection deleting it
+    concurrently either waits and finds it recent, or finishes first and
+    this insert creates the row anew.
+    """
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(Blob)
+    elif dialect == "postgresql":
+        stmt = postgresql_insert(Blob)
+    else:
+        return insert_ignore(session, Blob)
+    return stmt.on_conflict_do_update(
+        index_elements=[Blob.digest], set_={"created_at": func.now()}
+    )
+
+
+def _unreferenced() -> Any:
+    return ~or_(
+        *(
+            exists().where(column == Blob.digest)
+            for column in (Task.log_digest, Task.result_digest, Task.stats_digest)
+        )
+    )
+
+
+class BlobStore:
+    """Write and read :class:`Blob` rows through a session.
+
+    Identical content is stored once and never rewritten, so writes are
+    safe under concurrent writers. Nothing is decompressed unless one of the
+    ``get*`` methods is called.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        *,
+        codec: str | None = None,
+        level: int | None = None,
+    ) -> None:
+        self._session = session
+        self._codec = codec or settings.blob_codec
+        self._level = level or settings.blob_compression_level
+        if self._codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; compressing blobs with zlib")
+
+    def put_many(self, payloads: Sequence[bytes]) -> list[str]:
+        """Store ``payloads`` with one executemany INSERT; return their digests."""
+
+        digests = [blob_digest(data) for data in payloads]
+        rows: dict[str, dict[str, Any]] = {}
+        for digest, data in zip(digests, payloads, strict=True):
+            if digest not in rows:
+                codec, encoded = _encode(data, self._codec, self._level)
+                rows[digest] = {
+                    "digest": digest,
+                    "codec": codec,
+                    "size": len(data),
+                    "data": encoded,
+                }
+        if rows:
+            self._session.execute(
+                _insert_or_touch(self._session), list(rows.values())
+            )
+        return digests
+
+    def put(self, data: bytes) -> str:
+        return self.put_many([data])[0]
+
+    def get_many(self, digests: Iterable[str | None]) -> dict[str, bytes]:
+        """Load and decompress the given blobs in one query."""
+
+        wanted = {digest for digest in digests if digest}
+        if not wanted:
+            return {}
+        rows = self._session.execute(
+            select(Blob.digest, Blob.codec, Blob.data).where(Blob.digest.in_(wanted))
+        )
+        return {row.digest: _decode(row.codec, row.data) for row in rows}
+
+    def get(self, digest: str) -> bytes | None:
+        return self.get_many([digest]).get(digest)
+
+    def collect_garbage(self, *, older_than: datetime, limit: int) -> int:
+        """Delete up to ``limit`` unreferenced blobs last stored before ``older_than``.
+
+        Blobs are never deleted by whatever unlinks them (archiving), only
+        here after a grace period. The reference check is repeated in the
+        DELETE itself, so a blob a task started to reference after it was
+        picked is kept.
+        """
+
+        picked = (
+            select(Blob.digest)
+            .where(Blob.created_at < older_than)
+            .where(_unreferenced())
+            .limit(limit)
+        )
+        result = self._session.execute(
+            delete(Blob)
+            .where(Blob.digest.in_(picked))
+            .where(_unreferenced())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+def collect_orphan_blobs(session: Session) -> None:
+    """Periodic job entry point for :meth:`BlobStore.collect_garbage`."""
+
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.blob_gc_grace_seconds
+    )
+    removed = BlobStore(session).collect_garbage(
+        older_than=cutoff, limit=settings.blob_gc_batch_size
+    )
+    session.commit()
+    if removed:
+        logger.info("Deleted %d unreferenced blobs", removed)
+
+
+__all__ = ["BlobStore", "blob_digest", "collect_orphan_blobs", "encode_json"]
@@ -0,0 +1,182 @@
+"""Per-device task counters (``task_counts``) kept in step with status changes."""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from collections.abc import Iterable
+
+from sqlalchemy import event, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.models import Device, Task, TaskCount, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+_COUNT_DELTAS_KEY = "task_count_deltas"
+
+
+def count_status_changes(
+    session: Session,
+    changes: Iterable[tuple[int, TaskStatus | None, TaskStatus | None]],
+) -> None:
+    """Record ``(device_id, old, new)`` task transitions for the counters.
+
+    ``old`` is None for a created task and ``new`` is None for a deleted
+    one. Call this from every write that creates, deletes or changes the
+    status of tasks. Deltas are summed in the session and applied as one
+    upsert right before the commit, inside the same transaction, so the
+    counters move together with the rows and a rollback changes nothing.
+    """
+
+    deltas: Counter[tuple[int, TaskStatus]] = session.info.setdefault(
+        _COUNT_DELTAS_KEY, Counter()
+    )
+    for device_id, old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            deltas[(device_id, old)] -= 1
+        if new is not None:
+            deltas[(device_id, new)] += 1
+
+
+def _apply_deltas(session: Session, deltas: dict[tuple[int, TaskStatus], int]) -> None:
+    # Sorted keys give concurrent committers the same lock order.
+    rows = [
+        {"device_id": device_id, "status": status, "count": delta}
+        for (device_id, status), delta in sorted(
+            deltas.items(), key=lambda item: (item[0][0], item[0][1].name)
+        )
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        stmt = insert(TaskCount)
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[TaskCount.device_id, TaskCount.status],
+                set_={"count": TaskCount.count + stmt.excluded.count},
+            ),
+            rows,
+        )
+        return
+    for row in rows:
+        result = session.execute(
+            update(TaskCount)
+            .where(TaskCount.device_id == row["device_id"])
+            .where(TaskCount.status == row["status"])
+            .values(count=TaskCount.count + row["count"])
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            session.add(TaskCount(**row))
+    session.flush()
+
+
+def read_device_counts(
+    session: Session, user_key: str
+) -> dict[str, dict[TaskStatus, int]]:
+    """Task counts per status of each of a user's devices, by device identifier.
+
+    Reads ``task_counts`` only; devices without tasks map to an empty dict.
+    """
+
+    rows = session.execute(
+        select(Device.device_id, TaskCount.status, TaskCount.count)
+        .select_from(Device)
+        .outerjoin(TaskCount, TaskCount.device_id == Device.id)
+        .where(Device.user_key == user_key)
+        .order_by(Device.device_id)
+    )
+    counts: dict[str, dict[TaskStatus, int]] = {}
+    for device_identifier, status, count in rows:
+        device_counts = counts.setdefault(device_identifier, {})
+        if status is not None and count:
+            device_counts[status] = count
+    return counts
+
+
+def read_status_totals(session: Session) -> dict[TaskStatus, int]:
+    """Fleet-wide task counts per status, summed from ``task_counts``."""
+
+    rows = session.execute(
+        select(TaskCount.status, func.sum(TaskCount.count)).group_by(TaskCount.status)
+    )
+    return {status: int(total) for status, total in rows}
+
+
+def reconcile_task_counts(session: Session) -> int:
+    """Reconcile ``task_counts`` with an aggregate of ``tasks``; return the fixes.
+
+    The drift of every ``(device_id, status)`` is computed in one statement,
+    so actual and stored counts come from the same snapshot, and is applied
+    as an increment. Increments commute with the deltas of concurrent
+    writers, so the repair never needs to lock ``tasks`` and cannot undo a
+    transition that committed while it ran. The caller commits.
+    """
+
+    combined = union_all(
+        select(
+            Task.device_id.label("device_id"),
+            Task.status.label("status"),
+            literal(1).label("actual"),
+            literal(0).label("stored"),
+        ),
+        select(
+            TaskCount.device_id,
+            TaskCount.status,
+            literal(0),
+            TaskCount.count,
+        ),
+    ).subquery()
+    drift = session.execute(
+        select(
+            combined.c.device_id,
+            combined.c.status,
+            (func.sum(combined.c.actual) - func.sum(combined.c.stored)).label("delta"),
+        )
+        .group_by(combined.c.device_id, combined.c.status)
+        .having(func.sum(combined.c.actual) != func.sum(combined.c.stored))
+    ).all()
+    deltas = {(row.device_id, row.status): row.delta for row in drift}
+    _apply_deltas(session, deltas)
+    return len(deltas)
+
+
+def repair_task_counts(session: Session) -> None:
+    """Periodic job entry point for :func:`reconcile_task_counts`."""
+
+    fixed = reconcile_task_counts(session)
+    session.commit()
+    if fixed:
+        logger.warning("Repaired %d drifted task counters", fixed)
+
+
+@event.listens_for(Session, "before_commit")
+def _flush_task_count_deltas(session: Session) -> None:
+    deltas = session.info.pop(_COUNT_DELTAS_KEY, None)
+    if deltas:
+        _apply_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_task_count_deltas(
+    session: Session, transaction: SessionTransaction
+) -> None:
+    if transaction.parent is None:
+        session.info.pop(_COUNT_DELTAS_KEY, None)
+
+
+__all__ = [
+    "count_status_changes",
+    "read_device_counts",
+    "read_status_totals",
+    "reconcile_task_counts",
+    "repair_task_counts",
+]
@@ -2,12 +2,30 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
+from functools import partial
+from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.models import Device, User
+from app.db.session import Base, insert_if_absent, run_after_commit
+from app.models import Device, DeviceTag, User
+from app.services.feed import device_event, device_event_throttle, publish_on_commit
+from app.services.heartbeat import heartbeat_buffer
+from app.services.identity import DeviceRef, identity_cache
+from app.services.pagination import PageCursor, keyset_before
+from app.services.revision import mark_users_changed
+
+
+def _device_ref(device: Device) -> DeviceRef:
+    return DeviceRef(
+        id=device.id,
+        user_id=device.user_id,
+        user_key=device.user_key,
+        device_id=device.device_id,
+    )
 
 
 class DeviceService:
@@ -27,13 +45,124 @@ class DeviceService:
 
         user = self.get_user(user_key)
         if user:
+            identity_cache.set_user_id(user_key, user.id)
             return user
 
-        user = User(user_key=user_key, name=name)
-        self._session.add(user)
-        self._session.flush()
+        inserted = self._insert_if_absent(User, {"user_key": user_key, "name": name})
+        user = self.get_user(user_key)
+        assert user is not None
+        if inserted:
+            self._cache_on_commit(partial(identity_cache.set_user_id, user_key, user.id))
+        else:
+            identity_cache.set_user_id(user_key, user.id)
         return user
 
+    def get_user_id(self, user_key: str) -> int | None:
+        """Return a user's id through the identity cache, without creating it."""
+
+        user_id = identity_cache.get_user_id(user_key)
+        if user_id is not None:
+            return user_id
+
+        user_id = self._session.scalar(select(User.id).where(User.user_key == user_key))
+        if user_id is not None:
+            identity_cache.set_user_id(user_key, user_id)
+        return user_id
+
+    def ensure_user_id(self, user_key: str) -> int:
+        """Return a user's id through the identity cache, creating the user."""
+
+        user_id = self.get_user_id(user_key)
+        if user_id is not None:
+            return user_id
+        return self.ensure_user(user_key).id
+
+    def resolve_device(self, *, user_key: str, device_identifier: str) -> DeviceRef | None:
+        """Return a device's identity through the identity cache."""
+
+        ref = identity_cache.get_device(user_key, device_identifier)
+        if ref is not None:
+            return ref
+
+        stmt = (
+            select(Device.id, Device.user_id)
+            .where(Device.user_key == user_key)
+            .where(Device.device_id == device_identifier)
+        )
+        row = self._session.execute(stmt).first()
+        if row is None:
+            return None
+        ref = DeviceRef(
+            id=row.id,
+            user_id=row.user_id,
+            user_key=user_key,
+            device_id=device_identifier,
+        )
+        identity_cache.set_device(ref)
+        return ref
+
+    def touch_device(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        agent_version: str | None = None,
+    ) -> DeviceRef:
+        """Record an agent heartbeat, registering the user/device if needed.
+
+        With a warm identity cache this never loads the device row. Plain
+        heartbeats are coalesced by the heartbeat buffer; the row is written
+        immediately only when status or agent version changes. Likewise only
+        those changes reach the change feed right away; plain heartbeats are
+        published at most every ``MAA_DEVICE_EVENT_INTERVAL_SECONDS``.
+        """
+
+        ref = self.resolve_device(user_key=user_key, device_identifier=device_identifier)
+        if ref is not None:
+            now = datetime.now(timezone.utc)
+            changed = heartbeat_buffer.record(
+                ref.id, seen_at=now, status="online", agent_version=agent_version
+            )
+            # A disabled buffer asks for every heartbeat to be written, which
+            # says nothing about whether presence changed.
+            announce = changed and heartbeat_buffer.enabled
+            if device_event_throttle.due(ref.id, changed=announce):
+                publish_on_commit(
+                    self._session,
+                    user_key,
+                    device_event(
+                        device_identifier=device_identifier,
+                        status="online",
+                        last_seen_at=now,
+                        agent_version=agent_version,
+                    ),
+                )
+            if not changed:
+                return ref
+
+            values: dict[str, object] = {"last_seen_at": now, "status": "online"}
+            if agent_version:
+                values["agent_version"] = agent_version
+            result = self._session.execute(
+                update(Device)
+                .where(Device.id == ref.id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                self._mark_written_on_commit(ref.id, agent_version)
+                mark_users_changed(self._session, [ref.user_id])
+                return ref
+            # Deleted behind our back (e.g. by another worker): start over.
+            identity_cache.invalidate_device(user_key, device_identifier)
+            heartbeat_buffer.forget(ref.id)
+
+        user = self.ensure_user(user_key)
+        device = self.register_or_touch_device(
+            user=user, device_identifier=device_identifier, agent_version=agent_version
+        )
+        return _device_ref(device)
+
     def register_or_touch_device(
         self,
         *,
@@ -54,33 +183,73 @@ class DeviceService:
         now = datetime.now(timezone.utc)
 
         if device is None:
-            device = Device(
-                user_id=user.id,
-                user_key=user.user_key,
-                device_id=device_identifier,
-                display_name=display_name,
-                status="online",
-                agent_version=agent_version,
-                last_seen_at=now,
+            inserted = self._insert_if_absent(
+                Device,
+                {
+                    "user_id": user.id,
+                    "user_key": user.user_key,
+                    "device_id": device_identifier,
+                    "display_name": display_name,
+                    "status": "online",
+                    "agent_version": agent_version,
+                    "last_seen_at": now,
+                },
             )
-            self._session.add(device)
-        else:
-            device.last_seen_at = now
-            device.agent_version = agent_version or device.agent_version
-            device.status = "online"
-            if display_name:
-                device.display_name = display_name
+            device = self._session.scalar(stmt)
+            assert device is not None
+            if inserted:
+                self._cache_on_commit(
+                    partial(identity_cache.set_device, _device_ref(device))
+                )
+                self._mark_written_on_commit(device.id, agent_version)
+                mark_users_changed(self._session, [user.id])
+                self._publish(device)
+                return device
+
+        device.last_seen_at = now
+        device.agent_version = agent_version or device.agent_version
+        device.status = "online"
+        if display_name:
+            device.display_name = display_name
 
         self._session.flush()
+        identity_cache.set_device(_device_ref(device))
+        self._mark_written_on_commit(device.id, device.agent_version)
+        mark_users_changed(self._session, [device.user_id])
+        self._publish(device)
         return device
 
-    def list_devices(self, user_key: str | None = None) -> list[Device]:
-        """List devices optionally filtered by user."""
+    def list_devices(
+        self,
+        user_key: str | None = None,
+        *,
+        limit: int | None = None,
+        cursor: PageCursor | None = None,
+    ) -> list[Device]:
+        """List devices newest first, optionally filtered by user and paged."""
 
-        stmt = select(Device).order_by(Device.created_at.desc())
+        stmt = select(Device).order_by(Device.created_at.desc(), Device.id.desc())
         if user_key:
             stmt = stmt.where(Device.user_key == user_key)
-        return list(self._session.scalars(stmt))
+        if cursor is not None:
+            stmt = stmt.where(
+                keyset_before(self._session, Device.created_at, Device.id, cursor)
+            )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        devices = list(self._session.scalars(stmt))
+        heartbeat_buffer.overlay(devices)
+        return devices
+
+    def count_active_devices(self, since: datetime) -> int:
+        """Count devices whose last heartbeat is at or after ``since``."""
+
+        stmt = (
+            select(func.count())
+            .select_from(Device)
+            .where(Device.last_seen_at >= since)
+        )
+        return self._session.scalar(stmt) or 0
 
     def get_device(self, *, user_key: str, device_identifier: str) -> Device | None:
         """Fetch a device by composite key."""
@@ -92,3 +261,99 @@ class DeviceService:
         )
         return self._session.scalar(stmt)
 
+    def select_devices(
+        self,
+        *,
+        user_key: str,
+        device_identifiers: Sequence[str] | None = None,
+        tag: str | None = None,
+    ) -> list[DeviceRef]:
+        """Return identities of a user's devices, optionally narrowed down.
+
+        ``device_identifiers`` keeps the caller's order and silently skips
+        unknown devices; ``tag`` selects the devices carrying that tag. One
+        column query, no ORM rows.
+        """
+
+        stmt = select(Device.id, Device.user_id, Device.device_id).where(
+            Device.user_key == user_key
+        )
+        if device_identifiers is not None:
+            stmt = stmt.where(Device.device_id.in_(set(device_identifiers)))
+        if tag is not None:
+            stmt = stmt.join(DeviceTag, DeviceTag.device_id == Device.id).where(
+                DeviceTag.tag == tag
+            )
+        refs = {
+            row.device_id: DeviceRef(
+                id=row.id,
+                user_id=row.user_id,
+                user_key=user_key,
+                device_id=row.device_id,
+            )
+            for row in self._session.execute(stmt.order_by(Device.id))
+        }
+        if device_identifiers is None:
+            return list(refs.values())
+        ordered = dict.fromkeys(device_identifiers)
+        return [refs[identifier] for identifier in ordered if identifier in refs]
+
+    def get_tags(self, device: DeviceRef) -> list[str]:
+        """Tags of a device, sorted."""
+
+        stmt = (
+            select(DeviceTag.tag)
+            .where(DeviceTag.device_id == device.id)
+            .order_by(DeviceTag.tag)
+        )
+        return list(self._session.scalars(stmt))
+
+    def set_tags(self, device: DeviceRef, tags: Sequence[str]) -> list[str]:
+        """Replace the tags of a device and return them sorted."""
+
+        wanted = sorted(set(tags))
+        self._session.execute(delete(DeviceTag).where(DeviceTag.device_id == device.id))
+        if wanted:
+            self._session.execute(
+                insert(DeviceTag),
+                [{"device_id": device.id, "tag": tag} for tag in wanted],
+            )
+        return wanted
+
+    def _insert_if_absent(self, model: type[Base], values: dict[str, Any]) -> bool:
+        """Insert a row unless a unique key already exists; True if inserted.
+
+        Concurrent first polls from one agent (or several workers) would
+        otherwise race on the get-or-create and fail with an IntegrityError.
+        """
+
+        return insert_if_absent(self._session, model, values)
+
+    def _publish(self, device: Device) -> None:
+        device_event_throttle.due(device.id, changed=True)
+        publish_on_commit(
+            self._session,
+            device.user_key,
+            device_event(
+                device_identifier=device.device_id,
+                status=device.status,
+                last_seen_at=device.last_seen_at,
+                agent_version=device.agent_version,
+            ),
+        )
+
+    def _mark_written_on_commit(self, device_pk: int, agent_version: str | None) -> None:
+        run_after_commit(
+            self._session,
+            partial(
+                heartbeat_buffer.mark_written,
+                device_pk,
+                status="online",
+                agent_version=agent_version,
+            ),
+        )
+
+    def _cache_on_commit(self, populate: partial[None]) -> None:
+        # Freshly inserted rows only become cacheable once they are committed;
+        # a rolled-back insert must not leave a dangling id behind.
+        run_after_commit(self._session, populate)
@@ -0,0 +1,240 @@
+"""In-process fan-out of task and device changes to console subscribers."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import lazy
+from app.db.session import run_after_commit
+from app.services.pagination import as_utc
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    """One change pushed to subscribers: ``kind`` is ``task`` or ``device``."""
+
+    kind: str
+    data: dict[str, Any]
+
+
+# Queued in place of further events once a subscriber fell behind.
+OVERFLOW = ChangeEvent(kind="overflow", data={})
+# Published instead of one event per row by bulk writes: refetch the lists.
+RESYNC = ChangeEvent(kind="resync", data={})
+
+
+@dataclass(eq=False, slots=True)
+class Subscription:
+    """A subscriber's bounded queue, bound to the event loop that created it."""
+
+    user_key: str
+    queue: asyncio.Queue[ChangeEvent]
+    loop: asyncio.AbstractEventLoop
+    dropped: bool = field(default=False)
+
+
+class ChangeFeed:
+    """Per-user publish/subscribe hub with bounded queues.
+
+    ``publish`` may be called from any thread; events are handed to each
+    subscriber's loop with ``call_soon_threadsafe``, so publishers never
+    block on consumers. A subscriber whose queue is full is dropped: its
+    queue is replaced by a single :data:`OVERFLOW` marker, after which the
+    consumer should close and let the client reconnect and resync. Like the
+    task notifier, delivery is process-local.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self.dropped_total = 0
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, user_key: str) -> Subscription:
+        """Register a subscriber for ``user_key`` on the running event loop."""
+
+        subscription = Subscription(
+            user_key=user_key,
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            loop=asyncio.get_running_loop(),
+        )
+        with self._lock:
+            self._subscribers.setdefault(user_key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_key)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_key]
+
+    def subscriber_count(self, user_key: str | None = None) -> int:
+        with self._lock:
+            if user_key is not None:
+                return len(self._subscribers.get(user_key, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_key: str, event: ChangeEvent) -> int:
+        """Queue ``event`` for every subscriber of ``user_key``; return how many."""
+
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(user_key, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    self._deliver, subscription, event
+                )
+            except RuntimeError:
+                logger.debug("Dropping subscriber of %r bound to a closed loop", user_key)
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def _deliver(self, subscription: Subscription, event: ChangeEvent) -> None:
+        # Runs on the subscriber's loop, the only place its queue is touched.
+        if subscription.dropped:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        self.dropped_total += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(OVERFLOW)
+        logger.info(
+            "Dropped a change feed subscriber of %r after %d queued events",
+            subscription.user_key,
+            self.queue_size,
+        )
+
+    @staticmethod
+    async def next(subscription: Subscription, timeout: float) -> ChangeEvent | None:
+        """Return the next queued event, or None after ``timeout`` seconds."""
+
+        try:
+            return await asyncio.wait_for(subscription.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+def _timestamp(value: datetime | None) -> str | None:
+    return as_utc(value).isoformat() if value is not None else None
+
+
+def task_event(
+    *,
+    task_uuid: str,
+    device_identifier: str,
+    status: Any,
+    started_at: datetime | None = None,
+    finished_at: datetime | None = None,
+) -> ChangeEvent:
+    """A task status transition; unknown ``task_uuid``s signal a new task."""
+
+    return ChangeEvent(
+        kind="task",
+        data={
+            "task_uuid": task_uuid,
+            "device_id": device_identifier,
+            "status": getattr(status, "value", status),
+            "started_at": _timestamp(started_at),
+            "finished_at": _timestamp(finished_at),
+        },
+    )
+
+
+class EventThrottle:
+    """Per-key rate limit for repeated events that carry no state change.
+
+    Agents heartbeat on every poll, report and log chunk; subscribers only
+    need the presence changes plus an occasional ``last_seen_at`` tick.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._published: dict[Hashable, float] = {}
+
+    def due(self, key: Hashable, *, changed: bool = False) -> bool:
+        """Whether to publish for ``key`` now; a change is always due."""
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._published.get(key)
+            if not changed and (
+                self.interval <= 0
+                or (last is not None and now - last < self.interval)
+            ):
+                return False
+            self._published[key] = now
+            return True
+
+
+def device_event(
+    *,
+    device_identifier: str,
+    status: str,
+    last_seen_at: datetime | None,
+    agent_version: str | None = None,
+) -> ChangeEvent:
+    """A device heartbeat or presence change."""
+
+    return ChangeEvent(
+        kind="device",
+        data={
+            "device_id": device_identifier,
+            "status": status,
+            "last_seen_at": _timestamp(last_seen_at),
+            "agent_version": agent_version,
+        },
+    )
+
+
+change_feed: ChangeFeed = lazy(
+    lambda: ChangeFeed(queue_size=settings.change_feed_queue_size)
+)
+
+
+device_event_throttle: EventThrottle = lazy(
+    lambda: EventThrottle(settings.device_event_interval_seconds)
+)
+
+
+def publish_on_commit(session: Session, user_key: str, event: ChangeEvent) -> None:
+    """Publish ``event`` to ``user_key``'s subscribers once ``session`` commits."""
+
+    run_after_commit(session, partial(change_feed.publish, user_key, event))
+
+
+__all__ = [
+    "OVERFLOW",
+    "RESYNC",
+    "ChangeEvent",
+    "ChangeFeed",
+    "EventThrottle",
+    "Subscription",
+    "change_feed",
+    "device_event",
+    "device_event_throttle",
+    "publish_on_commit",
+    "task_event",
+]
@@ -0,0 +1,188 @@
+"""Coalescing buffer for agent heartbeats (``Device.last_seen_at``)."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.lazy import lazy
+from app.models import Device
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _Presence:
+    status: str
+    agent_version: str | None
+    seen_at: datetime | None = None
+
+
+class HeartbeatBuffer:
+    """Keeps the latest heartbeat per device until the next periodic flush.
+
+    A heartbeat only needs an immediate write when it changes something other
+    than ``last_seen_at`` (status or agent version) or when this process has
+    not written the device yet. Everything else is folded into one batched
+    UPDATE per flush interval.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._devices: dict[int, _Presence] = {}
+
+    def record(
+        self,
+        device_pk: int,
+        *,
+        seen_at: datetime,
+        status: str,
+        agent_version: str | None,
+    ) -> bool:
+        """Buffer a heartbeat and return True if the caller must write it now."""
+
+        if not self.enabled:
+            return True
+        with self._lock:
+            known = self._devices.get(device_pk)
+            if (
+                known is None
+                or known.status != status
+                or (agent_version and agent_version != known.agent_version)
+            ):
+                return True
+            known.seen_at = seen_at
+            return False
+
+    def mark_written(
+        self, device_pk: int, *, status: str, agent_version: str | None
+    ) -> None:
+        """Remember the device state that was just persisted."""
+
+        with self._lock:
+            known = self._devices.get(device_pk)
+            if known is None:
+                self._devices[device_pk] = _Presence(status, agent_version)
+                return
+            known.status = status
+            known.agent_version = agent_version or known.agent_version
+            known.seen_at = None
+
+    def forget(self, device_pk: int) -> None:
+        with self._lock:
+            self._devices.pop(device_pk, None)
+
+    def pending_seen_at(self, device_pk: int) -> datetime | None:
+        """Return the buffered, not yet persisted heartbeat time for a device."""
+
+        with self._lock:
+            known = self._devices.get(device_pk)
+            return known.seen_at if known else None
+
+    def newest_seen_at(
+        self, device_pks: Iterable[int] | None = None
+    ) -> datetime | None:
+        """Return the newest buffered heartbeat of ``device_pks`` (all if None)."""
+
+        with self._lock:
+            if device_pks is None:
+                known = self._devices.values()
+            else:
+                known = [
+                    self._devices[pk] for pk in device_pks if pk in self._devices
+                ]
+            return max(
+                (presence.seen_at for presence in known if presence.seen_at),
+                default=None,
+            )
+
+    def overlay(self, devices: Iterable[Device]) -> None:
+        """Expose buffered heartbeats on loaded devices without dirtying them."""
+
+        for device in devices:
+            seen_at = self.pending_seen_at(device.id)
+            if seen_at is not None:
+                set_committed_value(device, "last_seen_at", seen_at)
+
+    def drain(self) -> dict[int, datetime]:
+        """Take every buffered heartbeat, leaving the known device state."""
+
+        with self._lock:
+            pending = {
+                device_pk: known.seen_at
+                for device_pk, known in self._devices.items()
+                if known.seen_at is not None
+            }
+            for device_pk in pending:
+                self._devices[device_pk].seen_at = None
+        return pending
+
+    def restore(self, pending: dict[int, datetime]) -> None:
+        """Put drained heartbeats back after a failed flush."""
+
+        with self._lock:
+            for device_pk, seen_at in pending.items():
+                known = self._devices.get(device_pk)
+                if known is not None and (
+                    known.seen_at is None or known.seen_at < seen_at
+                ):
+                    known.seen_at = seen_at
+
+    def flush(self, session: Session) -> int:
+        """Persist buffered heartbeats in one executemany UPDATE."""
+
+        pending = self.drain()
+        if not pending:
+            return 0
+        devices = Device.__table__
+        stmt = (
+            update(devices)
+            .where(devices.c.id == bindparam("b_id"))
+            # Never move presence backwards when several workers flush.
+            .where(
+                or_(
+                    devices.c.last_seen_at.is_(None),
+                    devices.c.last_seen_at < bindparam("b_seen"),
+                )
+            )
+            # A heartbeat is not a metadata change; keep updated_at as is.
+            .values(last_seen_at=bindparam("b_seen"), updated_at=devices.c.updated_at)
+        )
+        try:
+            session.execute(
+                stmt,
+                [
+                    {"b_id": device_pk, "b_seen": seen_at}
+                    for device_pk, seen_at in pending.items()
+                ],
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            self.restore(pending)
+            raise
+        logger.debug("Flushed %d buffered heartbeats", len(pending))
+        return len(pending)
+
+
+heartbeat_buffer: HeartbeatBuffer = lazy(
+    lambda: HeartbeatBuffer(enabled=settings.heartbeat_flush_seconds > 0)
+)
+
+
+def flush_heartbeats(session: Session) -> None:
+    """Periodic job entry point."""
+
+    heartbeat_buffer.flush(session)
+
+
+__all__ = ["HeartbeatBuffer", "flush_heartbeats", "heartbeat_buffer"]
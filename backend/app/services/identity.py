@@ -0,0 +1,167 @@
+"""Bounded in-memory cache of user and device identities."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from sqlalchemy import event, inspect
+
+from app.core.config import settings
+from app.core.lazy import lazy
+from app.models import Device, User
+
+_V = TypeVar("_V")
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceRef:
+    """Identity of a device row, usable wherever only the keys are needed.
+
+    Attribute names mirror :class:`~app.models.Device` so services accept
+    either a loaded ORM object or a cached reference.
+    """
+
+    id: int
+    user_id: int
+    user_key: str
+    device_id: str
+
+
+class _LRUTTLCache(Generic[_V]):
+    """Thread-safe LRU mapping whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, _V]] = OrderedDict()
+
+    def get(self, key: Hashable) -> _V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: _V) -> None:
+        if self._maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class IdentityCache:
+    """Maps ``user_key`` to user ids and ``(user_key, device_id)`` to devices.
+
+    Only rows known to be committed are cached, and nothing negative is
+    cached, so a miss always falls through to the database. Entries are
+    dropped when the ORM renames or deletes the row; the TTL bounds how long
+    a change made by another worker process can go unnoticed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._users: _LRUTTLCache[int] = _LRUTTLCache(maxsize, ttl)
+        self._devices: _LRUTTLCache[DeviceRef] = _LRUTTLCache(maxsize, ttl)
+
+    def get_user_id(self, user_key: str) -> int | None:
+        return self._users.get(user_key)
+
+    def set_user_id(self, user_key: str, user_id: int) -> None:
+        self._users.set(user_key, user_id)
+
+    def invalidate_user(self, user_key: str) -> None:
+        self._users.pop(user_key)
+
+    def get_device(self, user_key: str, device_identifier: str) -> DeviceRef | None:
+        return self._devices.get((user_key, device_identifier))
+
+    def set_device(self, ref: DeviceRef) -> None:
+        self._devices.set((ref.user_key, ref.device_id), ref)
+
+    def invalidate_device(self, user_key: str, device_identifier: str) -> None:
+        self._devices.pop((user_key, device_identifier))
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._devices.clear()
+
+
+identity_cache: IdentityCache = lazy(
+    lambda: IdentityCache(
+        maxsize=settings.identity_cache_size, ttl=settings.identity_cache_ttl
+    )
+)
+
+
+def _previous(target: Any, attribute: str) -> Any:
+    history = inspect(target).attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(target, attribute)
+
+
+def _renamed(target: Any, *attributes: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _evict_user(target: User) -> None:
+    identity_cache.invalidate_user(_previous(target, "user_key"))
+    identity_cache.invalidate_user(target.user_key)
+
+
+def _evict_device(target: Device) -> None:
+    identity_cache.invalidate_device(
+        _previous(target, "user_key"), _previous(target, "device_id")
+    )
+    identity_cache.invalidate_device(target.user_key, target.device_id)
+
+
+@event.listens_for(User, "after_update")
+def _on_user_update(_mapper: Any, _connection: Any, target: User) -> None:
+    if _renamed(target, "user_key"):
+        _evict_user(target)
+
+
+@event.listens_for(User, "after_delete")
+def _on_user_delete(_mapper: Any, _connection: Any, target: User) -> None:
+    _evict_user(target)
+
+
+@event.listens_for(Device, "after_update")
+def _on_device_update(_mapper: Any, _connection: Any, target: Device) -> None:
+    if _renamed(target, "user_key", "device_id", "user_id"):
+        _evict_device(target)
+
+
+@event.listens_for(Device, "after_delete")
+def _on_device_delete(_mapper: Any, _connection: Any, target: Device) -> None:
+    _evict_device(target)
+
+
+__all__ = ["DeviceRef", "IdentityCache", "identity_cache"]
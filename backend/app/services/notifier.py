@@ -0,0 +1,105 @@
+"""In-process wake-ups for long-polling agents."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def device_key(user_key: str, device_identifier: str) -> tuple[str, str]:
+    """Return the notifier key identifying a device queue."""
+
+    return (user_key, device_identifier)
+
+
+def task_log_key(task_uuid: str) -> tuple[str]:
+    """Return the notifier key for new output chunks of a task.
+
+    A 1-tuple, so it can never collide with a :func:`device_key`.
+    """
+
+    return (task_uuid,)
+
+
+def _resolve(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class TaskNotifier:
+    """Registry of pending waiters keyed by an arbitrary hashable key.
+
+    ``notify`` may be called from any thread (sync route handlers run in the
+    threadpool); waiters are resolved on the event loop that created them.
+    Wake-ups are process-local, so with several workers a waiter only hears
+    about tasks enqueued by its own process; long polls also re-check the
+    database periodically to catch the others.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[Hashable, set[asyncio.Future[None]]] = {}
+
+    def subscribe(self, key: Hashable) -> asyncio.Future[None]:
+        """Register a waiter for ``key`` on the running event loop."""
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+        return waiter
+
+    def unsubscribe(self, key: Hashable, waiter: asyncio.Future[None]) -> None:
+        """Forget a waiter, whether or not it has fired."""
+
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters is None:
+                return
+            waiters.discard(waiter)
+            if not waiters:
+                del self._waiters[key]
+
+    def notify(self, key: Hashable) -> int:
+        """Wake every waiter registered for ``key`` and return how many."""
+
+        with self._lock:
+            waiters = self._waiters.pop(key, set())
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                logger.debug("Dropping waiter for %r bound to a closed loop", key)
+        return len(waiters)
+
+    def notify_many(self, keys: Iterable[Hashable]) -> int:
+        """Wake the waiters of every key in ``keys`` under one lock acquisition."""
+
+        with self._lock:
+            waiters = [
+                waiter for key in keys for waiter in self._waiters.pop(key, ())
+            ]
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                logger.debug("Dropping waiter bound to a closed loop")
+        return len(waiters)
+
+    @staticmethod
+    async def wait(waiter: asyncio.Future[None], timeout: float) -> bool:
+        """Wait for ``waiter`` up to ``timeout`` seconds; return True if woken."""
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except TimeoutError:
+            return False
+        return True
+
+
+task_notifier = TaskNotifier()
+
+__all__ = ["TaskNotifier", "device_key", "task_log_key", "task_notifier"]
@@ -0,0 +1,98 @@
+"""Keyset pagination on ``(created_at, id)`` for the admin list endpoints."""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Protocol
+
+from sqlalchemy import ColumnElement, String, and_, literal, or_, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+
+class _Keyed(Protocol):
+    created_at: datetime
+    id: int
+
+
+def as_utc(value: datetime) -> datetime:
+    """Attach UTC to naive datetimes (SQLite) and convert aware ones to UTC."""
+
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class PageCursor:
+    """Position after the last row of a page, newest-first ordering."""
+
+    created_at: datetime
+    id: int
+
+    @classmethod
+    def after(cls, row: _Keyed) -> PageCursor:
+        return cls(created_at=as_utc(row.created_at), id=row.id)
+
+    def sort_key(self) -> tuple[datetime, int]:
+        return self.created_at, self.id
+
+    def encode(self) -> str:
+        raw = f"{self.created_at.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> PageCursor:
+        """Parse a token produced by :meth:`encode`; ValueError if malformed."""
+
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            created_at, row_id = raw.rsplit("|", 1)
+            return cls(
+                created_at=as_utc(datetime.fromisoformat(created_at)), id=int(row_id)
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ValueError(f"Invalid page cursor {token!r}") from exc
+
+
+def row_sort_key(row: _Keyed) -> tuple[datetime, int]:
+    """``(created_at, id)`` of a row, comparable with :meth:`PageCursor.sort_key`."""
+
+    return as_utc(row.created_at), row.id
+
+
+def _timestamp_params(session: Session, value: datetime) -> list[Any]:
+    """Every form in which ``value`` may be stored, smallest first."""
+
+    if session.get_bind().dialect.name != "sqlite":
+        return [value]
+    # SQLite stores timestamps as text. server_default=CURRENT_TIMESTAMP writes
+    # whole seconds, while bound datetimes always carry ".ffffff"; compare
+    # against text in the stored form so the cursor row sorts equal to itself.
+    # A whole-second value may have been written either way.
+    naive = value.astimezone(timezone.utc).replace(tzinfo=None)
+    forms = [naive.isoformat(sep=" ", timespec="microseconds")]
+    if not naive.microsecond:
+        forms.insert(0, naive.isoformat(sep=" ", timespec="seconds"))
+    return [literal(form, String) for form in forms]
+
+
+def keyset_before(
+    session: Session,
+    created_at: InstrumentedAttribute[Any],
+    row_id: InstrumentedAttribute[Any],
+    cursor: PageCursor,
+) -> ColumnElement[bool]:
+    """Filter for rows after ``cursor`` in ``(created_at, id)`` DESC order."""
+
+    params = _timestamp_params(session, cursor.created_at)
+    if len(params) == 1:
+        return tuple_(created_at, row_id) < tuple_(params[0], cursor.id)
+    return or_(
+        created_at < params[0],
+        and_(created_at.in_(params), row_id < cursor.id),
+    )
+
+
+__all__ = ["PageCursor", "as_utc", "keyset_before", "row_sort_key"]
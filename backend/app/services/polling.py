@@ -0,0 +1,112 @@
+"""Adaptive agent poll interval hints."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.lazy import lazy
+
+
+@dataclass(slots=True)
+class _DeviceActivity:
+    last_dispatch: float
+    idle_polls: int = 0
+
+
+class PollIntervalAdvisor:
+    """Computes the ``pollInterval`` hint returned to each agent.
+
+    A device that was just dispatched to (or may still have queued work)
+    polls at ``minimum``. Once it has been idle for ``busy_window`` seconds
+    every further empty poll multiplies the interval by ``backoff`` up to
+    ``maximum``. Independently, when the smoothed database time of a poll
+    rises above ``latency_target`` all hints are stretched proportionally
+    (at most ``max_latency_factor`` times) to shed load.
+
+    State is per process; with several workers each one backs off on the
+    polls it serves.
+    """
+
+    def __init__(
+        self,
+        *,
+        minimum: float,
+        maximum: float,
+        busy_window: float,
+        backoff: float,
+        latency_target: float,
+        max_latency_factor: float = 4.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.busy_window = busy_window
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.max_latency_factor = max_latency_factor
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._devices: dict[int, _DeviceActivity] = {}
+        self._latency: float | None = None
+
+    def observe_poll(self, device_pk: int, *, dispatched: int, saturated: bool) -> None:
+        """Record the outcome of a poll.
+
+        ``saturated`` means the poll returned as many tasks as the agent
+        accepts, so more may still be queued.
+        """
+
+        now = self._clock()
+        with self._lock:
+            activity = self._devices.get(device_pk)
+            if dispatched or saturated or activity is None:
+                self._devices[device_pk] = _DeviceActivity(
+                    last_dispatch=now if dispatched else now - self.busy_window
+                )
+                return
+            activity.idle_polls += 1
+
+    def observe_db_latency(self, seconds: float) -> None:
+        """Feed the database time of one poll into the smoothed estimate."""
+
+        with self._lock:
+            if self._latency is None:
+                self._latency = seconds
+            else:
+                self._latency += 0.1 * (seconds - self._latency)
+
+    def latency_factor(self) -> float:
+        if not self._latency or self.latency_target <= 0:
+            return 1.0
+        return min(self.max_latency_factor, max(1.0, self._latency / self.latency_target))
+
+    def interval_for(self, device_pk: int) -> float:
+        """Return the suggested seconds until the device's next poll."""
+
+        now = self._clock()
+        with self._lock:
+            activity = self._devices.get(device_pk)
+            if activity is None or now - activity.last_dispatch < self.busy_window:
+                interval = self.minimum
+            else:
+                interval = min(
+                    self.maximum, self.minimum * self.backoff ** activity.idle_polls
+                )
+        return round(interval * self.latency_factor(), 1)
+
+
+poll_advisor: PollIntervalAdvisor = lazy(
+    lambda: PollIntervalAdvisor(
+        minimum=settings.poll_interval_min,
+        maximum=settings.poll_interval_max,
+        busy_window=settings.poll_busy_window_seconds,
+        backoff=settings.poll_backoff_factor,
+        latency_target=settings.poll_latency_target_ms / 1000,
+    )
+)
+
+__all__ = ["PollIntervalAdvisor", "poll_advisor"]
@@ -0,0 +1,110 @@
+"""Per-user change counter (``users.revision``) behind admin list ETags."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.models import Device, User
+from app.services.heartbeat import heartbeat_buffer
+from app.services.pagination import as_utc
+
+_CHANGED_USERS_KEY = "changed_user_ids"
+
+
+def mark_users_changed(session: Session, user_ids: Iterable[int]) -> None:
+    """Bump the revision of ``user_ids`` when the session commits.
+
+    Call this from every write that changes what the admin device or task
+    lists return. The bump is one UPDATE issued right before the commit, so
+    the users rows stay locked only for the end of the transaction, and a
+    rolled-back transaction bumps nothing.
+    """
+
+    session.info.setdefault(_CHANGED_USERS_KEY, set()).update(user_ids)
+
+
+def read_version(session: Session, user_key: str | None) -> str | None:
+    """Return an opaque version of the lists of ``user_key`` (all users if None).
+
+    This is the change counter alone; heartbeats do not move it (see
+    :func:`read_presence_version`). None if the user does not exist. Costs
+    one query and loads no ORM objects.
+    """
+
+    if user_key is None:
+        users, revision = session.execute(
+            select(func.count(User.id), func.coalesce(func.sum(User.revision), 0))
+        ).one()
+        return f"all-{users}-{revision}"
+    row = session.execute(
+        select(User.id, User.revision).where(User.user_key == user_key)
+    ).first()
+    if row is None:
+        return None
+    user_id, revision = row
+    return f"{user_id}-{revision}"
+
+
+def read_presence_version(session: Session, user_key: str | None) -> str | None:
+    """Like :func:`read_version`, but also moved by heartbeats.
+
+    Heartbeats change the device list without bumping the counter, so the
+    newest one is folded in: persisted or still in this worker's heartbeat
+    buffer, whichever is later. A buffered heartbeat therefore gives the
+    same version before and after it is flushed.
+    """
+
+    if user_key is None:
+        users, revision, last_seen = session.execute(
+            select(
+                func.count(User.id),
+                func.coalesce(func.sum(User.revision), 0),
+                select(func.max(Device.last_seen_at)).scalar_subquery(),
+            )
+        ).one()
+        seen_at = _newest(last_seen, heartbeat_buffer.newest_seen_at())
+        return f"all-{users}-{revision}-{seen_at}"
+    rows = session.execute(
+        select(User.id, User.revision, Device.id, Device.last_seen_at)
+        .outerjoin(Device, Device.user_id == User.id)
+        .where(User.user_key == user_key)
+    ).all()
+    if not rows:
+        return None
+    user_id, revision = rows[0][:2]
+    device_pks = [row[2] for row in rows if row[2] is not None]
+    seen_at = _newest(
+        *(row[3] for row in rows), heartbeat_buffer.newest_seen_at(device_pks)
+    )
+    return f"{user_id}-{revision}-{seen_at}"
+
+
+def _newest(*values: datetime | None) -> str:
+    newest = max((as_utc(value) for value in values if value), default=None)
+    return newest.isoformat() if newest else ""
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_user_revisions(session: Session) -> None:
+    user_ids = session.info.pop(_CHANGED_USERS_KEY, None)
+    if user_ids:
+        # Sorted ids give concurrent committers the same lock order.
+        session.execute(
+            update(User)
+            .where(User.id.in_(sorted(user_ids)))
+            .values(revision=User.revision + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_user_revisions(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_USERS_KEY, None)
+
+
+__all__ = ["mark_users_changed", "read_presence_version", "read_version"]
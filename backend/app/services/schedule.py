@@ -0,0 +1,445 @@
+"""Recurring schedules and the in-process scheduler that materializes them."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Iterable, Sequence
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Row, case, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import lazy
+from app.db.session import SessionLocal, run_after_commit
+from app.models import Schedule
+from app.services.identity import DeviceRef
+from app.services.pagination import as_utc
+from app.services.task import TaskService, TaskSpec
+
+logger = logging.getLogger(__name__)
+
+
+def next_run_after(
+    anchor_at: datetime, interval_seconds: int, now: datetime
+) -> datetime:
+    """First run ``anchor_at + k * interval_seconds`` strictly after ``now``.
+
+    Before the anchor the anchor itself is the first run.
+    """
+
+    anchor_at = as_utc(anchor_at)
+    if now < anchor_at:
+        return anchor_at
+    runs = (now - anchor_at).total_seconds() // interval_seconds + 1
+    return anchor_at + timedelta(seconds=runs * interval_seconds)
+
+
+class ScheduleService:
+    """Persistence of recurring schedules and their materialization into tasks."""
+
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def create_schedule(
+        self,
+        *,
+        device: DeviceRef,
+        task_type: str,
+        payload: dict[str, Any],
+        priority: int = 0,
+        interval_seconds: int,
+        start_at: datetime | None = None,
+        name: str | None = None,
+    ) -> Schedule:
+        """Create a schedule whose first run is ``start_at`` (default: now).
+
+        A ``start_at`` in the past only fixes the phase: the first run is the
+        next slot after now, earlier slots are not caught up.
+        """
+
+        now = datetime.now(timezone.utc)
+        anchor_at = as_utc(start_at) if start_at is not None else now
+        schedule = Schedule(
+            user_id=device.user_id,
+            user_key=device.user_key,
+            device_id=device.id,
+            device_identifier=device.device_id,
+            name=name,
+            type=task_type,
+            payload=payload,
+            priority=priority,
+            interval_seconds=interval_seconds,
+            anchor_at=anchor_at,
+            next_run_at=(
+                anchor_at
+                if anchor_at >= now
+                else next_run_after(anchor_at, interval_seconds, now)
+            ),
+            enabled=True,
+        )
+        self._session.add(schedule)
+        self._session.flush()
+        self._reschedule_on_commit(schedule.id, schedule.next_run_at)
+        return schedule
+
+    def list_schedules(self, user_key: str) -> list[Schedule]:
+        """A user's schedules, soonest due first."""
+
+        stmt = (
+            select(Schedule)
+            .where(Schedule.user_key == user_key)
+            .order_by(Schedule.next_run_at, Schedule.id)
+        )
+        return list(self._session.scalars(stmt))
+
+    def get_schedule(self, *, user_key: str, schedule_id: int) -> Schedule | None:
+        stmt = (
+            select(Schedule)
+            .where(Schedule.id == schedule_id)
+            .where(Schedule.user_key == user_key)
+        )
+        return self._session.scalar(stmt)
+
+    def set_enabled(self, schedule: Schedule, enabled: bool) -> Schedule:
+        """Pause or resume a schedule; resuming skips the runs missed meanwhile."""
+
+        if enabled and not schedule.enabled:
+            schedule.next_run_at = next_run_after(
+                schedule.anchor_at,
+                schedule.interval_seconds,
+                datetime.now(timezone.utc),
+            )
+        schedule.enabled = enabled
+        self._session.flush()
+        self._reschedule_on_commit(
+            schedule.id, schedule.next_run_at if enabled else None
+        )
+        return schedule
+
+    def delete_schedule(self, schedule: Schedule) -> None:
+        self._session.delete(schedule)
+        self._session.flush()
+        self._reschedule_on_commit(schedule.id, None)
+
+    def due_times(self) -> list[tuple[int, datetime]]:
+        """``(id, next_run_at)`` of every enabled schedule."""
+
+        stmt = select(Schedule.id, Schedule.next_run_at).where(
+            Schedule.enabled.is_(True)
+        )
+        rows = self._session.execute(stmt)
+        return [(row.id, as_utc(row.next_run_at)) for row in rows]
+
+    def materialize(
+        self, schedule_ids: Sequence[int], *, now: datetime
+    ) -> dict[int, datetime | None]:
+        """Create the tasks of those ``schedule_ids`` that are due at ``now``.
+
+        Every due schedule is advanced to its next run after ``now`` with an
+        UPDATE that only matches rows whose ``next_run_at`` is still the
+        value read here (a single statement where the database supports
+        UPDATE ... RETURNING). Of several workers materializing the same run,
+        only the one whose compare-and-set matched creates tasks, with a
+        single executemany INSERT. Runs missed while no scheduler was running are
+        coalesced into one task. The caller commits.
+
+        Returns the current due time of each id, None for schedules that are
+        gone or disabled, so the caller can re-arm its timers.
+        """
+
+        rows = self._session.execute(
+            select(
+                Schedule.id,
+                Schedule.user_id,
+                Schedule.user_key,
+                Schedule.device_id,
+                Schedule.device_identifier,
+                Schedule.type,
+                Schedule.payload,
+                Schedule.priority,
+                Schedule.interval_seconds,
+                Schedule.anchor_at,
+                Schedule.next_run_at,
+            )
+            .where(Schedule.id.in_(schedule_ids))
+            .where(Schedule.enabled.is_(True))
+            .where(Schedule.next_run_at <= now)
+        ).all()
+
+        next_runs: dict[int, datetime | None] = dict.fromkeys(schedule_ids)
+        if rows:
+            advanced = {
+                row.id: next_run_after(row.anchor_at, row.interval_seconds, now)
+                for row in rows
+            }
+            claimed = self._advance(rows, advanced, now=now)
+            specs = []
+            for row in rows:
+                if row.id not in claimed:
+                    continue
+                interval = timedelta(seconds=row.interval_seconds)
+                runs = (now - as_utc(row.next_run_at)) // interval + 1
+                if runs > 1:
+                    logger.info(
+                        "Schedule %d was due %d times; creating one task", row.id, runs
+                    )
+                specs.append(
+                    TaskSpec(
+                        device=DeviceRef(
+                            id=row.device_id,
+                            user_id=row.user_id,
+                            user_key=row.user_key,
+                            device_id=row.device_identifier,
+                        ),
+                        task_type=row.type,
+                        payload=row.payload,
+                        priority=row.priority,
+                    )
+                )
+            TaskService(self._session).enqueue_many(specs)
+            for schedule_id in claimed:
+                next_runs[schedule_id] = advanced[schedule_id]
+
+        lost = [schedule_id for schedule_id, due in next_runs.items() if due is None]
+        if lost:
+            # Not due, claimed by another worker, disabled or deleted: re-arm
+            # with whatever the database holds now.
+            next_runs.update(
+                (row.id, as_utc(row.next_run_at))
+                for row in self._session.execute(
+                    select(Schedule.id, Schedule.next_run_at)
+                    .where(Schedule.id.in_(lost))
+                    .where(Schedule.enabled.is_(True))
+                )
+            )
+        return next_runs
+
+    def _advance(
+        self, rows: Sequence[Row], advanced: dict[int, datetime], *, now: datetime
+    ) -> set[int]:
+        """Compare-and-set ``next_run_at`` of ``rows``; return the ids that won.
+
+        Without UPDATE ... RETURNING each row is advanced on its own and a
+        rowcount of one tells whether its compare-and-set matched.
+        """
+
+        expected = {row.id: row.next_run_at for row in rows}
+        if self._session.get_bind().dialect.update_returning:
+            return set(
+                self._session.scalars(
+                    update(Schedule)
+                    .where(Schedule.id.in_(advanced))
+                    .where(Schedule.next_run_at == case(expected, value=Schedule.id))
+                    .values(
+                        next_run_at=case(advanced, value=Schedule.id), last_run_at=now
+                    )
+                    .returning(Schedule.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+        claimed: set[int] = set()
+        for schedule_id, next_run_at in advanced.items():
+            result = self._session.execute(
+                update(Schedule)
+                .where(Schedule.id == schedule_id)
+                .where(Schedule.next_run_at == expected[schedule_id])
+                .values(next_run_at=next_run_at, last_run_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                claimed.add(schedule_id)
+        return claimed
+
+    def _reschedule_on_commit(
+        self, schedule_id: int, next_run_at: datetime | None
+    ) -> None:
+        run_after_commit(
+            self._session,
+            partial(
+                recurring_scheduler.schedule,
+                schedule_id,
+                as_utc(next_run_at) if next_run_at is not None else None,
+            ),
+        )
+
+
+def load_due_times() -> list[tuple[int, datetime]]:
+    """Read every enabled schedule's due time with a fresh session."""
+
+    with SessionLocal() as session:
+        return ScheduleService(session).due_times()
+
+
+def materialize_schedules(
+    schedule_ids: Sequence[int], now: datetime
+) -> dict[int, datetime | None]:
+    """Run :meth:`ScheduleService.materialize` in its own transaction."""
+
+    with SessionLocal() as session:
+        next_runs = ScheduleService(session).materialize(schedule_ids, now=now)
+        session.commit()
+        return next_runs
+
+
+class RecurringScheduler:
+    """Min-heap of schedule due times; only its head is ever inspected.
+
+    Every worker keeps the due time of each enabled schedule in a heap and
+    sleeps until the earliest one, then hands the due ids to
+    :func:`materialize_schedules` in the threadpool. Its compare-and-set on
+    ``next_run_at`` makes exactly one worker create the tasks of a run, so
+    running a scheduler per worker is safe. Changes made by this process
+    are pushed in through :meth:`schedule`; those of other workers arrive
+    with the reload every ``refresh_interval`` seconds. Superseded heap
+    entries are skipped lazily instead of being removed.
+    """
+
+    def __init__(self, *, batch_size: int, refresh_interval: float) -> None:
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._heap: list[tuple[datetime, int]] = []
+        self._due: dict[int, datetime] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._due)
+
+    def schedule(self, schedule_id: int, next_run_at: datetime | None) -> None:
+        """Set a schedule's due time, or forget it with None; thread-safe."""
+
+        with self._lock:
+            self._set(schedule_id, next_run_at)
+        self._wake()
+
+    def load(self, entries: Iterable[tuple[int, datetime]]) -> None:
+        """Replace every due time, e.g. with :func:`load_due_times`."""
+
+        with self._lock:
+            self._due = dict(entries)
+            self._heap = [(due, schedule_id) for schedule_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+        self._wake()
+
+    def pop_due(self, now: datetime, limit: int) -> list[int]:
+        """Remove and return up to ``limit`` ids due at ``now``, earliest first."""
+
+        due_ids: list[int] = []
+        with self._lock:
+            while self._heap and len(due_ids) < limit:
+                due, schedule_id = self._heap[0]
+                if self._due.get(schedule_id) != due:
+                    heapq.heappop(self._heap)
+                    continue
+                if due > now:
+                    break
+                heapq.heappop(self._heap)
+                del self._due[schedule_id]
+                due_ids.append(schedule_id)
+        return due_ids
+
+    def next_due(self) -> datetime | None:
+        with self._lock:
+            while self._heap:
+                due, schedule_id = self._heap[0]
+                if self._due.get(schedule_id) == due:
+                    return due
+                heapq.heappop(self._heap)
+        return None
+
+    def _set(self, schedule_id: int, next_run_at: datetime | None) -> None:
+        if next_run_at is None:
+            self._due.pop(schedule_id, None)
+            return
+        self._due[schedule_id] = next_run_at
+        heapq.heappush(self._heap, (next_run_at, schedule_id))
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            logger.debug("Scheduler loop is closed; not waking it")
+
+    async def run(self) -> None:
+        """Materialize due schedules until cancelled."""
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        refresh_at = 0.0
+        while True:
+            if time.monotonic() >= refresh_at:
+                try:
+                    self.load(await run_in_threadpool(load_due_times))
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Loading schedule due times failed")
+                refresh_at = time.monotonic() + self.refresh_interval
+
+            now = datetime.now(timezone.utc)
+            due_ids = self.pop_due(now, self.batch_size)
+            if due_ids:
+                try:
+                    next_runs = await run_in_threadpool(
+                        materialize_schedules, due_ids, now
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    # The rows are still due; the next reload re-arms them.
+                    logger.exception("Materializing %d schedules failed", len(due_ids))
+                else:
+                    with self._lock:
+                        for schedule_id, next_run_at in next_runs.items():
+                            self._set(schedule_id, next_run_at)
+                continue
+
+            self._wakeup.clear()
+            timeout = refresh_at - time.monotonic()
+            next_due = self.next_due()
+            if next_due is not None:
+                timeout = min(timeout, (next_due - now).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0.0))
+            except TimeoutError:
+                pass
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator[None]:
+        """Run the scheduler in the background for the duration of the context."""
+
+        task = asyncio.create_task(self.run(), name="job:recurring-scheduler")
+        try:
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            self._loop = self._wakeup = None
+
+
+recurring_scheduler: RecurringScheduler = lazy(
+    lambda: RecurringScheduler(
+        batch_size=settings.schedule_batch_size,
+        refresh_interval=settings.schedule_refresh_seconds,
+    )
+)
+
+
+__all__ = [
+    "RecurringScheduler",
+    "ScheduleService",
+    "load_due_times",
+    "materialize_schedules",
+    "next_run_after",
+    "recurring_scheduler",
+]
@@ -2,13 +2,65 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any, Sequence
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from functools import partial
+from typing import Any, Mapping, Sequence
+from uuid import uuid4
 
-from sqlalchemy import Select, select
+from sqlalchemy import ColumnElement, Row, Select, delete, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.models import Device, Task, TaskLog, TaskStatus, User
+from app.core.config import settings
+from app.core.metrics import observe_dispatch_waits, observe_run_durations
+from app.db.session import insert_if_absent, run_after_commit
+from app.models import FINISHED_STATUSES, Device, Task, TaskLog, TaskStatus
+from app.services.blob import BlobStore, encode_json
+from app.services.counters import count_status_changes
+from app.services.feed import RESYNC, publish_on_commit, task_event
+from app.services.identity import DeviceRef
+from app.services.notifier import device_key, task_log_key, task_notifier
+from app.services.pagination import PageCursor, as_utc, keyset_before
+from app.services.revision import mark_users_changed
+
+logger = logging.getLogger(__name__)
+
+
+def _elapsed(start: datetime, end: datetime) -> float:
+    return (as_utc(end) - as_utc(start)).total_seconds()
+
+
+@dataclass(frozen=True, slots=True)
+class StatusReport:
+    """One agent report, as applied by :meth:`TaskService.apply_reports`."""
+
+    task_uuid: str
+    status: TaskStatus
+    log: str | None = None
+    result: dict[str, Any] | None = None
+    stats: dict[str, Any] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class TaskSpec:
+    """One task to create, as inserted by :meth:`TaskService.enqueue_many`."""
+
+    device: DeviceRef
+    task_type: str
+    payload: dict[str, Any]
+    priority: int = 0
+
+
+class ReportOutcome(str, Enum):
+    """Per-report result of :meth:`TaskService.apply_reports`."""
+
+    APPLIED = "applied"
+    NOT_FOUND = "not_found"
+    NOT_OWNED = "not_owned"
+    CONFLICT = "conflict"
 
 
 class TaskService:
@@ -20,17 +72,21 @@ class TaskService:
     def enqueue_task(
         self,
         *,
-        user: User,
-        device: Device,
+        device: Device | DeviceRef,
         task_type: str,
         payload: dict[str, Any],
         priority: int = 0,
     ) -> Task:
-        """Create a new task for a given device."""
+        """Create a new task for a given device.
+
+        ``device`` may be a cached :class:`DeviceRef`; no ORM rows are loaded.
+        Long-polling agents waiting on the device are woken once the caller
+        commits the transaction.
+        """
 
         task = Task(
-            user_id=user.id,
-            user_key=user.user_key,
+            user_id=device.user_id,
+            user_key=device.user_key,
             device_id=device.id,
             device_identifier=device.device_id,
             type=task_type,
@@ -40,8 +96,77 @@ class TaskService:
         )
         self._session.add(task)
         self._session.flush()
+        mark_users_changed(self._session, [device.user_id])
+        count_status_changes(self._session, [(device.id, None, TaskStatus.PENDING)])
+        self._publish(task)
+        run_after_commit(
+            self._session,
+            partial(task_notifier.notify, device_key(device.user_key, device.device_id)),
+        )
         return task
 
+    def enqueue_bulk(
+        self,
+        *,
+        devices: Sequence[DeviceRef],
+        task_type: str,
+        payload: dict[str, Any],
+        priority: int = 0,
+    ) -> list[str]:
+        """Create the same task on every device in ``devices``; return the UUIDs."""
+
+        return self.enqueue_many(
+            [
+                TaskSpec(
+                    device=device,
+                    task_type=task_type,
+                    payload=payload,
+                    priority=priority,
+                )
+                for device in devices
+            ]
+        )
+
+    def enqueue_many(self, specs: Sequence[TaskSpec]) -> list[str]:
+        """Create one Pending task per spec and return their UUIDs in order.
+
+        All rows go out as a single executemany INSERT with UUIDs generated
+        here, so nothing is read back and no ORM objects are built. Instead
+        of one change feed event per task, each affected user gets a single
+        ``resync``. The caller commits.
+        """
+
+        if not specs:
+            return []
+        task_uuids = [uuid4().hex for _ in specs]
+        self._session.execute(
+            insert(Task),
+            [
+                {
+                    "task_uuid": task_uuid,
+                    "user_id": spec.device.user_id,
+                    "user_key": spec.device.user_key,
+                    "device_id": spec.device.id,
+                    "device_identifier": spec.device.device_id,
+                    "type": spec.task_type,
+                    "payload": spec.payload,
+                    "priority": spec.priority,
+                    "status": TaskStatus.PENDING,
+                }
+                for task_uuid, spec in zip(task_uuids, specs, strict=True)
+            ],
+        )
+        devices = [spec.device for spec in specs]
+        mark_users_changed(self._session, {device.user_id for device in devices})
+        count_status_changes(
+            self._session, [(device.id, None, TaskStatus.PENDING) for device in devices]
+        )
+        for user_key in {device.user_key for device in devices}:
+            publish_on_commit(self._session, user_key, RESYNC)
+        keys = [device_key(device.user_key, device.device_id) for device in devices]
+        run_after_commit(self._session, partial(task_notifier.notify_many, keys))
+        return task_uuids
+
     def get_by_uuid(self, task_uuid: str) -> Task | None:
         """Fetch a task by its external UUID."""
 
@@ -51,24 +176,127 @@ class TaskService:
     def fetch_next_pending_task(
         self, *, user_key: str, device_identifier: str
     ) -> Task | None:
-        """Retrieve the next pending task for the device."""
+        """Claim the next pending task for the device and mark it running."""
 
-        stmt: Select[Task] = (
+        tasks = self.claim_pending_tasks(
+            user_key=user_key, device_identifier=device_identifier, limit=1
+        )
+        return tasks[0] if tasks else None
+
+    def claim_pending_tasks(
+        self,
+        *,
+        user_key: str,
+        device_identifier: str,
+        limit: int = 1,
+        lease_seconds: float | None = None,
+    ) -> list[Task]:
+        """Atomically transition up to ``limit`` pending tasks to running.
+
+        With ``lease_seconds`` each claimed task carries a lease deadline; a
+        task that receives no report before it passes is returned to Pending
+        by :meth:`release_expired_leases`.
+
+        On backends with ``UPDATE ... RETURNING`` (SQLite >= 3.35, PostgreSQL)
+        the pick and the transition happen in a single statement; the picking
+        subquery takes ``FOR UPDATE SKIP LOCKED`` where the dialect supports
+        it, so concurrent pollers never receive the same task. Other backends
+        fall back to a guarded per-row UPDATE that only succeeds while the
+        row is still pending.
+        """
+
+        queue = self._pending_queue(
+            user_key=user_key, device_identifier=device_identifier
+        )
+        now = datetime.now(timezone.utc)
+        claim = {
+            "status": TaskStatus.RUNNING,
+            "started_at": now,
+            "lease_expires_at": (
+                now + timedelta(seconds=lease_seconds) if lease_seconds else None
+            ),
+        }
+
+        if self._session.get_bind().dialect.update_returning:
+            candidates = queue.limit(limit).with_for_update(skip_locked=True)
+            stmt = (
+                update(Task)
+                .where(Task.id.in_(candidates))
+                .where(Task.status == TaskStatus.PENDING)
+                .values(**claim)
+                .returning(Task)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            claimed = list(self._session.scalars(stmt))
+            claimed.sort(key=lambda task: (-task.priority, task.created_at, task.id))
+            self._claimed(claimed)
+            return claimed
+
+        claimed_ids: list[int] = []
+        while len(claimed_ids) < limit:
+            candidate_ids = list(
+                self._session.scalars(
+                    queue.limit(limit - len(claimed_ids)).with_for_update(
+                        skip_locked=True
+                    )
+                )
+            )
+            if not candidate_ids:
+                break
+            for task_id in candidate_ids:
+                result = self._session.execute(
+                    update(Task)
+                    .where(Task.id == task_id)
+                    .where(Task.status == TaskStatus.PENDING)
+                    .values(**claim)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    claimed_ids.append(task_id)
+        if not claimed_ids:
+            return []
+        stmt = (
             select(Task)
+            .where(Task.id.in_(claimed_ids))
+            .order_by(Task.priority.desc(), Task.created_at.asc(), Task.id.asc())
+            .execution_options(populate_existing=True)
+        )
+        claimed = list(self._session.scalars(stmt))
+        self._claimed(claimed)
+        return claimed
+
+    def _claimed(self, tasks: Sequence[Task]) -> None:
+        mark_users_changed(self._session, {task.user_id for task in tasks})
+        claims = (TaskStatus.PENDING, TaskStatus.RUNNING)
+        count_status_changes(
+            self._session, [(task.device_id, *claims) for task in tasks]
+        )
+        for task in tasks:
+            self._publish(task)
+        waits = [
+            (task.type, _elapsed(task.created_at, task.started_at))
+            for task in tasks
+            if task.created_at is not None and task.started_at is not None
+        ]
+        if waits:
+            run_after_commit(self._session, partial(observe_dispatch_waits, waits))
+
+    def _pending_queue(self, *, user_key: str, device_identifier: str) -> Select:
+        return (
+            select(Task.id)
             .where(Task.user_key == user_key)
             .where(Task.device_identifier == device_identifier)
             .where(Task.status == TaskStatus.PENDING)
-            .order_by(Task.priority.desc(), Task.created_at.asc())
-            .limit(1)
+            .order_by(Task.priority.desc(), Task.created_at.asc(), Task.id.asc())
         )
-        task = self._session.scalar(stmt)
-        if not task:
-            return None
 
-        task.status = TaskStatus.RUNNING
-        task.started_at = datetime.now(timezone.utc)
-        self._session.flush()
-        return task
+    def has_pending_tasks(self, *, user_key: str, device_identifier: str) -> bool:
+        """Whether the device has queued work, with a read-only index probe."""
+
+        queue = self._pending_queue(
+            user_key=user_key, device_identifier=device_identifier
+        )
+        return self._session.scalar(queue.limit(1)) is not None
 
     def fetch_pending_batch(
         self, *, user_key: str, device_identifier: str, limit: int = 1
@@ -80,19 +308,179 @@ class TaskService:
             .where(Task.user_key == user_key)
             .where(Task.device_identifier == device_identifier)
             .where(Task.status == TaskStatus.PENDING)
-            .order_by(Task.priority.desc(), Task.created_at.asc())
+            .order_by(Task.priority.desc(), Task.created_at.asc(), Task.id.asc())
             .limit(limit)
         )
         return list(self._session.scalars(stmt))
 
     def mark_running(self, task: Task) -> Task:
-        """Ensure a task is marked as running."""
+        """Ensure a task is marked as running.
+
+        A leased task is considered started now: its lease is released and
+        ``started_at`` moves to the actual start of execution.
+        """
 
+        now = datetime.now(timezone.utc)
+        if task.lease_expires_at is not None:
+            task.lease_expires_at = None
+            task.started_at = now
+        previous = task.status
         task.status = TaskStatus.RUNNING
-        task.started_at = task.started_at or datetime.now(timezone.utc)
+        task.started_at = task.started_at or now
         self._session.flush()
+        mark_users_changed(self._session, [task.user_id])
+        count_status_changes(
+            self._session, [(task.device_id, previous, TaskStatus.RUNNING)]
+        )
+        self._publish(task)
         return task
 
+    def release_expired_leases(self, now: datetime | None = None) -> int:
+        """Return leased tasks that were never reported on to Pending."""
+
+        now = now or datetime.now(timezone.utc)
+        return self._bulk_update(
+            TaskStatus.RUNNING,
+            [Task.lease_expires_at < now],
+            {"status": TaskStatus.PENDING, "started_at": None, "lease_expires_at": None},
+        )
+
+    def renew_leases(
+        self,
+        *,
+        device: Device | DeviceRef,
+        task_uuids: Sequence[str],
+        lease_seconds: float,
+        now: datetime | None = None,
+    ) -> list[str]:
+        """Extend the leases of batch-claimed tasks still waiting to start.
+
+        An agent works through a batch one task at a time, so the tail of a
+        long batch would outlive its lease; the agent renews what it has not
+        started yet. Only leased Running tasks of ``device`` are renewed; the
+        returned uuids are those still held, the others went back to Pending
+        (or were started or reported) and must not be run.
+        """
+
+        if not task_uuids:
+            return []
+        now = now or datetime.now(timezone.utc)
+        where = [
+            Task.device_id == device.id,
+            Task.task_uuid.in_(task_uuids),
+            Task.status == TaskStatus.RUNNING,
+            Task.lease_expires_at.is_not(None),
+        ]
+        stmt = (
+            update(Task)
+            .where(*where)
+            .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        if self._session.get_bind().dialect.update_returning:
+            return list(self._session.scalars(stmt.returning(Task.task_uuid)))
+        renewed = list(self._session.scalars(select(Task.task_uuid).where(*where)))
+        self._session.execute(stmt)
+        return renewed
+
+    def reap_stuck_tasks(
+        self,
+        *,
+        default_timeout: float,
+        timeouts: Mapping[str, float] | None = None,
+        max_retries: int = 0,
+        now: datetime | None = None,
+    ) -> tuple[int, int]:
+        """Requeue or fail tasks that have been Running for too long.
+
+        A task counts as stuck once ``started_at`` is older than its type's
+        timeout (``timeouts`` overrides ``default_timeout`` per type). Stuck
+        tasks with fewer than ``max_retries`` retries go back to Pending with
+        ``retry_count`` incremented; the rest are marked Failed. Leased tasks
+        are left to :meth:`release_expired_leases`.
+
+        Every transition is a set-based UPDATE guarded by the Running status
+        and the start cut-off, so concurrent reapers in several workers can
+        only move each row once. Returns ``(requeued, failed)``.
+        """
+
+        now = now or datetime.now(timezone.utc)
+        timeouts = dict(timeouts or {})
+        groups = [
+            (Task.type == task_type, timeout) for task_type, timeout in timeouts.items()
+        ]
+        groups.append(
+            (Task.type.not_in(timeouts) if timeouts else None, default_timeout)
+        )
+
+        requeued = failed = 0
+        for type_clause, timeout in groups:
+            stuck = [
+                Task.started_at < now - timedelta(seconds=timeout),
+                Task.lease_expires_at.is_(None),
+            ]
+            if type_clause is not None:
+                stuck.append(type_clause)
+            requeued += self._bulk_update(
+                TaskStatus.RUNNING,
+                [*stuck, Task.retry_count < max_retries],
+                {
+                    "status": TaskStatus.PENDING,
+                    "started_at": None,
+                    "retry_count": Task.retry_count + 1,
+                },
+            )
+            failed += self._bulk_update(
+                TaskStatus.RUNNING,
+                [*stuck, Task.retry_count >= max_retries],
+                {
+                    "status": TaskStatus.FAILED,
+                    "finished_at": now,
+                    "error_message": (
+                        f"Task timed out after {timeout:g}s without a report."
+                    ),
+                },
+            )
+        return requeued, failed
+
+    def _bulk_update(
+        self,
+        from_status: TaskStatus,
+        where: Sequence[ColumnElement[bool]],
+        values: dict[str, Any],
+    ) -> int:
+        """Run a guarded set-based UPDATE of ``from_status`` tasks; return the count.
+
+        The owners of the changed rows get their list revision bumped and
+        their devices' counters moved to ``values["status"]``; with
+        ``RETURNING`` the rows come from the UPDATE itself, otherwise from a
+        read of the same rows just before it. Tasks put back to Pending wake
+        their devices' long polls once the caller commits, as enqueues do.
+        """
+
+        where = [Task.status == from_status, *where]
+        stmt = (
+            update(Task)
+            .where(*where)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        columns = (Task.user_id, Task.device_id, Task.user_key, Task.device_identifier)
+        if self._session.get_bind().dialect.update_returning:
+            rows = self._session.execute(stmt.returning(*columns)).all()
+        else:
+            rows = self._session.execute(select(*columns).where(*where)).all()
+            self._session.execute(stmt)
+        mark_users_changed(self._session, {row.user_id for row in rows})
+        count_status_changes(
+            self._session,
+            [(row.device_id, from_status, values["status"]) for row in rows],
+        )
+        if rows and values["status"] == TaskStatus.PENDING:
+            keys = {device_key(row.user_key, row.device_identifier) for row in rows}
+            run_after_commit(self._session, partial(task_notifier.notify_many, keys))
+        return len(rows)
+
     def update_status(
         self,
         task: Task,
@@ -103,21 +491,195 @@ class TaskService:
         stats: dict[str, Any] | None = None,
         error_message: str | None = None,
     ) -> Task:
-        """Update task status after execution."""
+        """Update task status after execution.
 
+        The log, result and stats are stored compressed in ``blobs``; the
+        task row keeps their digests. Live log tails of a finished task are
+        woken once the caller commits.
+        """
+
+        previous = task.status
         task.status = status
         task.finished_at = datetime.now(timezone.utc)
-        if log:
-            task.log = log
+        task.lease_expires_at = None
+        if status in FINISHED_STATUSES:
+            run_after_commit(
+                self._session,
+                partial(task_notifier.notify, task_log_key(task.task_uuid)),
+            )
+            if task.started_at is not None:
+                elapsed = _elapsed(task.started_at, task.finished_at)
+                run = (task.type, status.value, elapsed)
+                run_after_commit(self._session, partial(observe_run_durations, [run]))
         if error_message:
             task.error_message = error_message
-        if result:
-            self.append_log(task, level="DEBUG", message=f"result: {result!r}")
-        if stats:
-            self.append_log(task, level="DEBUG", message=f"stats: {stats!r}")
+        payloads = {
+            column: data
+            for column, data in (
+                ("log_digest", log.encode() if log else None),
+                ("result_digest", encode_json(result) if result else None),
+                ("stats_digest", encode_json(stats) if stats else None),
+            )
+            if data is not None
+        }
+        if payloads:
+            digests = BlobStore(self._session).put_many(list(payloads.values()))
+            for column, digest in zip(payloads, digests, strict=True):
+                setattr(task, column, digest)
         self._session.flush()
+        mark_users_changed(self._session, [task.user_id])
+        count_status_changes(self._session, [(task.device_id, previous, status)])
+        self._publish(task)
         return task
 
+    def _publish(self, task: Task) -> None:
+        publish_on_commit(
+            self._session,
+            task.user_key,
+            task_event(
+                task_uuid=task.task_uuid,
+                device_identifier=task.device_identifier,
+                status=task.status,
+                started_at=task.started_at,
+                finished_at=task.finished_at,
+            ),
+        )
+
+    def apply_reports(
+        self, *, device: DeviceRef, reports: Sequence[StatusReport]
+    ) -> list[ReportOutcome]:
+        """Apply many agent reports from one device in bulk.
+
+        Equivalent to calling :meth:`mark_running` / :meth:`update_status` per
+        report, but all tasks are resolved with a single ``IN`` query,
+        ownership is checked in memory, and the compressed log/result blobs
+        and the status changes are written as two executemany statements.
+        Reports are applied in order, so ``Running`` followed by
+        ``Succeeded`` for the same task in one batch behaves like two
+        separate calls. The caller commits.
+        """
+
+        now = datetime.now(timezone.utc)
+        rows = self._session.execute(
+            select(
+                Task.id,
+                Task.task_uuid,
+                Task.user_key,
+                Task.device_identifier,
+                Task.type,
+                Task.status,
+                Task.started_at,
+                Task.lease_expires_at,
+            ).where(Task.task_uuid.in_({report.task_uuid for report in reports}))
+        )
+        tasks = {row.task_uuid: row._asdict() for row in rows}
+
+        changes: dict[int, dict[str, Any]] = {}
+        status_changes: list[tuple[int, TaskStatus, TaskStatus]] = []
+        blob_rows: list[tuple[int, str, bytes]] = []
+        runs: list[tuple[str, str, float]] = []
+        outcomes: list[ReportOutcome] = []
+        for report in reports:
+            task = tasks.get(report.task_uuid)
+            if task is None:
+                outcomes.append(ReportOutcome.NOT_FOUND)
+                continue
+            if (
+                task["user_key"] != device.user_key
+                or task["device_identifier"] != device.device_id
+            ):
+                outcomes.append(ReportOutcome.NOT_OWNED)
+                continue
+
+            if report.status == TaskStatus.RUNNING:
+                if task["status"] != TaskStatus.RUNNING:
+                    outcomes.append(ReportOutcome.CONFLICT)
+                    continue
+                values = {"status": TaskStatus.RUNNING, "lease_expires_at": None}
+                if task["lease_expires_at"] is not None or task["started_at"] is None:
+                    values["started_at"] = now
+            else:
+                values = {
+                    "status": report.status,
+                    "finished_at": now,
+                    "lease_expires_at": None,
+                }
+                if report.log:
+                    blob_rows.append((task["id"], "log_digest", report.log.encode()))
+                for column, data in (
+                    ("result_digest", report.result),
+                    ("stats_digest", report.stats),
+                ):
+                    if data:
+                        blob_rows.append((task["id"], column, encode_json(data)))
+            status_changes.append((device.id, task["status"], values["status"]))
+            task.update(values)
+            changes.setdefault(task["id"], {"id": task["id"]}).update(values)
+            publish_on_commit(
+                self._session,
+                device.user_key,
+                task_event(
+                    task_uuid=report.task_uuid,
+                    device_identifier=device.device_id,
+                    status=task["status"],
+                    started_at=task["started_at"],
+                    finished_at=task.get("finished_at"),
+                ),
+            )
+            if report.status in FINISHED_STATUSES:
+                run_after_commit(
+                    self._session,
+                    partial(task_notifier.notify, task_log_key(report.task_uuid)),
+                )
+                if task["started_at"] is not None:
+                    runs.append(
+                        (
+                            task["type"],
+                            report.status.value,
+                            _elapsed(task["started_at"], now),
+                        )
+                    )
+            outcomes.append(ReportOutcome.APPLIED)
+
+        if blob_rows:
+            digests = BlobStore(self._session).put_many(
+                [data for _, _, data in blob_rows]
+            )
+            for (task_id, column, _), digest in zip(blob_rows, digests, strict=True):
+                changes[task_id][column] = digest
+        if changes:
+            self._session.execute(update(Task), list(changes.values()))
+            mark_users_changed(self._session, [device.user_id])
+            count_status_changes(self._session, status_changes)
+        if runs:
+            run_after_commit(self._session, partial(observe_run_durations, runs))
+        return outcomes
+
+    def load_output(self, task: Task) -> dict[str, Any]:
+        """Decompress the final log, result and stats of ``task``."""
+
+        return self.load_outputs([task])[task.id]
+
+    def load_outputs(self, tasks: Sequence[Task]) -> dict[int, dict[str, Any]]:
+        """Decompress the outputs of many tasks with one blob query, by task id."""
+
+        data = BlobStore(self._session).get_many(
+            digest
+            for task in tasks
+            for digest in (task.log_digest, task.result_digest, task.stats_digest)
+        )
+        outputs: dict[int, dict[str, Any]] = {}
+        for task in tasks:
+            log = data.get(task.log_digest) if task.log_digest else None
+            result = data.get(task.result_digest) if task.result_digest else None
+            stats = data.get(task.stats_digest) if task.stats_digest else None
+            outputs[task.id] = {
+                "log": log.decode() if log is not None else None,
+                "result": json.loads(result) if result is not None else None,
+                "stats": json.loads(stats) if stats is not None else None,
+            }
+        return outputs
+
     def append_log(self, task: Task, *, level: str = "INFO", message: str) -> TaskLog:
         """Append a structured log entry to the task."""
 
@@ -126,16 +688,139 @@ class TaskService:
         self._session.flush()
         return entry
 
-    def list_recent_tasks(
-        self, *, device: Device, limit: int = 20
-    ) -> Sequence[Task]:
-        """List recent tasks assigned to a device."""
+    def append_log_chunk(
+        self, task: Task, *, seq: int, data: str, max_chunks: int
+    ) -> bool:
+        """Store output chunk ``seq`` of a running task; False if already stored.
+
+        Chunks are keyed by ``(task_id, seq)``, so an agent retrying a send
+        never duplicates output. Only the newest ``max_chunks`` sequence
+        numbers are kept: once ``seq`` passes the cap, older chunks are
+        evicted like a ring buffer, bounding storage for endless runs. Log
+        tails waiting on the task are woken after the caller commits.
+        """
+
+        inserted = insert_if_absent(
+            self._session,
+            TaskLog,
+            {"task_id": task.id, "level": "OUTPUT", "seq": seq, "message": data},
+        )
+        if not inserted:
+            return False
+        if seq >= max_chunks:
+            self._session.execute(
+                delete(TaskLog)
+                .where(TaskLog.task_id == task.id)
+                .where(TaskLog.seq <= seq - max_chunks)
+                .execution_options(synchronize_session=False)
+            )
+        run_after_commit(
+            self._session,
+            partial(task_notifier.notify, task_log_key(task.task_uuid)),
+        )
+        return True
+
+    def read_log_chunks(
+        self, task: Task, *, offset: int = 0, limit: int = 200
+    ) -> list[TaskLog]:
+        """Return streamed output chunks of ``task`` from sequence ``offset`` on.
+
+        Evicted chunks are simply skipped; compare the first returned
+        ``seq`` with ``offset`` to detect the gap.
+        """
 
         stmt = (
-            select(Task)
-            .where(Task.device_id == device.id)
-            .order_by(Task.created_at.desc())
+            select(TaskLog)
+            .where(TaskLog.task_id == task.id)
+            .where(TaskLog.seq >= offset)
+            .order_by(TaskLog.seq.asc())
             .limit(limit)
         )
         return list(self._session.scalars(stmt))
 
+    def list_recent_tasks(
+        self,
+        *,
+        device: Device | DeviceRef,
+        limit: int = 20,
+        cursor: PageCursor | None = None,
+    ) -> Sequence[Task]:
+        """List tasks of a device newest first, continuing after ``cursor``."""
+
+        stmt = self._recent_tasks(select(Task), device, limit, cursor)
+        return list(self._session.scalars(stmt))
+
+    def list_recent_task_rows(
+        self,
+        *,
+        device: Device | DeviceRef,
+        limit: int = 20,
+        cursor: PageCursor | None = None,
+    ) -> Sequence[Row[Any]]:
+        """Like :meth:`list_recent_tasks`, as plain column rows.
+
+        Rows carry the task columns of the admin listing in ``TaskOut``
+        order, ``has_log`` computed by the database, and skip ORM identity
+        bookkeeping; ``row._asdict()`` is ready to serialize.
+        """
+
+        stmt = self._recent_tasks(
+            select(
+                Task.id,
+                Task.task_uuid,
+                Task.user_key,
+                Task.device_identifier,
+                Task.type,
+                Task.payload,
+                Task.status,
+                Task.priority,
+                Task.retry_count,
+                Task.created_at,
+                Task.started_at,
+                Task.finished_at,
+                Task.log_digest.is_not(None).label("has_log"),
+                Task.error_message,
+            ),
+            device,
+            limit,
+            cursor,
+        )
+        return self._session.execute(stmt).all()
+
+    def _recent_tasks(
+        self,
+        stmt: Select[Any],
+        device: Device | DeviceRef,
+        limit: int,
+        cursor: PageCursor | None,
+    ) -> Select[Any]:
+        stmt = stmt.where(Task.device_id == device.id)
+        if cursor is not None:
+            stmt = stmt.where(
+                keyset_before(self._session, Task.created_at, Task.id, cursor)
+            )
+        return stmt.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+
+
+def release_expired_leases(session: Session) -> None:
+    """Periodic job entry point for :meth:`TaskService.release_expired_leases`."""
+
+    released = TaskService(session).release_expired_leases()
+    session.commit()
+    if released:
+        logger.info("Returned %d tasks with expired leases to Pending", released)
+
+
+def reap_stuck_tasks(session: Session) -> None:
+    """Periodic job entry point for :meth:`TaskService.reap_stuck_tasks`."""
+
+    requeued, failed = TaskService(session).reap_stuck_tasks(
+        default_timeout=settings.task_run_timeout_seconds,
+        timeouts=settings.task_run_timeouts,
+        max_retries=settings.task_max_retries,
+    )
+    session.commit()
+    if requeued or failed:
+        logger.warning(
+            "Reaped stuck Running tasks: %d requeued, %d marked Failed", requeued, failed
+        )
@@ -0,0 +1 @@
+"""Service microbenchmarks (pytest-benchmark)."""
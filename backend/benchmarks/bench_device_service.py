@@ -0,0 +1,52 @@
+"""Per-operation timings of DeviceService on the seeded datasets."""
+
+from __future__ import annotations
+
+from itertools import count
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.services import DeviceService
+
+from .conftest import Dataset, Measure
+
+
+def _user(user_key: str):
+    def load(session: Session) -> User:
+        return session.scalars(select(User).where(User.user_key == user_key)).one()
+
+    return load
+
+
+@pytest.mark.benchmark(group="register_or_touch_device")
+def test_touch_existing_device(
+    dataset: Dataset, session: Session, measure: Measure
+) -> None:
+    service = DeviceService(session)
+    measure(
+        lambda user: service.register_or_touch_device(
+            user=user,
+            device_identifier=dataset.device.device_id,
+            agent_version="bench",
+        ),
+        prepare=_user(dataset.user_key),
+    )
+
+
+@pytest.mark.benchmark(group="register_or_touch_device")
+def test_register_new_device(
+    dataset: Dataset, session: Session, measure: Measure
+) -> None:
+    service = DeviceService(session)
+    serial = count()
+    measure(
+        lambda user: service.register_or_touch_device(
+            user=user,
+            device_identifier=f"bench-new-{next(serial)}",
+            agent_version="bench",
+        ),
+        prepare=_user(dataset.user_key),
+    )
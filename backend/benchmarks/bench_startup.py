@@ -0,0 +1,46 @@
+"""Cold start of one server worker, with a budget to keep it from creeping up.
+
+Each round spawns a fresh interpreter that does what a uvicorn or gunicorn
+worker does before accepting connections: import ``app.main``, build the app
+and run the lifespan startup (background jobs, scheduler). The wall time of
+the whole process, interpreter start and shutdown included, is benchmarked;
+its median must stay within ``--startup-budget-ms``. The default suite checks
+the same budget in ``tests/test_startup.py``.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tests.test_startup import COLD_START, probe, startup_database
+
+
+@pytest.mark.benchmark(group="startup")
+def test_worker_cold_start(
+    benchmark: Any, request: pytest.FixtureRequest, tmp_path: Path
+) -> None:
+    database_url = startup_database(tmp_path)
+
+    # Timed here as well, so the budget holds with --benchmark-disable too.
+    samples: list[float] = []
+
+    def cold_start() -> dict[str, Any]:
+        started = time.perf_counter()
+        phases = probe(COLD_START, database_url)
+        samples.append(time.perf_counter() - started)
+        return phases
+
+    phases = benchmark.pedantic(cold_start, rounds=5, iterations=1)
+    benchmark.extra_info.update(phases)
+
+    budget_ms = request.config.getoption("startup_budget_ms")
+    median_ms = statistics.median(samples) * 1000
+    assert median_ms <= budget_ms, (
+        f"worker cold start {median_ms:.0f} ms exceeds the {budget_ms:.0f} ms "
+        f"budget ({', '.join(f'{k} {v:.0f}' for k, v in phases.items())})"
+    )
@@ -0,0 +1,89 @@
+"""Per-operation timings of TaskService on the seeded datasets."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Task, TaskStatus
+from app.services import TaskService
+
+from .conftest import Dataset, Measure
+
+
+def _running_task(session: Session) -> Task:
+    return session.scalars(
+        select(Task).where(Task.status == TaskStatus.RUNNING).limit(1)
+    ).one()
+
+
+@pytest.mark.benchmark(group="enqueue_task")
+def test_enqueue_task(dataset: Dataset, session: Session, measure: Measure) -> None:
+    service = TaskService(session)
+    measure(
+        lambda: service.enqueue_task(
+            device=dataset.device, task_type="Fight", payload={"stage": "1-7"}
+        )
+    )
+
+
+@pytest.mark.benchmark(group="fetch_next_pending_task")
+def test_fetch_next_pending_task(
+    dataset: Dataset, session: Session, measure: Measure
+) -> None:
+    service = TaskService(session)
+    task = measure(
+        lambda: service.fetch_next_pending_task(
+            user_key=dataset.device.user_key,
+            device_identifier=dataset.device.device_id,
+        )
+    )
+    assert task is not None
+
+
+@pytest.mark.benchmark(group="fetch_pending_batch")
+def test_fetch_pending_batch(
+    dataset: Dataset, session: Session, measure: Measure
+) -> None:
+    service = TaskService(session)
+    tasks = measure(
+        lambda: service.fetch_pending_batch(
+            user_key=dataset.device.user_key,
+            device_identifier=dataset.device.device_id,
+            limit=10,
+        )
+    )
+    assert tasks
+
+
+@pytest.mark.benchmark(group="update_status")
+def test_update_status(session: Session, measure: Measure) -> None:
+    service = TaskService(session)
+    measure(
+        lambda task: service.update_status(
+            task,
+            status=TaskStatus.SUCCEEDED,
+            log="Fight finished\n" * 20,
+            result={"drops": {"sanity": 6}},
+        ),
+        prepare=_running_task,
+    )
+
+
+@pytest.mark.benchmark(group="append_log")
+def test_append_log(session: Session, measure: Measure) -> None:
+    service = TaskService(session)
+    measure(
+        lambda task: service.append_log(task, message="Stage 1-7 cleared"),
+        prepare=_running_task,
+    )
+
+
+@pytest.mark.benchmark(group="list_recent_tasks")
+def test_list_recent_tasks(
+    dataset: Dataset, session: Session, measure: Measure
+) -> None:
+    service = TaskService(session)
+    tasks = measure(lambda: service.list_recent_tasks(device=dataset.device, limit=20))
+    assert tasks
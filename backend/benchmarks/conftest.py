@@ -0,0 +1,271 @@
+"""Seeded databases for the service microbenchmarks.
+
+Every benchmark runs once per dataset: SQLite databases of each size in
+``--bench-tasks`` (default ``10k``; ``10k,1m,10m`` for the full matrix) and,
+when ``--bench-postgres-url`` or ``MAA_BENCH_POSTGRES_URL`` points at a
+local server, the same sizes in PostgreSQL, one schema per size.
+
+Datasets are generated in SQL (no ORM), so 10M tasks take minutes rather
+than hours, and are kept between runs: SQLite files under pytest's cache
+directory (a temporary one with ``-p no:cacheprovider``), PostgreSQL
+schemas in place. ``--bench-reseed`` rebuilds them.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.profile import active_profile, configure_engine
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Device, Task, TaskStatus, User
+from app.services import DeviceRef
+from app.services.counters import reconcile_task_counts
+
+Measure = Callable[..., Any]
+
+_SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+_TASKS_PER_DEVICE = 500
+_DEVICES_PER_USER = 20
+
+# Rough live mix over each device's k-th task: mostly history, a few queued
+# and in flight.
+_STATUS_BY_K_MOD_100 = (
+    "CASE WHEN k % 100 < 2 THEN 'PENDING' WHEN k % 100 < 3 THEN 'RUNNING' "
+    "WHEN k % 100 < 10 THEN 'FAILED' WHEN k % 100 < 12 THEN 'CANCELLED' "
+    "ELSE 'SUCCEEDED' END"
+)
+
+# Row source ``seq(n)`` for 0 <= n < :rows, a zero-padded hex uuid of n and a
+# timestamp n seconds in the past, per dialect.
+_SQL = {
+    "sqlite": {
+        "with": "WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq "
+        "WHERE n < :rows - 1) ",
+        "from": "seq",
+        "uuid": "printf('%032x', n)",
+        "ago": "datetime('now', '-' || n || ' seconds')",
+    },
+    "postgresql": {
+        "with": "",
+        "from": "generate_series(0, :rows - 1) AS seq(n)",
+        "uuid": "lpad(to_hex(n), 32, '0')",
+        "ago": "now() - n * interval '1 second'",
+    },
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A seeded database and well-known rows to aim operations at."""
+
+    name: str
+    tasks: int
+    session_factory: sessionmaker[Session]
+    device: DeviceRef
+    user_key: str
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("maa-bench")
+    group.addoption(
+        "--bench-tasks",
+        default="10k",
+        help=f"Comma-separated dataset sizes out of {', '.join(_SIZES)}.",
+    )
+    group.addoption(
+        "--bench-postgres-url",
+        default=os.environ.get("MAA_BENCH_POSTGRES_URL"),
+        help="Also benchmark on this PostgreSQL database (schemas bench_<size>).",
+    )
+    group.addoption(
+        "--bench-reseed", action="store_true", help="Regenerate cached datasets."
+    )
+    group.addoption(
+        "--startup-budget-ms",
+        type=float,
+        default=float(os.environ.get("MAA_BENCH_STARTUP_BUDGET_MS", 2500)),
+        help="Fail when a worker's median cold start exceeds this many ms.",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if "dataset" not in metafunc.fixturenames:
+        return
+    config = metafunc.config
+    option = config.getoption("bench_tasks")
+    sizes = [size.strip().lower() for size in option.split(",")]
+    unknown = [size for size in sizes if size not in _SIZES]
+    if unknown:
+        raise pytest.UsageError(f"unknown --bench-tasks sizes: {', '.join(unknown)}")
+    backends = ["sqlite"]
+    if config.getoption("bench_postgres_url"):
+        backends.append("postgresql")
+    params = [f"{backend}-{size}" for backend in backends for size in sizes]
+    metafunc.parametrize("dataset", params, indirect=True, scope="session")
+
+
+def _shape(tasks: int) -> tuple[int, int]:
+    devices = max(1, tasks // _TASKS_PER_DEVICE)
+    return devices, max(1, devices // _DEVICES_PER_USER)
+
+
+def _populate(session: Session, tasks: int) -> None:
+    sql = _SQL[session.get_bind().dialect.name]
+    devices, users = _shape(tasks)
+    session.execute(
+        text(
+            f"{sql['with']}INSERT INTO users (id, user_key, revision) "
+            f"SELECT n + 1, 'user-' || (n + 1), 0 FROM {sql['from']}"
+        ),
+        {"rows": users},
+    )
+    session.execute(
+        text(
+            f"{sql['with']}INSERT INTO devices (id, user_id, user_key, device_id, "
+            "status, last_seen_at) "
+            "SELECT n + 1, (n + 1) % :users + 1, 'user-' || ((n + 1) % :users + 1), "
+            f"'device-' || (n + 1), 'online', {sql['ago']} FROM {sql['from']}"
+        ),
+        {"rows": devices, "users": users},
+    )
+    # Task n is the k-th task of device d = n % devices + 1, owned by user
+    # d % users + 1 like the device, and is n seconds old, so every device's
+    # history interleaves over time like a live fleet's.
+    session.execute(
+        text(
+            f"{sql['with']}INSERT INTO tasks (task_uuid, user_id, user_key, "
+            "device_id, device_identifier, type, payload, status, priority, "
+            "retry_count, created_at) "
+            f"SELECT {sql['uuid']}, d % :users + 1, 'user-' || (d % :users + 1), "
+            "d, 'device-' || d, 'Fight', '{}', "
+            f"{_STATUS_BY_K_MOD_100}, n % 3, 0, {sql['ago']} FROM (SELECT n, "
+            f"n % :devices + 1 AS d, n / :devices AS k FROM {sql['from']}) AS numbered"
+        ),
+        {"rows": tasks, "devices": devices, "users": users},
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        for table in ("users", "devices"):
+            session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+    reconcile_task_counts(session)
+    session.commit()
+
+
+def _engine(backend: str, size: str, root: Path, postgres_url: str | None) -> Engine:
+    if backend == "sqlite":
+        url = f"sqlite:///{root / f'tasks_{size}.db'}"
+        engine = create_engine(url, **_build_engine_kwargs(url))
+    else:
+        schema = f"bench_{size}"
+        with create_engine(postgres_url).begin() as connection:
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        engine = create_engine(
+            postgres_url, connect_args={"options": f"-csearch_path={schema}"}
+        )
+    configure_engine(engine, active_profile())
+    return engine
+
+
+def _seeded(engine: Engine, tasks: int, reseed: bool) -> bool:
+    with engine.connect() as connection:
+        if not engine.dialect.has_table(connection, "tasks"):
+            return False
+        if reseed:
+            return False
+        return connection.scalar(select(func.count()).select_from(Task)) == tasks
+
+
+@pytest.fixture(scope="session")
+def dataset(request: pytest.FixtureRequest) -> Iterator[Dataset]:
+    backend, size = request.param.split("-")
+    tasks = _SIZES[size]
+    config = request.config
+    cache = getattr(config, "cache", None)
+    root = cache.mkdir("maa-bench") if cache else Path(tempfile.mkdtemp())
+    engine = _engine(backend, size, root, config.getoption("bench_postgres_url"))
+
+    if not _seeded(engine, tasks, config.getoption("bench_reseed")):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as session:
+            _populate(session, tasks)
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+
+    session_factory = sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+    with session_factory() as session:
+        # A device with queued work, so claims never come back empty.
+        device = session.execute(
+            select(Device.id, Device.user_id, Device.user_key, Device.device_id)
+            .join(Task, Task.device_id == Device.id)
+            .where(Task.status == TaskStatus.PENDING)
+            .limit(1)
+        ).one()
+        user_key = session.scalar(
+            select(User.user_key).where(User.id == device.user_id)
+        )
+    yield Dataset(
+        name=request.param,
+        tasks=tasks,
+        session_factory=session_factory,
+        device=DeviceRef(
+            id=device.id,
+            user_id=device.user_id,
+            user_key=device.user_key,
+            device_id=device.device_id,
+        ),
+        user_key=user_key,
+    )
+    engine.dispose()
+
+
+@pytest.fixture
+def session(dataset: Dataset) -> Iterator[Session]:
+    """A session whose work is rolled back, leaving the dataset unchanged."""
+
+    with dataset.session_factory() as session:
+        yield session
+        session.rollback()
+
+
+@pytest.fixture
+def measure(benchmark: Any, session: Session) -> Measure:
+    """Benchmark ``target`` with a rollback (untimed) before every round.
+
+    ``prepare(session)``, if given, runs untimed after the rollback and its
+    result is passed to ``target``. Commits are never timed: the numbers
+    are the statements an operation issues, not the fsync behind them.
+    """
+
+    def run(
+        target: Callable[..., Any],
+        prepare: Callable[[Session], Any] | None = None,
+        rounds: int = 200,
+    ) -> Any:
+        def setup() -> tuple[tuple[Any, ...], dict[str, Any]] | None:
+            session.rollback()
+            if prepare is None:
+                return None
+            return (prepare(session),), {}
+
+        return benchmark.pedantic(
+            target, setup=setup, rounds=rounds, iterations=1, warmup_rounds=1
+        )
+
+    return run
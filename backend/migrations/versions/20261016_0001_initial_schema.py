@@ -0,0 +1,144 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 22:23:08.910019
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import sqlite
+
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_PAYLOAD_TYPE = sa.JSON().with_variant(sqlite.JSON(), "sqlite")
+_TASK_STATUS = sa.Enum(
+    "PENDING",
+    "RUNNING",
+    "SUCCEEDED",
+    "FAILED",
+    "CANCELLED",
+    name="taskstatus",
+    native_enum=False,
+    length=16,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_key", sa.String(length=64), nullable=False),
+        sa.Column("name", sa.String(length=128), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_users_user_key"), "users", ["user_key"], unique=True)
+
+    op.create_table(
+        "devices",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("user_key", sa.String(length=64), nullable=False),
+        sa.Column("device_id", sa.String(length=128), nullable=False),
+        sa.Column("display_name", sa.String(length=128), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=False),
+        sa.Column("agent_version", sa.String(length=32), nullable=True),
+        sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_key", "device_id", name="uq_device_user_device"),
+    )
+    op.create_index(op.f("ix_devices_device_id"), "devices", ["device_id"])
+    op.create_index(op.f("ix_devices_user_key"), "devices", ["user_key"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("task_uuid", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("user_key", sa.String(length=64), nullable=False),
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("device_identifier", sa.String(length=128), nullable=False),
+        sa.Column("type", sa.String(length=64), nullable=False),
+        sa.Column("payload", _PAYLOAD_TYPE, nullable=False),
+        sa.Column("status", _TASK_STATUS, nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("log", sa.Text(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["device_id"], ["devices.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_tasks_device_identifier"), "tasks", ["device_identifier"]
+    )
+    op.create_index(op.f("ix_tasks_task_uuid"), "tasks", ["task_uuid"], unique=True)
+    op.create_index(op.f("ix_tasks_user_key"), "tasks", ["user_key"])
+
+    op.create_table(
+        "task_logs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("level", sa.String(length=16), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_logs")
+    op.drop_index(op.f("ix_tasks_user_key"), table_name="tasks")
+    op.drop_index(op.f("ix_tasks_task_uuid"), table_name="tasks")
+    op.drop_index(op.f("ix_tasks_device_identifier"), table_name="tasks")
+    op.drop_table("tasks")
+    op.drop_index(op.f("ix_devices_user_key"), table_name="devices")
+    op.drop_index(op.f("ix_devices_device_id"), table_name="devices")
+    op.drop_table("devices")
+    op.drop_index(op.f("ix_users_user_key"), table_name="users")
+    op.drop_table("users")
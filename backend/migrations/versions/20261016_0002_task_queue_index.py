@@ -0,0 +1,37 @@
+"""composite index for the pending-task queue scan
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 22:40:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tasks_queue",
+        "tasks",
+        [
+            "user_key",
+            "device_identifier",
+            "status",
+            sa.text("priority DESC"),
+            "created_at",
+            "id",
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_queue", table_name="tasks")
@@ -0,0 +1,32 @@
+"""lease deadline for batch-dispatched tasks
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 23:05:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tasks",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(op.f("ix_tasks_lease_expires_at"), "tasks", ["lease_expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_tasks_lease_expires_at"), table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("lease_expires_at")
@@ -0,0 +1,32 @@
+"""retry counter and running-task index for the stuck-task reaper
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 23:40:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tasks",
+        sa.Column("retry_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_tasks_status_started_at", "tasks", ["status", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_status_started_at", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("retry_count")
@@ -0,0 +1,31 @@
+"""sequence-numbered output chunks in task_logs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:20:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("task_logs", sa.Column("seq", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_task_logs_task_seq", "task_logs", ["task_id", "seq"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_logs_task_seq", table_name="task_logs")
+    with op.batch_alter_table("task_logs") as batch_op:
+        batch_op.drop_column("seq")
@@ -0,0 +1,241 @@
+"""move task logs, results and stats into compressed content-addressed blobs
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 01:10:00.000000
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import zlib
+from collections.abc import Sequence
+from typing import Any
+
+import sqlalchemy as sa
+from alembic import op
+
+try:  # Blobs written with MAA_BLOB_CODEC=zstd need it to downgrade.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+revision: str = "0006"
+down_revision: str | None = "0005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 500
+DIGEST_COLUMNS = ("log_digest", "result_digest", "stats_digest")
+
+tasks = sa.table(
+    "tasks",
+    sa.column("id", sa.Integer),
+    sa.column("log", sa.Text),
+    *(sa.column(name, sa.String) for name in DIGEST_COLUMNS),
+)
+task_logs = sa.table(
+    "task_logs",
+    sa.column("id", sa.Integer),
+    sa.column("task_id", sa.Integer),
+    sa.column("level", sa.String),
+    sa.column("message", sa.Text),
+)
+blobs = sa.table(
+    "blobs",
+    sa.column("digest", sa.String),
+    sa.column("codec", sa.String),
+    sa.column("size", sa.Integer),
+    sa.column("data", sa.LargeBinary),
+)
+
+
+# Frozen copy of app.services.blob encoding, so this revision keeps working
+# whatever the application code becomes.
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def _store(connection: sa.Connection, seen: set[str], data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    if digest in seen:
+        return digest
+    seen.add(digest)
+    exists = connection.scalar(
+        sa.select(blobs.c.digest).where(blobs.c.digest == digest)
+    )
+    if exists is None:
+        encoded = zlib.compress(data, 6)
+        codec = "zlib"
+        if len(encoded) >= len(data):
+            codec, encoded = "identity", data
+        connection.execute(
+            blobs.insert().values(digest=digest, codec=codec, size=len(data), data=encoded)
+        )
+    return digest
+
+
+def _decode(codec: str, data: bytes) -> bytes:
+    if codec == "identity":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Cannot decode blob codec {codec!r}")
+
+
+def _check_decodable(connection: sa.Connection) -> None:
+    """Refuse to start a downgrade that would fail on a blob it cannot read."""
+
+    referenced = sa.or_(
+        *(blobs.c.digest.in_(sa.select(tasks.c[name])) for name in DIGEST_COLUMNS)
+    )
+    codecs = set(
+        connection.scalars(sa.select(blobs.c.codec).where(referenced).distinct())
+    )
+    supported = {"identity", "zlib"} | ({"zstd"} if zstandard is not None else set())
+    unsupported = codecs - supported
+    if unsupported:
+        hint = " (pip install zstandard)" if unsupported == {"zstd"} else ""
+        names = ", ".join(sorted(unsupported))
+        raise RuntimeError(
+            f"Cannot downgrade: task blobs use codec(s) {names} that this "
+            f"environment cannot decode{hint}."
+        )
+
+
+def _migrate_logs(connection: sa.Connection, seen: set[str]) -> None:
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(tasks.c.id, tasks.c.log)
+            .where(tasks.c.id > last_id)
+            .where(tasks.c.log.is_not(None))
+            .order_by(tasks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        for task_id, log in rows:
+            if log:
+                connection.execute(
+                    tasks.update()
+                    .where(tasks.c.id == task_id)
+                    .values(log_digest=_store(connection, seen, log.encode()))
+                )
+        last_id = rows[-1].id
+
+
+def _migrate_payload_logs(connection: sa.Connection, seen: set[str]) -> None:
+    """Turn ``result: {...!r}`` / ``stats: {...!r}`` DEBUG entries into blobs."""
+
+    prefixes = {"result: ": "result_digest", "stats: ": "stats_digest"}
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(task_logs.c.id, task_logs.c.task_id, task_logs.c.message)
+            .where(task_logs.c.id > last_id)
+            .where(task_logs.c.level == "DEBUG")
+            .order_by(task_logs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        migrated: list[int] = []
+        for log_id, task_id, message in rows:
+            for prefix, column in prefixes.items():
+                if not message.startswith(prefix):
+                    continue
+                try:
+                    value = ast.literal_eval(message[len(prefix) :])
+                except (ValueError, SyntaxError):
+                    break  # Not a repr we can parse back; leave the entry.
+                digest = _store(connection, seen, _encode_json(value))
+                connection.execute(
+                    tasks.update().where(tasks.c.id == task_id).values({column: digest})
+                )
+                migrated.append(log_id)
+                break
+        if migrated:
+            connection.execute(task_logs.delete().where(task_logs.c.id.in_(migrated)))
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "blobs",
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("codec", sa.String(length=16), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("digest"),
+    )
+    with op.batch_alter_table("tasks") as batch_op:
+        for name in DIGEST_COLUMNS:
+            batch_op.add_column(sa.Column(name, sa.String(length=64), nullable=True))
+            batch_op.create_foreign_key(
+                f"fk_tasks_{name}_blobs", "blobs", [name], ["digest"]
+            )
+
+    connection = op.get_bind()
+    seen: set[str] = set()
+    _migrate_logs(connection, seen)
+    _migrate_payload_logs(connection, seen)
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("log")
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    _check_decodable(connection)
+
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.add_column(sa.Column("log", sa.Text(), nullable=True))
+
+    rows = connection.execute(
+        sa.select(tasks.c.id, *(tasks.c[name] for name in DIGEST_COLUMNS)).where(
+            sa.or_(*(tasks.c[name].is_not(None) for name in DIGEST_COLUMNS))
+        )
+    ).all()
+    for row in rows:
+        decoded: dict[str, bytes] = {}
+        for name in DIGEST_COLUMNS:
+            digest = getattr(row, name)
+            if digest is None:
+                continue
+            codec, data = connection.execute(
+                sa.select(blobs.c.codec, blobs.c.data).where(blobs.c.digest == digest)
+            ).one()
+            decoded[name] = _decode(codec, data)
+        if "log_digest" in decoded:
+            connection.execute(
+                tasks.update()
+                .where(tasks.c.id == row.id)
+                .values(log=decoded["log_digest"].decode())
+            )
+        for name, label in (("result_digest", "result"), ("stats_digest", "stats")):
+            if name in decoded:
+                value = json.loads(decoded[name])
+                connection.execute(
+                    task_logs.insert().values(
+                        task_id=row.id, level="DEBUG", message=f"{label}: {value!r}"
+                    )
+                )
+
+    with op.batch_alter_table("tasks") as batch_op:
+        for name in DIGEST_COLUMNS:
+            batch_op.drop_constraint(f"fk_tasks_{name}_blobs", type_="foreignkey")
+            batch_op.drop_column(name)
+    op.drop_table("blobs")
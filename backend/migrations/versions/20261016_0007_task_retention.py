@@ -0,0 +1,29 @@
+"""indexes for the task retention sweep and blob collection
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 02:20:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+INDEXED_COLUMNS = ("finished_at", "log_digest", "result_digest", "stats_digest")
+
+
+def upgrade() -> None:
+    for name in INDEXED_COLUMNS:
+        op.create_index(f"ix_tasks_{name}", "tasks", [name])
+
+
+def downgrade() -> None:
+    for name in INDEXED_COLUMNS:
+        op.drop_index(f"ix_tasks_{name}", table_name="tasks")
@@ -0,0 +1,38 @@
+"""per-user revision counter and keyset pagination indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 03:30:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("revision", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_tasks_device_created", "tasks", ["device_id", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_devices_user_created", "devices", ["user_key", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_devices_user_created", table_name="devices")
+    op.drop_index("ix_tasks_device_created", table_name="tasks")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("revision")
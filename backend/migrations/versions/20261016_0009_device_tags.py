@@ -0,0 +1,34 @@
+"""device tags for bulk task selectors
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 06:30:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009"
+down_revision: str | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "device_tags",
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(length=64), nullable=False),
+        sa.ForeignKeyConstraint(["device_id"], ["devices.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("device_id", "tag"),
+    )
+    op.create_index("ix_device_tags_tag", "device_tags", ["tag", "device_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_device_tags_tag", table_name="device_tags")
+    op.drop_table("device_tags")
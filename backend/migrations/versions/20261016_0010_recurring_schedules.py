@@ -0,0 +1,66 @@
+"""recurring task schedules
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 07:20:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import sqlite
+
+revision: str = "0010"
+down_revision: str | None = "0009"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_PAYLOAD_TYPE = sa.JSON().with_variant(sqlite.JSON(), "sqlite")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "schedules",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("user_key", sa.String(length=64), nullable=False),
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("device_identifier", sa.String(length=128), nullable=False),
+        sa.Column("name", sa.String(length=128), nullable=True),
+        sa.Column("type", sa.String(length=64), nullable=False),
+        sa.Column("payload", _PAYLOAD_TYPE, nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("interval_seconds", sa.Integer(), nullable=False),
+        sa.Column("anchor_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("enabled", sa.Boolean(), server_default=sa.true(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["device_id"], ["devices.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_schedules_user_key", "schedules", ["user_key"])
+    op.create_index("ix_schedules_device_id", "schedules", ["device_id"])
+    op.create_index("ix_schedules_due", "schedules", ["enabled", "next_run_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_schedules_due", table_name="schedules")
+    op.drop_index("ix_schedules_device_id", table_name="schedules")
+    op.drop_index("ix_schedules_user_key", table_name="schedules")
+    op.drop_table("schedules")
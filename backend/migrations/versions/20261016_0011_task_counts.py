@@ -0,0 +1,48 @@
+"""per-device task counters
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 08:10:00.000000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0011"
+down_revision: str | None = "0010"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+tasks = sa.table(
+    "tasks",
+    sa.column("device_id", sa.Integer),
+    sa.column("status", sa.String),
+)
+
+
+def upgrade() -> None:
+    task_counts = op.create_table(
+        "task_counts",
+        sa.Column("device_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("count", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["device_id"], ["devices.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("device_id", "status"),
+    )
+    # Seed the counters with one aggregate; from here on they are incremental.
+    op.execute(
+        task_counts.insert().from_select(
+            ["device_id", "status", "count"],
+            sa.select(tasks.c.device_id, tasks.c.status, sa.func.count()).group_by(
+                tasks.c.device_id, tasks.c.status
+            ),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_counts")
@@ -0,0 +1,136 @@
+"""Compare /maa/getTask throughput on the async engine against the threadpool path.
+
+Starts uvicorn twice with the same worker count, once with ``MAA_ASYNC_DB=true``
+and once with ``MAA_ASYNC_DB=false``, and drives both with the same number of
+concurrent simulated agents.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _migrate(db_url: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "MAA_DATABASE_URL": db_url},
+        check=True,
+    )
+
+
+def _start_server(port: int, workers: int, db_url: str, async_db: bool) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MAA_DATABASE_URL": db_url,
+        "MAA_ASYNC_DB": "true" if async_db else "false",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def _wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/healthz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def _agent(
+    client: httpx.AsyncClient, index: int, stop_at: float, latencies: list[float]
+) -> int:
+    errors = 0
+    payload = {"user": "bench-user", "device": f"bench-{index}", "agentVersion": "bench"}
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/maa/getTask", json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    return errors
+
+
+async def _drive(base_url: str, agents: int, duration: float) -> dict[str, float]:
+    limits = httpx.Limits(max_connections=agents, max_keepalive_connections=agents)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # Register every device first so the measured phase is steady state.
+        await asyncio.gather(*(_agent(client, i, 0, []) for i in range(agents)))
+        latencies: list[float] = []
+        stop_at = time.monotonic() + duration
+        errors = await asyncio.gather(
+            *(_agent(client, i, stop_at, latencies) for i in range(agents))
+        )
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0] * 99
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "errors": sum(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers} agents={args.agents} duration={args.duration}s")
+    for async_db in (True, False):
+        db_url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_async.db'}"
+        _migrate(db_url)
+        server = _start_server(args.port, args.workers, db_url, async_db)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(_wait_ready(base_url))
+            result = asyncio.run(_drive(base_url, args.agents, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        label = "async engine" if async_db else "threadpool "
+        print(
+            f"{label}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+            f"p95 {result['p95_ms']:7.1f} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
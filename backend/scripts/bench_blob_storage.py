@@ -0,0 +1,134 @@
+"""Measure task log/result storage: database size, report throughput, list reads.
+
+Finishes ``--tasks`` tasks through ``TaskService.update_status`` with a
+realistic, repetitive maa-cli log plus result/stats payloads, then reports
+the SQLite file size and how fast reports were written and recent-task
+lists read back. Run it on two revisions to compare storage layouts::
+
+    PYTHONPATH=. python scripts/bench_blob_storage.py --tasks 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.profile import active_profile, configure_engine
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Device, Task, TaskStatus
+from app.services import DeviceService, TaskService
+
+
+def maa_log(rng: random.Random, chars: int) -> str:
+    """Generate maa-cli style output: few templates, varying numbers."""
+
+    templates = (
+        "[{ts}][INFO] Fight: stage {stage}, times {i}/{n}, sanity {san}\n",
+        "[{ts}][INFO] Recognition: {item} x{count}\n",
+        "[{ts}][DEBUG] Click ({x}, {y})\n",
+        "[{ts}][INFO] Infrast: room {room} shift done, mood {mood}\n",
+    )
+    lines: list[str] = []
+    size = 0
+    second = 0
+    while size < chars:
+        second += rng.randint(0, 3)
+        line = rng.choice(templates).format(
+            ts=f"2026-10-16 12:{second // 60 % 60:02d}:{second % 60:02d}",
+            stage=rng.choice(("1-7", "CE-6", "LS-6")),
+            i=rng.randint(1, 10),
+            n=10,
+            san=rng.randint(0, 135),
+            item=rng.choice(("固源岩", "装置", "酮凝集", "糖")),
+            count=rng.randint(1, 5),
+            x=rng.randint(0, 1920),
+            y=rng.randint(0, 1080),
+            room=rng.randint(1, 9),
+            mood=rng.randint(0, 24),
+        )
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)[:chars]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--log-chars", type=int, default=4000)
+    parser.add_argument("--list-reads", type=int, default=500)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / "bench_blob.db"
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    configure_engine(engine, active_profile())
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    rng = random.Random(42)
+    with session_factory() as session:
+        devices = DeviceService(session)
+        user = devices.ensure_user("bench")
+        device = devices.register_or_touch_device(
+            user=user, device_identifier="bench-device"
+        )
+        tasks = TaskService(session)
+        task_ids = [
+            tasks.enqueue_task(device=device, task_type="Fight", payload={}).id
+            for _ in range(args.tasks)
+        ]
+        session.commit()
+        device_pk = device.id
+
+    payloads = [
+        (
+            maa_log(rng, args.log_chars),
+            {"command": ["maa", "fight", "1-7"], "returnCode": 0},
+            {"sanity": rng.randint(0, 135), "drops": {"固源岩": rng.randint(1, 9)}},
+        )
+        for _ in task_ids
+    ]
+
+    started = time.perf_counter()
+    for task_id, (log, result, stats) in zip(task_ids, payloads, strict=True):
+        with session_factory() as session:
+            task_service = TaskService(session)
+            task = session.get(Task, task_id)
+            task_service.update_status(
+                task, status=TaskStatus.SUCCEEDED, log=log, result=result, stats=stats
+            )
+            session.commit()
+    write_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with session_factory() as session:
+        device = session.get(Device, device_pk)
+        for _ in range(args.list_reads):
+            TaskService(session).list_recent_tasks(device=device, limit=20)
+            # Drop loaded tasks so every read goes back to the database.
+            session.expunge_all()
+            session.add(device)
+    read_seconds = time.perf_counter() - started
+
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    engine.dispose()
+    size = os.path.getsize(path)
+
+    print(
+        f"tasks={args.tasks} log_chars={args.log_chars} "
+        f"db_size={size / 1024 / 1024:.2f} MiB "
+        f"reports={args.tasks / write_seconds:.0f}/s "
+        f"list20={args.list_reads / read_seconds:.0f}/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare per-task creation with the bulk fan-out behind POST /api/tasks/bulk.
+
+Registers ``--devices`` devices, then creates one task on each of them
+twice: once the way a client looping over POST /api/devices/{id}/tasks
+does (one transaction per task) and once through the bulk path (one
+selector query, one executemany INSERT, one commit). Prints tasks/s for
+both::
+
+    PYTHONPATH=. python scripts/bench_bulk_tasks.py --devices 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.profile import active_profile, configure_engine
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Task
+from app.services import DeviceService, TaskService
+
+USER_KEY = "bench"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=5000)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / "bench_bulk.db"
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    configure_engine(engine, active_profile())
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    with session_factory() as session:
+        devices = DeviceService(session)
+        user = devices.ensure_user(USER_KEY)
+        for index in range(args.devices):
+            devices.register_or_touch_device(
+                user=user, device_identifier=f"bench-{index:05d}"
+            )
+        session.commit()
+        refs = devices.select_devices(user_key=USER_KEY)
+
+    started = time.perf_counter()
+    for ref in refs:
+        with session_factory() as session:
+            TaskService(session).enqueue_task(
+                device=ref, task_type="Fight", payload={"stage": "1-7"}
+            )
+            session.commit()
+    single_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with session_factory() as session:
+        selected = DeviceService(session).select_devices(user_key=USER_KEY)
+        TaskService(session).enqueue_bulk(
+            devices=selected, task_type="Fight", payload={"stage": "1-7"}
+        )
+        session.commit()
+    bulk_seconds = time.perf_counter() - started
+
+    with session_factory() as session:
+        total = session.scalar(select(func.count(Task.id)))
+    assert total == 2 * len(refs), total
+
+    print(f"devices:           {len(refs)}")
+    print(
+        f"one per request:   {single_seconds:8.3f}s "
+        f"({len(refs) / single_seconds:10.0f} tasks/s)"
+    )
+    print(
+        f"bulk fan-out:      {bulk_seconds:8.3f}s "
+        f"({len(refs) / bulk_seconds:10.0f} tasks/s)"
+    )
+    print(f"speed-up:          {single_seconds / bulk_seconds:8.1f}x")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
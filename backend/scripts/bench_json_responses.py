@@ -0,0 +1,141 @@
+"""Compare the default and ``MAA_FAST_JSON`` serialization of the list endpoints.
+
+Seeds one device with ``--rows`` tasks and as many devices, then lists them
+through the admin API in-process (FastAPI TestClient): tasks through
+``GET /api/devices/{device_id}/tasks`` and devices through
+``GET /api/devices``, following ``X-Next-Cursor`` until every row has been
+read. Each listing is timed with the fast path off and on; the two
+responses are checked to be byte-identical::
+
+    PYTHONPATH=. python scripts/bench_json_responses.py --rows 100 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+os.environ.setdefault(
+    "MAA_DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_json.db'}"
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.responses import orjson  # noqa: E402
+from app.db.session import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Device, Task, TaskStatus, User  # noqa: E402
+
+USER_KEY = "bench-json"
+DEVICE_ID = "bench-json-device"
+
+_STATUSES = (TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.PENDING)
+
+
+def _seed(rows: int) -> None:
+    with SessionLocal() as session:
+        for model in (Task, Device, User):
+            session.execute(delete(model))
+        session.execute(insert(User), [{"id": 1, "user_key": USER_KEY, "revision": 0}])
+        session.execute(
+            insert(Device),
+            [
+                {
+                    "id": index + 1,
+                    "user_id": 1,
+                    "user_key": USER_KEY,
+                    "device_id": DEVICE_ID if index == 0 else f"device-{index}",
+                    "status": "online",
+                }
+                for index in range(rows)
+            ],
+        )
+        session.execute(
+            insert(Task),
+            [
+                {
+                    "task_uuid": f"{index:032x}",
+                    "user_id": 1,
+                    "user_key": USER_KEY,
+                    "device_id": 1,
+                    "device_identifier": DEVICE_ID,
+                    "type": "Fight",
+                    "payload": {"stage": "1-7", "times": index % 6, "medicine": 0},
+                    "status": _STATUSES[index % len(_STATUSES)],
+                    "priority": index % 3,
+                    "retry_count": 0,
+                }
+                for index in range(rows)
+            ],
+        )
+        session.commit()
+
+
+def _read_all(client: TestClient, url: str, limit: int) -> list[bytes]:
+    pages: list[bytes] = []
+    cursor: str | None = None
+    while True:
+        params = {"user": USER_KEY, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        pages.append(response.content)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def _timed(run: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    renderer = "orjson" if orjson is not None else "pydantic-core"
+    print(f"fast path renderer: {renderer}")
+    listings = {
+        "tasks": (f"/api/devices/{DEVICE_ID}/tasks", 100),
+        "devices": ("/api/devices", 500),
+    }
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        for rows in args.rows:
+            _seed(rows)
+            for name, (url, limit) in listings.items():
+                timings = {}
+                bodies = {}
+                for fast in (False, True):
+                    settings.fast_json = fast
+                    bodies[fast] = _read_all(client, url, limit)
+                    timings[fast] = _timed(
+                        partial(_read_all, client, url, limit), args.repeat
+                    )
+                assert bodies[False] == bodies[True], f"{name}: responses differ"
+                print(
+                    f"{name:8s}{rows:>7d} rows: default {timings[False]:9.1f} ms  "
+                    f"fast {timings[True]:9.1f} ms  "
+                    f"({timings[False] / timings[True]:.2f}x)"
+                )
+    settings.fast_json = False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark the agent queue query as a device's finished-task history grows.
+
+Seeds one device with an increasing number of finished tasks (plus a handful
+of pending ones) and times the pending-queue lookup used by
+``TaskService.claim_pending_tasks`` at the head schema and at the baseline:
+the task indexes of revision 0001 only. Every index added since is dropped
+for the baseline, not just ``ix_tasks_queue``, since later ones such as
+``ix_tasks_status_started_at`` also serve the lookup and would flatter it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy import Index, create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Device, Task, TaskStatus, User
+from app.services import TaskService
+
+USER_KEY = "bench-user"
+DEVICE_ID = "bench-device"
+CHUNK = 50_000
+
+
+# Task indexes of revision 0001, before any queue-related index existed.
+BASELINE_INDEXES = {
+    "ix_tasks_task_uuid",
+    "ix_tasks_user_key",
+    "ix_tasks_device_identifier",
+}
+
+
+def _later_indexes() -> list[Index]:
+    indexes = Task.__table__.indexes
+    later = [index for index in indexes if index.name not in BASELINE_INDEXES]
+    return sorted(later, key=lambda index: str(index.name))
+
+
+def _insert_tasks(
+    session: Session, ids: tuple[int, int], count: int, status: TaskStatus
+) -> None:
+    user_id, device_pk = ids
+    for start in range(0, count, CHUNK):
+        rows = [
+            {
+                "task_uuid": uuid4().hex,
+                "user_id": user_id,
+                "user_key": USER_KEY,
+                "device_id": device_pk,
+                "device_identifier": DEVICE_ID,
+                "type": "Fight",
+                "payload": {},
+                "status": status,
+                "priority": 0,
+            }
+            for _ in range(min(CHUNK, count - start))
+        ]
+        session.execute(insert(Task), rows)
+    session.commit()
+
+
+def _time_queue_query(session: Session, repeat: int) -> float:
+    stmt = TaskService(session)._pending_queue(
+        user_key=USER_KEY, device_identifier=DEVICE_ID
+    ).limit(1)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        session.execute(stmt).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def _query_plan(session: Session) -> str:
+    if session.get_bind().dialect.name != "sqlite":
+        return "-"
+    stmt = TaskService(session)._pending_queue(
+        user_key=USER_KEY, device_identifier=DEVICE_ID
+    ).limit(1)
+    compiled = stmt.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return "; ".join(row[-1] for row in rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file.")
+    parser.add_argument(
+        "--steps",
+        default="10000,100000,1000000",
+        help="Comma separated finished-task totals to measure at.",
+    )
+    parser.add_argument("--pending", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_queue.db'}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    later_indexes = _later_indexes()
+
+    with Session(engine) as session:
+        user = User(user_key=USER_KEY)
+        session.add(user)
+        session.flush()
+        device = Device(user_id=user.id, user_key=USER_KEY, device_id=DEVICE_ID)
+        session.add(device)
+        session.commit()
+        ids = (user.id, device.id)
+        _insert_tasks(session, ids, args.pending, TaskStatus.PENDING)
+
+        print(f"{'finished':>10} {'indexed ms':>11} {'baseline ms':>12}  plans")
+        finished = 0
+        for step in (int(value) for value in args.steps.split(",")):
+            _insert_tasks(session, ids, step - finished, TaskStatus.SUCCEEDED)
+            finished = step
+            indexed = _time_queue_query(session, args.repeat)
+            plan = _query_plan(session)
+
+            session.close()
+            for index in later_indexes:
+                index.drop(bind=engine)
+            # Fresh connections: a cached EXPLAIN never notices the schema change.
+            engine.dispose()
+            baseline = _time_queue_query(session, max(1, args.repeat // 10))
+            baseline_plan = _query_plan(session)
+            session.close()
+            for index in later_indexes:
+                index.create(bind=engine)
+            engine.dispose()
+
+            print(
+                f"{finished:>10} {indexed:>11.3f} {baseline:>12.3f}  "
+                f"{plan} | {baseline_plan}"
+            )
+
+
+if __name__ == "__main__":
+    main()
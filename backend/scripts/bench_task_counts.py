@@ -0,0 +1,129 @@
+"""Compare the maintained ``task_counts`` table with a raw ``GROUP BY`` on tasks.
+
+Generates ``--tasks`` tasks spread over ``--devices`` devices of ``--users``
+users directly in SQL (no ORM, so 10M rows stay feasible), seeds the
+counters with :func:`reconcile_task_counts` (the repair job's cost on an
+empty table) and then times, per query, the dashboard read from the
+counters against the aggregate it replaces, for one user and for the whole
+fleet::
+
+    PYTHONPATH=. python scripts/bench_task_counts.py --tasks 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.profile import active_profile, configure_engine
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Task, TaskCount
+from app.services.counters import read_device_counts, reconcile_task_counts
+
+# Rough live mix: mostly history, a few queued and in flight.
+_STATUS_BY_MOD_100 = (
+    "CASE WHEN n % 100 < 2 THEN 'PENDING' WHEN n % 100 < 3 THEN 'RUNNING' "
+    "WHEN n % 100 < 10 THEN 'FAILED' WHEN n % 100 < 12 THEN 'CANCELLED' "
+    "ELSE 'SUCCEEDED' END"
+)
+
+
+def _populate(session: Session, *, tasks: int, devices: int, users: int) -> None:
+    session.execute(
+        text(
+            "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq "
+            "WHERE n < :users) INSERT INTO users (id, user_key, revision) "
+            "SELECT n, 'user-' || n, 0 FROM seq"
+        ),
+        {"users": users},
+    )
+    session.execute(
+        text(
+            "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq "
+            "WHERE n < :devices) INSERT INTO devices "
+            "(id, user_id, user_key, device_id, status) "
+            "SELECT n, n % :users + 1, 'user-' || (n % :users + 1), "
+            "'device-' || n, 'online' FROM seq"
+        ),
+        {"devices": devices, "users": users},
+    )
+    session.execute(
+        text(
+            "WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq "
+            "WHERE n < :tasks - 1) INSERT INTO tasks "
+            "(task_uuid, user_id, user_key, device_id, device_identifier, type, "
+            "payload, status, priority, retry_count) "
+            "SELECT printf('%032x', n), d % :users + 1, "
+            "'user-' || (d % :users + 1), d, 'device-' || d, 'Fight', '{}', "
+            f"{_STATUS_BY_MOD_100}, 0, 0 "
+            "FROM (SELECT n, n % :devices + 1 AS d FROM seq)"
+        ),
+        {"tasks": tasks, "devices": devices, "users": users},
+    )
+    session.commit()
+
+
+def _timed(run: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--devices", type=int, default=2_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = Path(tempfile.mkdtemp()) / "bench_counts.db"
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    configure_engine(engine, active_profile())
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+
+    with session_factory() as session:
+        started = time.perf_counter()
+        _populate(session, tasks=args.tasks, devices=args.devices, users=args.users)
+        print(f"populate:           {time.perf_counter() - started:8.1f}s")
+
+        started = time.perf_counter()
+        reconcile_task_counts(session)
+        session.commit()
+        print(f"seed/repair:        {time.perf_counter() - started:8.1f}s")
+        session.execute(text("ANALYZE"))
+
+        user_key = "user-1"
+        grouped = select(Task.device_id, Task.status, func.count()).group_by(
+            Task.device_id, Task.status
+        )
+        timings = {
+            "user, counters": lambda: read_device_counts(session, user_key),
+            "user, GROUP BY": lambda: session.execute(
+                grouped.where(Task.user_key == user_key)
+            ).all(),
+            "fleet, counters": lambda: session.execute(
+                select(TaskCount.device_id, TaskCount.status, TaskCount.count)
+            ).all(),
+            "fleet, GROUP BY": lambda: session.execute(grouped).all(),
+        }
+        print(f"tasks/devices/users: {args.tasks}/{args.devices}/{args.users}")
+        for label, run in timings.items():
+            print(f"{label + ':':20s}{_timed(run, args.repeat):10.2f} ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""Load-test the agent protocol with a simulated fleet and report JSON.
+
+Migrates a fresh SQLite database (or uses ``--database-url``), starts uvicorn
+on it and runs ``--agents`` simulated agents against it, each polling
+``/maa/getTask`` and reporting ``Running`` then ``Succeeded`` through
+``/maa/reportStatus`` for every task it receives. Meanwhile an admin client
+enqueues tasks through ``POST /api/devices/{device_id}/tasks`` at
+``--enqueue-rate`` per second, spread over the fleet.
+
+The result is one JSON document: request throughput and p50/p95/p99
+latency per endpoint, dispatch delay (client-side enqueue response to the
+agent receiving the task; tasks received before the enqueue response are
+not sampled), task totals and the number of database lock errors the
+server logged. ``--baseline`` compares against an earlier
+result and exits non-zero on a regression beyond ``--tolerance``::
+
+    PYTHONPATH=. python scripts/load_fleet.py --agents 2000 --enqueue-rate 200 \\
+        --duration 30 --output fleet.json
+    PYTHONPATH=. python scripts/load_fleet.py --baseline fleet.json
+
+``--base-url`` targets an already running server instead; lock errors are
+then not counted, since the server log is not available.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+USER_KEY = "fleet-user"
+
+# SQLite, PostgreSQL and MySQL wordings of a lock conflict.
+_LOCK_ERROR = re.compile(
+    r"database is locked|deadlock detected|could not obtain lock|Lock wait timeout",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Recorder:
+    """Samples shared by every simulated client of one run."""
+
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    enqueued_at: dict[str, float] = field(default_factory=dict)
+    received: set[str] = field(default_factory=set)
+    dispatch_delays: list[float] = field(default_factory=list)
+    polls: int = 0
+    empty_polls: int = 0
+    completed: int = 0
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            return None
+        return response
+
+
+def _migrate(database_url: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "MAA_DATABASE_URL": database_url},
+        check=True,
+        capture_output=True,
+    )
+
+
+def _start_server(
+    port: int, workers: int, database_url: str, log_path: Path
+) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MAA_DATABASE_URL": database_url,
+        # The fleet is driven by the benchmark, not by recurring schedules.
+        "MAA_SCHEDULER_ENABLED": "false",
+    }
+    with log_path.open("wb") as log:
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+                "--log-level",
+                "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+
+
+async def _wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/healthz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def _agent(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    device: str,
+    stop_at: float,
+    args: argparse.Namespace,
+) -> None:
+    poll: dict[str, Any] = {"user": USER_KEY, "device": device, "agentVersion": "load"}
+    capabilities = {}
+    if args.max_tasks > 1:
+        capabilities["maxTasks"] = args.max_tasks
+    if args.long_poll > 0:
+        capabilities["longPoll"] = args.long_poll
+    if capabilities:
+        poll["capabilities"] = capabilities
+    # Agents do not start in lockstep.
+    await asyncio.sleep(random.uniform(0, args.poll_interval or 1.0))
+    while time.monotonic() < stop_at:
+        response = await recorder.request(
+            client, "getTask", "POST", "/maa/getTask", json=poll
+        )
+        if response is None:
+            await asyncio.sleep(1.0)
+            continue
+        body = response.json()
+        recorder.polls += 1
+        if not body["tasks"]:
+            recorder.empty_polls += 1
+        for task in body["tasks"]:
+            recorder.received.add(task["id"])
+            enqueued_at = recorder.enqueued_at.pop(task["id"], None)
+            if enqueued_at is not None:
+                recorder.dispatch_delays.append(time.perf_counter() - enqueued_at)
+            await _run_task(client, recorder, device, task["id"], args.task_seconds)
+        if body["tasks"] and args.long_poll <= 0:
+            continue
+        interval = args.poll_interval or body.get("pollInterval") or 1.0
+        await asyncio.sleep(min(interval, max(stop_at - time.monotonic(), 0)))
+
+
+async def _run_task(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    device: str,
+    task_id: str,
+    task_seconds: float,
+) -> None:
+    report = {"user": USER_KEY, "device": device, "taskId": task_id}
+    await recorder.request(
+        client,
+        "reportStatus",
+        "POST",
+        "/maa/reportStatus",
+        json={**report, "status": "Running"},
+    )
+    if task_seconds > 0:
+        await asyncio.sleep(task_seconds)
+    response = await recorder.request(
+        client,
+        "reportStatus",
+        "POST",
+        "/maa/reportStatus",
+        json={**report, "status": "Succeeded", "log": "load test"},
+    )
+    if response is not None:
+        recorder.completed += 1
+
+
+async def _enqueuer(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    devices: list[str],
+    stop_at: float,
+    rate: float,
+) -> None:
+    if rate <= 0:
+        return
+    pending: set[asyncio.Task[None]] = set()
+
+    async def enqueue(device: str) -> None:
+        response = await recorder.request(
+            client,
+            "enqueue",
+            "POST",
+            f"/api/devices/{device}/tasks",
+            params={"user": USER_KEY},
+            json={"type": "Fight", "params": {"stage": "1-7"}},
+        )
+        if response is None:
+            return
+        task_uuid = response.json()["task_uuid"]
+        # A fast agent can receive the task before this response arrives.
+        if task_uuid not in recorder.received:
+            recorder.enqueued_at[task_uuid] = time.perf_counter()
+
+    # Open loop: enqueues are fired on schedule whether or not earlier ones
+    # have returned, so a slow server shows up as latency, not lower load.
+    next_at = time.monotonic()
+    while next_at < stop_at:
+        task = asyncio.create_task(enqueue(random.choice(devices)))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        next_at += 1 / rate
+        await asyncio.sleep(max(next_at - time.monotonic(), 0))
+    await asyncio.gather(*pending)
+
+
+def _summary(samples: list[float], duration: float | None = None) -> dict[str, Any]:
+    summary: dict[str, Any] = {"count": len(samples)}
+    if duration:
+        summary["per_second"] = round(len(samples) / duration, 1)
+    if samples:
+        if len(samples) > 1:
+            cuts = statistics.quantiles(samples, n=100)
+        else:
+            cuts = samples * 99
+        summary.update(
+            p50_ms=round(cuts[49] * 1000, 2),
+            p95_ms=round(cuts[94] * 1000, 2),
+            p99_ms=round(cuts[98] * 1000, 2),
+            max_ms=round(max(samples) * 1000, 2),
+        )
+    return summary
+
+
+async def _drive(base_url: str, args: argparse.Namespace) -> dict[str, Any]:
+    devices = [f"fleet-{index:05d}" for index in range(args.agents)]
+    limits = httpx.Limits(
+        max_connections=args.connections, max_keepalive_connections=args.connections
+    )
+    timeout = httpx.Timeout(60.0 + max(args.long_poll, 0))
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=timeout
+    ) as client:
+        # Register every device first so the measured run is steady state.
+        registration = Recorder()
+        for start in range(0, len(devices), args.connections):
+            await asyncio.gather(
+                *(
+                    registration.request(
+                        client,
+                        "register",
+                        "POST",
+                        "/maa/getTask",
+                        json={"user": USER_KEY, "device": device},
+                    )
+                    for device in devices[start : start + args.connections]
+                )
+            )
+
+        recorder = Recorder()
+        started = time.monotonic()
+        stop_at = started + args.duration
+        await asyncio.gather(
+            _enqueuer(client, recorder, devices, stop_at, args.enqueue_rate),
+            *(_agent(client, recorder, device, stop_at, args) for device in devices),
+        )
+        elapsed = time.monotonic() - started
+
+    endpoints = {
+        name: {**_summary(samples, elapsed), "errors": recorder.errors.get(name, 0)}
+        for name, samples in sorted(recorder.latencies.items())
+    }
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "endpoints": endpoints,
+        "requests_per_second": round(
+            sum(len(samples) for samples in recorder.latencies.values()) / elapsed, 1
+        ),
+        "dispatch_delay": _summary(recorder.dispatch_delays),
+        "tasks": {
+            "enqueued": len(recorder.latencies.get("enqueue", [])),
+            "dispatched": len(recorder.received),
+            "completed": recorder.completed,
+            "not_dispatched": len(recorder.enqueued_at),
+        },
+        "polls": {
+            "total": recorder.polls,
+            "empty_ratio": round(recorder.empty_polls / recorder.polls, 4)
+            if recorder.polls
+            else None,
+        },
+    }
+
+
+def _regressions(
+    result: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Latency percentiles that grew, or throughputs that fell, past tolerance."""
+
+    found = []
+    for name, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key in current and key in previous:
+                if current[key] > previous[key] * (1 + tolerance):
+                    found.append(f"{name} {key}: {previous[key]} -> {current[key]}")
+        if current["per_second"] < previous["per_second"] * (1 - tolerance):
+            throughputs = f"{previous['per_second']} -> {current['per_second']}"
+            found.append(f"{name} per_second: {throughputs}")
+    for key in ("p95_ms", "p99_ms"):
+        current_delay = result["dispatch_delay"].get(key)
+        previous_delay = baseline.get("dispatch_delay", {}).get(key)
+        if current_delay is not None and previous_delay is not None:
+            if current_delay > previous_delay * (1 + tolerance):
+                found.append(
+                    f"dispatch_delay {key}: {previous_delay} -> {current_delay}"
+                )
+    if result.get("lock_errors") and not baseline.get("lock_errors"):
+        found.append(f"lock_errors: 0 -> {result['lock_errors']}")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--enqueue-rate", type=float, default=50.0, help="Admin enqueues per second."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between empty polls (0 follows the server's pollInterval).",
+    )
+    parser.add_argument("--long-poll", type=float, default=0.0)
+    parser.add_argument("--max-tasks", type=int, default=1)
+    parser.add_argument(
+        "--task-seconds", type=float, default=0.0, help="Simulated execution time."
+    )
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", help="Defaults to a fresh SQLite file.")
+    parser.add_argument("--base-url", help="Use a running server instead.")
+    parser.add_argument("--output", type=Path, help="Also write the JSON here.")
+    parser.add_argument("--baseline", type=Path, help="Earlier result to compare.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    config = {
+        key: vars(args)[key]
+        for key in (
+            "agents",
+            "duration",
+            "enqueue_rate",
+            "poll_interval",
+            "long_poll",
+            "max_tasks",
+            "task_seconds",
+            "connections",
+            "workers",
+        )
+    }
+    if args.base_url:
+        result = asyncio.run(_drive(args.base_url, args))
+        result["lock_errors"] = None
+    else:
+        workdir = Path(tempfile.mkdtemp())
+        database_url = args.database_url or f"sqlite:///{workdir / 'fleet.db'}"
+        log_path = workdir / "server.log"
+        _migrate(database_url)
+        server = _start_server(args.port, args.workers, database_url, log_path)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(_wait_ready(base_url))
+            result = asyncio.run(_drive(base_url, args))
+        finally:
+            server.terminate()
+            server.wait()
+        result["lock_errors"] = len(_LOCK_ERROR.findall(log_path.read_text()))
+        config["database"] = database_url.split(":", 1)[0]
+
+    document = {"config": config, **result}
+    text = json.dumps(document, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != document["config"]:
+            print("warning: baseline was run with another config", file=sys.stderr)
+        regressions = _regressions(document, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Hammer one device queue from many threads and check no task is dispatched twice."""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.profile import active_profile, configure_engine
+from app.db.session import Base, _build_engine_kwargs
+from app.models import Device, Task, TaskStatus, User
+from app.services import TaskService
+
+USER_KEY = "stress-user"
+DEVICE_ID = "stress-device"
+
+
+def seed(session_factory: sessionmaker, count: int) -> None:
+    session = session_factory()
+    try:
+        user = User(user_key=USER_KEY)
+        session.add(user)
+        session.flush()
+        device = Device(user_id=user.id, user_key=USER_KEY, device_id=DEVICE_ID)
+        session.add(device)
+        session.flush()
+        session.add_all(
+            Task(
+                user_id=user.id,
+                user_key=USER_KEY,
+                device_id=device.id,
+                device_identifier=DEVICE_ID,
+                type="Fight",
+                payload={"seq": index},
+                priority=index % 3,
+                status=TaskStatus.PENDING,
+            )
+            for index in range(count)
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+def worker(session_factory: sessionmaker, claimed: list[str], lock: threading.Lock) -> None:
+    session = session_factory()
+    try:
+        service = TaskService(session)
+        while True:
+            task = service.fetch_next_pending_task(
+                user_key=USER_KEY, device_identifier=DEVICE_ID
+            )
+            session.commit()
+            if task is None:
+                return
+            with lock:
+                claimed.append(task.task_uuid)
+    finally:
+        session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", help="Defaults to a throwaway SQLite file.")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument(
+        "--no-returning",
+        action="store_true",
+        help="Exercise the guarded per-row fallback instead of UPDATE ... RETURNING.",
+    )
+    args = parser.parse_args()
+
+    url = args.database_url
+    if url is None:
+        url = f"sqlite:///{Path(tempfile.mkdtemp()) / 'stress_claim.db'}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    configure_engine(engine, active_profile())
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if args.no_returning:
+        engine.dialect.update_returning = False
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    seed(session_factory, args.tasks)
+
+    claimed: list[str] = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(session_factory, claimed, lock))
+        for _ in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    duplicates = [uuid for uuid, seen in Counter(claimed).items() if seen > 1]
+    print(
+        f"claimed={len(claimed)} unique={len(set(claimed))} "
+        f"expected={args.tasks} duplicates={len(duplicates)} "
+        f"profile={active_profile().name} elapsed={elapsed:.2f}s"
+    )
+    if duplicates or len(set(claimed)) != args.tasks:
+        raise SystemExit("double dispatch or lost task detected")
+
+
+if __name__ == "__main__":
+    main()
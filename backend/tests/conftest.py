@@ -0,0 +1,68 @@
+"""Throwaway SQLite databases and an in-process client for the test suite.
+
+Service tests get a fresh file-backed database per test; the HTTP tests
+share the application's own engine, pointed at a temporary file before
+anything reads the settings.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+from uuid import uuid4
+
+os.environ.setdefault(
+    "MAA_DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'maa_test.db'}"
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.db.profile import active_profile, configure_engine  # noqa: E402
+from app.db.session import Base, _build_engine_kwargs  # noqa: E402
+from app.services import DeviceRef, DeviceService  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Iterator[Engine]:
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url, **_build_engine_kwargs(url))
+    configure_engine(engine, active_profile())
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def device(session_factory: sessionmaker[Session]) -> DeviceRef:
+    """A registered device of a user of its own.
+
+    Identities are cached per process, so every test uses fresh keys.
+    """
+
+    with session_factory() as session:
+        ref = DeviceService(session).touch_device(
+            user_key=f"user-{uuid4().hex}", device_identifier="device"
+        )
+        session.commit()
+    return ref
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    from app.db.session import engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        yield client
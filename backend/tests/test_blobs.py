@@ -0,0 +1,66 @@
+"""Task outputs round-trip through the content-addressed blob store."""
+
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Blob, TaskStatus
+from app.services import BlobStore, DeviceRef, StatusReport, TaskService
+
+LOG = "[MAA] Fight 1-7 x6\n" * 200
+RESULT = {"drops": {"30012": 14, "30011": 3}, "sanity": 0}
+
+
+def test_outputs_round_trip_and_dedup(
+    session_factory: sessionmaker[Session], device: DeviceRef
+) -> None:
+    with session_factory() as session:
+        service = TaskService(session)
+        tasks = [
+            service.enqueue_task(device=device, task_type="Fight", payload={})
+            for _ in range(3)
+        ]
+        session.commit()
+        first, second, third = tasks
+        # Two tasks finish with the same log and result: one blob each.
+        for task, stats in ((first, {"runs": 1}), (second, {"runs": 2})):
+            service.update_status(
+                task,
+                status=TaskStatus.SUCCEEDED,
+                log=LOG,
+                result=RESULT,
+                stats=stats,
+            )
+        # The batch path shares blobs with what is already stored.
+        service.apply_reports(
+            device=device,
+            reports=[
+                StatusReport(
+                    third.task_uuid, TaskStatus.FAILED, log=LOG, stats={"runs": 1}
+                )
+            ],
+        )
+        session.commit()
+        session.refresh(third)
+
+        outputs = service.load_outputs(tasks)
+        finished = {"log": LOG, "result": RESULT}
+        assert outputs[first.id] == {**finished, "stats": {"runs": 1}}
+        assert outputs[second.id] == {**finished, "stats": {"runs": 2}}
+        assert outputs[third.id] == {"log": LOG, "result": None, "stats": {"runs": 1}}
+        assert first.log_digest == second.log_digest == third.log_digest
+        assert first.stats_digest == third.stats_digest
+        # log, result and the two distinct stats
+        assert session.scalar(select(func.count()).select_from(Blob)) == 4
+
+        store = BlobStore(session)
+        assert store.put(LOG.encode()) == first.log_digest
+        # Duplicates within one call are inserted once as well.
+        stats = b'{"runs":3}'
+        assert len(set(store.put_many([stats, stats]))) == 1
+        assert session.scalar(select(func.count()).select_from(Blob)) == 5
+        blob = session.get(Blob, first.log_digest)
+        assert blob is not None and blob.size == len(LOG.encode())
+        assert blob.codec != "identity" and len(blob.data) < blob.size
+        assert store.get(first.log_digest) == LOG.encode()
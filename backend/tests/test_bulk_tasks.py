@@ -0,0 +1,35 @@
+"""Bulk task creation answers in the order the devices were named."""
+
+from __future__ import annotations
+
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+
+def test_bulk_create_keeps_device_order(client: TestClient) -> None:
+    user = f"user-{uuid4().hex}"
+    for device in ("alpha", "bravo", "charlie"):
+        client.post("/maa/getTask", json={"user": user, "device": device})
+
+    response = client.post(
+        "/api/tasks/bulk",
+        params={"user": user},
+        json={
+            "selector": {"devices": ["charlie", "ghost", "alpha", "charlie"]},
+            "task": {"type": "Fight", "params": {"stage": "1-7"}},
+        },
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["created"] == 2
+    assert body["device_ids"] == ["charlie", "alpha"]
+    assert body["missing_devices"] == ["ghost"]
+    created = zip(body["device_ids"], body["task_uuids"], strict=True)
+    for device_id, task_uuid in created:
+        (task,) = client.get(
+            f"/api/devices/{device_id}/tasks", params={"user": user}
+        ).json()
+        assert task["task_uuid"] == task_uuid
+    assert client.get("/api/devices/bravo/tasks", params={"user": user}).json() == []
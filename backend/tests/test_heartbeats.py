@@ -0,0 +1,67 @@
+"""Buffered heartbeats read the same before and after they are flushed."""
+
+from __future__ import annotations
+
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import flush_heartbeats, heartbeat_buffer
+
+
+def _last_seen(client: TestClient, user_key: str) -> str:
+    response = client.get("/api/devices", params={"user": user_key})
+    response.raise_for_status()
+    (device,) = response.json()
+    return device["last_seen_at"]
+
+
+@pytest.mark.parametrize("fast_json", [True, False], ids=["fast", "default"])
+def test_last_seen_at_survives_flush(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, fast_json: bool
+) -> None:
+    monkeypatch.setattr(settings, "fast_json", fast_json)
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    client.post("/maa/getTask", json=agent).raise_for_status()
+    # The second heartbeat only changes last_seen_at, so it stays buffered.
+    client.post("/maa/getTask", json=agent).raise_for_status()
+    assert heartbeat_buffer.enabled
+
+    buffered = _last_seen(client, agent["user"])
+    with SessionLocal() as session:
+        flush_heartbeats(session)
+    flushed = _last_seen(client, agent["user"])
+
+    assert buffered == flushed
+    assert flushed.endswith("Z")
+
+
+def test_only_device_list_etag_follows_heartbeats(client: TestClient) -> None:
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    client.post("/maa/getTask", json=agent).raise_for_status()
+    urls = {
+        "devices": "/api/devices",
+        "tasks": f"/api/devices/{agent['device']}/tasks",
+        "dashboard": "/api/dashboard",
+    }
+
+    def etags() -> dict[str, str]:
+        return {
+            name: client.get(url, params={"user": agent["user"]}).headers["ETag"]
+            for name, url in urls.items()
+        }
+
+    before = etags()
+    client.post("/maa/getTask", json=agent).raise_for_status()
+    buffered = etags()
+    with SessionLocal() as session:
+        flush_heartbeats(session)
+
+    assert buffered["devices"] != before["devices"]
+    assert etags() == buffered
+    assert {name: buffered[name] for name in ("tasks", "dashboard")} == {
+        name: before[name] for name in ("tasks", "dashboard")
+    }
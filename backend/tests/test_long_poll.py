@@ -0,0 +1,69 @@
+"""Long polls pick up tasks enqueued without an in-process wake-up."""
+
+from __future__ import annotations
+
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Task, TaskStatus
+from app.services import DeviceService
+
+RECHECK = 0.2
+
+
+def _enqueue_elsewhere(user_key: str, device_identifier: str) -> str:
+    """Insert a pending task the way another worker would: no local wake-up."""
+
+    task_uuid = uuid4().hex
+    with SessionLocal() as session:
+        device = DeviceService(session).resolve_device(
+            user_key=user_key, device_identifier=device_identifier
+        )
+        assert device is not None
+        session.execute(
+            insert(Task).values(
+                task_uuid=task_uuid,
+                user_id=device.user_id,
+                user_key=user_key,
+                device_id=device.id,
+                device_identifier=device_identifier,
+                type="LinkStart",
+                payload={},
+                status=TaskStatus.PENDING,
+                priority=0,
+                retry_count=0,
+            )
+        )
+        session.commit()
+    return task_uuid
+
+
+def test_long_poll_sees_tasks_from_other_workers(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "long_poll_recheck_seconds", RECHECK)
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    client.post("/maa/getTask", json=agent).raise_for_status()
+
+    enqueued: list[str] = []
+    timer = threading.Timer(
+        0.5, lambda: enqueued.append(_enqueue_elsewhere(agent["user"], "agent"))
+    )
+    timer.start()
+    started = time.monotonic()
+    response = client.post(
+        "/maa/getTask", json={**agent, "capabilities": {"longPoll": 10}}
+    )
+    elapsed = time.monotonic() - started
+    timer.join()
+
+    assert [task["id"] for task in response.json()["tasks"]] == enqueued
+    # Held well short of the 10 s the agent asked for.
+    assert elapsed < 0.5 + RECHECK + 2
@@ -0,0 +1,127 @@
+"""Keyset pages of the admin lists and their conditional requests."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, literal_column
+
+from app.db.session import SessionLocal
+from app.models import Task, TaskStatus
+from app.services import DeviceService
+
+CREATED_AT = datetime(2026, 10, 1, 4, 5, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def agent(client: TestClient) -> dict[str, str]:
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    client.post("/maa/getTask", json=agent).raise_for_status()
+    return agent
+
+
+def _seed_ties(
+    agent: dict[str, str], count: int, created_at: object = CREATED_AT
+) -> list[str]:
+    """Insert ``count`` tasks sharing one ``created_at``, oldest id first."""
+
+    task_uuids = [uuid4().hex for _ in range(count)]
+    with SessionLocal() as session:
+        device = DeviceService(session).resolve_device(
+            user_key=agent["user"], device_identifier=agent["device"]
+        )
+        assert device is not None
+        for task_uuid in task_uuids:
+            session.execute(
+                insert(Task).values(
+                    task_uuid=task_uuid,
+                    user_id=device.user_id,
+                    user_key=device.user_key,
+                    device_id=device.id,
+                    device_identifier=device.device_id,
+                    type="Fight",
+                    payload={},
+                    status=TaskStatus.PENDING,
+                    priority=0,
+                    retry_count=0,
+                    created_at=created_at,
+                )
+            )
+        session.commit()
+    return task_uuids
+
+
+def _tasks_url(agent: dict[str, str]) -> str:
+    return f"/api/devices/{agent['device']}/tasks"
+
+
+# SQLite keeps a bound datetime as "... 04:05:00.000000" but the
+# CURRENT_TIMESTAMP server default as "... 04:05:00".
+@pytest.mark.parametrize(
+    "created_at",
+    [CREATED_AT, literal_column("'2026-10-01 04:05:00'")],
+    ids=["bound", "server-default"],
+)
+def test_pages_break_created_at_ties_by_id(
+    client: TestClient, agent: dict[str, str], created_at: object
+) -> None:
+    task_uuids = _seed_ties(agent, 7, created_at)
+    params: dict[str, object] = {"user": agent["user"], "limit": 3}
+    pages: list[list[str]] = []
+    while True:
+        response = client.get(_tasks_url(agent), params=params)
+        assert response.status_code == 200
+        pages.append([task["task_uuid"] for task in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [uuid for page in pages for uuid in page] == task_uuids[::-1]
+
+
+def test_malformed_cursor_is_rejected(
+    client: TestClient, agent: dict[str, str]
+) -> None:
+    for url in ("/api/devices", _tasks_url(agent)):
+        response = client.get(url, params={"user": agent["user"], "cursor": "nope"})
+        assert response.status_code == 400
+
+
+def test_if_none_match_returns_304_until_the_page_changes(
+    client: TestClient, agent: dict[str, str]
+) -> None:
+    _seed_ties(agent, 2)
+    params = {"user": agent["user"], "limit": 1}
+    first = client.get(_tasks_url(agent), params=params)
+    etag = first.headers["ETag"]
+
+    cached = client.get(
+        _tasks_url(agent), params=params, headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+
+    # Another page of the same list has a validator of its own.
+    next_page = client.get(
+        _tasks_url(agent),
+        params={**params, "cursor": first.headers["X-Next-Cursor"]},
+        headers={"If-None-Match": etag},
+    )
+    assert next_page.status_code == 200
+
+    client.post(
+        _tasks_url(agent),
+        params={"user": agent["user"]},
+        json={"type": "Fight", "params": {"stage": "1-7"}},
+    ).raise_for_status()
+    changed = client.get(
+        _tasks_url(agent), params=params, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
@@ -0,0 +1,60 @@
+"""Batched status reports are judged one by one, in request order."""
+
+from __future__ import annotations
+
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.models import TaskStatus
+
+
+def _dispatch(client: TestClient, agent: dict[str, str]) -> str:
+    client.post(
+        f"/api/devices/{agent['device']}/tasks",
+        params={"user": agent["user"]},
+        json={"type": "Fight", "params": {"stage": "1-7"}},
+    ).raise_for_status()
+    (task,) = client.post("/maa/getTask", json=agent).json()["tasks"]
+    return task["id"]
+
+
+def test_batch_reports_outcome_per_report(client: TestClient) -> None:
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    other = {**agent, "device": "other"}
+    for device in (agent, other):
+        client.post("/maa/getTask", json=device).raise_for_status()
+    task_id = _dispatch(client, agent)
+    foreign_id = _dispatch(client, other)
+    unknown_id = uuid4().hex
+
+    response = client.post(
+        "/maa/reportStatusBatch",
+        json={
+            **agent,
+            "reports": [
+                {"taskId": unknown_id, "status": TaskStatus.SUCCEEDED.value},
+                {
+                    "taskId": task_id,
+                    "status": TaskStatus.SUCCEEDED.value,
+                    "log": "done",
+                },
+                {"taskId": foreign_id, "status": TaskStatus.SUCCEEDED.value},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    assert [
+        (result["taskId"], result["status"]) for result in response.json()["results"]
+    ] == [(unknown_id, 404), (task_id, 200), (foreign_id, 400)]
+    tasks = client.get(
+        f"/api/devices/{agent['device']}/tasks", params={"user": agent["user"]}
+    ).json()
+    assert [(task["task_uuid"], task["status"]) for task in tasks] == [
+        (task_id, TaskStatus.SUCCEEDED.value)
+    ]
+    (foreign,) = client.get(
+        f"/api/devices/{other['device']}/tasks", params={"user": other["user"]}
+    ).json()
+    assert foreign["status"] == TaskStatus.RUNNING.value
@@ -0,0 +1,83 @@
+"""Concurrent schedulers materialize each due run of a schedule once."""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Schedule, Task
+from app.services import DeviceRef
+from app.services.schedule import ScheduleService
+
+THREADS = 4
+INTERVAL = 3600
+
+
+@pytest.mark.parametrize("returning", [True, False], ids=["returning", "per-row"])
+def test_concurrent_materialize_creates_one_task_per_run(
+    engine: Engine,
+    session_factory: sessionmaker[Session],
+    device: DeviceRef,
+    monkeypatch: pytest.MonkeyPatch,
+    returning: bool,
+) -> None:
+    monkeypatch.setattr(engine.dialect, "update_returning", returning)
+    started_at = datetime.now(timezone.utc)
+    with session_factory() as session:
+        service = ScheduleService(session)
+        schedule_ids = [
+            service.create_schedule(
+                device=device,
+                task_type="Fight",
+                payload={"stage": stage},
+                interval_seconds=INTERVAL,
+                start_at=started_at,
+            ).id
+            for stage in ("1-7", "CE-6")
+        ]
+        session.commit()
+
+    # A start in the past only fixes the phase: the first run is one
+    # interval after ``started_at``.
+    now = started_at + timedelta(seconds=INTERVAL + 1)
+    results: list[dict[int, datetime | None]] = []
+    errors: list[BaseException] = []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def materialize() -> None:
+        try:
+            start.wait()
+            with session_factory() as session:
+                next_runs = ScheduleService(session).materialize(schedule_ids, now=now)
+                session.commit()
+            with lock:
+                results.append(next_runs)
+        except BaseException as exc:  # surfaced below, not lost in the thread
+            errors.append(exc)
+
+    threads = [threading.Thread(target=materialize) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    next_run = started_at + timedelta(seconds=2 * INTERVAL)
+    assert all(
+        next_runs == dict.fromkeys(schedule_ids, next_run) for next_runs in results
+    )
+    with session_factory() as session:
+        tasks = session.scalar(
+            select(func.count()).select_from(Task).where(Task.device_id == device.id)
+        )
+        advanced = session.scalars(
+            select(Schedule.next_run_at).where(Schedule.id.in_(schedule_ids))
+        ).all()
+    assert tasks == len(schedule_ids)
+    assert {run.replace(tzinfo=timezone.utc) for run in advanced} == {next_run}
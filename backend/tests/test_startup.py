@@ -0,0 +1,107 @@
+"""Importing the app is free of side effects and a worker starts in budget.
+
+Both checks run in fresh interpreters, since this process has long since
+imported and configured everything. ``benchmarks/bench_startup.py`` times
+the same cold start with pytest-benchmark.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+
+from app.db.session import Base
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROUNDS = 3
+BUDGET_MS = float(os.environ.get("MAA_BENCH_STARTUP_BUDGET_MS", 2500))
+
+COLD_START = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+application = app.main.app
+built = time.perf_counter()
+
+async def start():
+    async with application.router.lifespan_context(application):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "build_ms": (built - imported) * 1000,
+    "lifespan_ms": (ready - built) * 1000,
+}))
+"""
+
+_IMPORT_ONLY = """
+import json, logging
+import app.main
+from app.core.config import get_settings
+from app.core.lazy import is_built
+from app.db.session import engine
+print(json.dumps({
+    "settings_loaded": get_settings.cache_info().currsize > 0,
+    "engine_built": is_built(engine),
+    "log_handlers": len(logging.getLogger().handlers),
+}))
+"""
+
+
+def probe(code: str, database_url: str) -> dict[str, Any]:
+    """Run ``code`` in a fresh interpreter; return its last line as JSON."""
+
+    env = {**os.environ, "MAA_DATABASE_URL": database_url}
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def startup_database(tmp_path: Path) -> str:
+    """A SQLite database with the full schema for the lifespan jobs."""
+
+    database_url = f"sqlite:///{tmp_path / 'startup.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return database_url
+
+
+def test_import_has_no_side_effects(tmp_path: Path) -> None:
+    missing = tmp_path / "missing"
+    state = probe(_IMPORT_ONLY, f"sqlite:///{missing / 'app.db'}")
+
+    assert state == {"settings_loaded": False, "engine_built": False, "log_handlers": 0}
+    assert not missing.exists()
+
+
+def test_worker_cold_start_within_budget(tmp_path: Path) -> None:
+    database_url = startup_database(tmp_path)
+    samples: list[float] = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        phases = probe(COLD_START, database_url)
+        samples.append(time.perf_counter() - started)
+
+    median_ms = statistics.median(samples) * 1000
+    assert median_ms <= BUDGET_MS, (
+        f"worker cold start {median_ms:.0f} ms exceeds the {BUDGET_MS:.0f} ms "
+        f"budget ({', '.join(f'{k} {v:.0f}' for k, v in phases.items())})"
+    )
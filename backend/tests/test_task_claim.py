@@ -0,0 +1,88 @@
+"""Concurrent pollers of one device queue never receive the same task."""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Task, TaskStatus
+from app.services import DeviceRef, TaskService
+
+TASKS = 300
+THREADS = 8
+
+
+def _seed(session_factory: sessionmaker[Session], device: DeviceRef) -> None:
+    with session_factory() as session:
+        session.execute(
+            insert(Task),
+            [
+                {
+                    "task_uuid": f"{index:032x}",
+                    "user_id": device.user_id,
+                    "user_key": device.user_key,
+                    "device_id": device.id,
+                    "device_identifier": device.device_id,
+                    "type": "Fight",
+                    "payload": {"seq": index},
+                    "status": TaskStatus.PENDING,
+                    "priority": index % 3,
+                    "retry_count": 0,
+                }
+                for index in range(TASKS)
+            ],
+        )
+        session.commit()
+
+
+@pytest.mark.parametrize("batch", [1, 3])
+@pytest.mark.parametrize("returning", [True, False], ids=["returning", "per-row"])
+def test_concurrent_claims_dispatch_each_task_once(
+    engine: Engine,
+    session_factory: sessionmaker[Session],
+    device: DeviceRef,
+    monkeypatch: pytest.MonkeyPatch,
+    returning: bool,
+    batch: int,
+) -> None:
+    monkeypatch.setattr(engine.dialect, "update_returning", returning)
+    _seed(session_factory, device)
+    claimed: list[str] = []
+    errors: list[BaseException] = []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def poll() -> None:
+        try:
+            start.wait()
+            with session_factory() as session:
+                service = TaskService(session)
+                while True:
+                    tasks = service.claim_pending_tasks(
+                        user_key=device.user_key,
+                        device_identifier=device.device_id,
+                        limit=batch,
+                    )
+                    session.commit()
+                    if not tasks:
+                        return
+                    with lock:
+                        claimed.extend(task.task_uuid for task in tasks)
+        except BaseException as exc:  # surfaced below, not lost in the thread
+            errors.append(exc)
+
+    threads = [threading.Thread(target=poll) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    duplicates = [uuid for uuid, seen in Counter(claimed).items() if seen > 1]
+    assert duplicates == []
+    assert len(claimed) == TASKS
@@ -0,0 +1,148 @@
+"""``task_counts`` stays equal to a GROUP BY of ``tasks`` across transitions."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Task, TaskCount, TaskStatus
+from app.services import (
+    ArchiveService,
+    DeviceRef,
+    DeviceService,
+    ReportOutcome,
+    StatusReport,
+    TaskArchive,
+    TaskService,
+    TaskSpec,
+)
+from app.services.counters import reconcile_task_counts
+
+LEASE = 60.0
+
+
+def _assert_counts_match(session: Session) -> None:
+    stored = {
+        (row.device_id, row.status): row.count
+        for row in session.execute(select(TaskCount)).scalars()
+        if row.count
+    }
+    actual = {
+        (device_id, status): count
+        for device_id, status, count in session.execute(
+            select(Task.device_id, Task.status, func.count()).group_by(
+                Task.device_id, Task.status
+            )
+        )
+    }
+    assert stored == actual
+    # The periodic repair job, which computes the same aggregate, agrees.
+    assert reconcile_task_counts(session) == 0
+    session.rollback()
+
+
+def _status(session: Session, task_uuid: str) -> TaskStatus | None:
+    # A column read, not the (possibly stale) object in the identity map.
+    return session.scalar(select(Task.status).where(Task.task_uuid == task_uuid))
+
+
+@pytest.mark.parametrize("returning", [True, False], ids=["returning", "select"])
+def test_task_counts_follow_every_transition(
+    engine: Engine,
+    session_factory: sessionmaker[Session],
+    device: DeviceRef,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    returning: bool,
+) -> None:
+    monkeypatch.setattr(engine.dialect, "update_returning", returning)
+    monkeypatch.setattr(engine.dialect, "delete_returning", returning)
+    later = datetime.now(timezone.utc) + timedelta(hours=1)
+    with session_factory() as session:
+        service = TaskService(session)
+        other = DeviceService(session).touch_device(
+            user_key=device.user_key, device_identifier="other"
+        )
+        session.commit()
+
+        def step(action: Callable[[], object]) -> None:
+            action()
+            session.commit()
+            _assert_counts_match(session)
+
+        def claim(limit: int, lease_seconds: float | None = LEASE) -> list[str]:
+            tasks = service.claim_pending_tasks(
+                user_key=device.user_key,
+                device_identifier=device.device_id,
+                limit=limit,
+                lease_seconds=lease_seconds,
+            )
+            return [task.task_uuid for task in tasks]
+
+        def report(*reports: tuple[str, TaskStatus]) -> None:
+            outcomes = service.apply_reports(
+                device=device,
+                reports=[StatusReport(uuid, status) for uuid, status in reports],
+            )
+            assert set(outcomes) == {ReportOutcome.APPLIED}
+
+        for stage in ("1-7", "CE-6"):
+            step(
+                lambda stage=stage: service.enqueue_task(
+                    device=device, task_type="Fight", payload={"stage": stage}
+                )
+            )
+        step(
+            lambda: service.enqueue_many(
+                [
+                    TaskSpec(device=target, task_type="Fight", payload={"n": index})
+                    for index, target in enumerate([device, device, other, device])
+                ]
+            )
+        )
+
+        first, second, third = claim(3)
+        session.commit()
+        _assert_counts_match(session)
+        step(lambda: report((first, TaskStatus.RUNNING)))
+        step(
+            lambda: report(
+                (first, TaskStatus.SUCCEEDED),
+                (second, TaskStatus.RUNNING),
+                (second, TaskStatus.FAILED),
+                # Started, so its lease is gone and only the reaper applies.
+                (third, TaskStatus.RUNNING),
+            )
+        )
+
+        leased = claim(2)
+        session.commit()
+        step(lambda: service.release_expired_leases(now=later))
+        assert {_status(session, uuid) for uuid in leased} == {TaskStatus.PENDING}
+        assert _status(session, third) == TaskStatus.RUNNING
+
+        step(
+            lambda: service.reap_stuck_tasks(
+                default_timeout=1, max_retries=1, now=later
+            )
+        )
+        assert _status(session, third) == TaskStatus.PENDING
+        assert third in claim(5, lease_seconds=None)
+        session.commit()
+        step(lambda: report((third, TaskStatus.RUNNING)))
+        step(
+            lambda: service.reap_stuck_tasks(
+                default_timeout=1, max_retries=1, now=later
+            )
+        )
+        assert _status(session, third) == TaskStatus.FAILED
+
+        archive = ArchiveService(session, TaskArchive(tmp_path / "archive"))
+        step(lambda: archive.archive_batch(older_than=later, limit=100))
+        assert _status(session, first) is None
@@ -0,0 +1,154 @@
+"""Leases of batch-dispatched tasks across batches that outlast one lease."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.models import TaskStatus
+from app.services import DeviceRef, TaskService, device_key, task_notifier
+
+LEASE = 300.0
+
+
+def _claim_batch(
+    session_factory: sessionmaker[Session], device: DeviceRef, size: int
+) -> list[str]:
+    with session_factory() as session:
+        service = TaskService(session)
+        for index in range(size):
+            service.enqueue_task(
+                device=device, task_type="Fight", payload={"stage": f"1-{index}"}
+            )
+        session.commit()
+        claimed = service.claim_pending_tasks(
+            user_key=device.user_key,
+            device_identifier=device.device_id,
+            limit=size,
+            lease_seconds=LEASE,
+        )
+        session.commit()
+    return [task.task_uuid for task in claimed]
+
+
+def test_renewed_batch_outlasts_one_lease(
+    session_factory: sessionmaker[Session], device: DeviceRef
+) -> None:
+    started_at = datetime.now(timezone.utc)
+    batch = _claim_batch(session_factory, device, 3)
+    # Each task runs for 2/3 of a lease, so the batch takes twice as long as
+    # one lease; the agent renews the waiting tasks every third of a lease
+    # and the sweeper runs in between.
+    run_for = timedelta(seconds=LEASE * 2 / 3)
+    tick = timedelta(seconds=LEASE / 3)
+    waiting = list(batch)
+    clock = started_at
+    with session_factory() as session:
+        service = TaskService(session)
+        for index, task_uuid in enumerate(batch):
+            while clock < started_at + index * run_for:
+                clock += tick
+                waiting = service.renew_leases(
+                    device=device, task_uuids=waiting, lease_seconds=LEASE, now=clock
+                )
+                session.commit()
+                assert service.release_expired_leases(now=clock + tick / 2) == 0
+                session.commit()
+            task = service.get_by_uuid(task_uuid)
+            assert task is not None and task.status == TaskStatus.RUNNING
+            assert task.lease_expires_at is not None
+            service.mark_running(task)
+            session.commit()
+            waiting.remove(task_uuid)
+
+        assert clock - started_at > timedelta(seconds=LEASE)
+        tasks = [service.get_by_uuid(task_uuid) for task_uuid in batch]
+        assert all(
+            task is not None and task.lease_expires_at is None for task in tasks
+        )
+
+
+def test_unrenewed_batch_tail_goes_back_to_pending(
+    session_factory: sessionmaker[Session], device: DeviceRef
+) -> None:
+    batch = _claim_batch(session_factory, device, 3)
+    later = datetime.now(timezone.utc) + timedelta(seconds=LEASE * 2)
+    with session_factory() as session:
+        service = TaskService(session)
+        assert service.release_expired_leases(now=later) == 3
+        session.commit()
+        assert (
+            service.renew_leases(device=device, task_uuids=batch, lease_seconds=LEASE)
+            == []
+        )
+        statuses = {service.get_by_uuid(task_uuid).status for task_uuid in batch}
+        assert statuses == {TaskStatus.PENDING}
+
+
+def test_released_leases_wake_long_polls(
+    session_factory: sessionmaker[Session], device: DeviceRef
+) -> None:
+    _claim_batch(session_factory, device, 2)
+    later = datetime.now(timezone.utc) + timedelta(seconds=LEASE * 2)
+    key = device_key(device.user_key, device.device_id)
+
+    async def poll_during_sweep() -> bool:
+        waiter = task_notifier.subscribe(key)
+        try:
+            with session_factory() as session:
+                assert TaskService(session).release_expired_leases(now=later) == 2
+                await asyncio.sleep(0)
+                assert not waiter.done()
+                session.commit()
+            return await task_notifier.wait(waiter, 1)
+        finally:
+            task_notifier.unsubscribe(key, waiter)
+
+    assert asyncio.run(poll_during_sweep())
+
+
+def test_renew_leases_endpoint(client: TestClient) -> None:
+    agent = {"user": f"user-{uuid4().hex}", "device": "agent"}
+    response = client.post(
+        "/maa/getTask", json={**agent, "capabilities": {"maxTasks": 3}}
+    )
+    assert response.status_code == 200
+    assert response.json()["leaseSeconds"] == settings.task_lease_seconds
+    for stage in ("1-7", "CE-6", "LS-6"):
+        client.post(
+            f"/api/devices/{agent['device']}/tasks",
+            params={"user": agent["user"]},
+            json={"type": "Fight", "params": {"stage": stage}},
+        ).raise_for_status()
+
+    tasks = client.post(
+        "/maa/getTask", json={**agent, "capabilities": {"maxTasks": 3}}
+    ).json()["tasks"]
+    batch = [task["id"] for task in tasks]
+    assert len(batch) == 3
+
+    response = client.post(
+        "/maa/renewLeases", json={**agent, "taskIds": [*batch, uuid4().hex]}
+    )
+    assert response.status_code == 200
+    assert sorted(response.json()["renewed"]) == sorted(batch)
+
+    client.post(
+        "/maa/reportStatus",
+        json={**agent, "taskId": batch[0], "status": TaskStatus.RUNNING.value},
+    ).raise_for_status()
+    renewed = client.post(
+        "/maa/renewLeases", json={**agent, "taskIds": batch}
+    ).json()["renewed"]
+    assert sorted(renewed) == sorted(batch[1:])
+
+    other = client.post(
+        "/maa/renewLeases", json={**agent, "device": "other", "taskIds": batch}
+    ).json()["renewed"]
+    assert other == []
+
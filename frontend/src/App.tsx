@@ -1,19 +1,41 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import "./index.css";
-import { createTaskForDevice, fetchDeviceTasks, fetchDevices } from "./api/client";
-import type { Device, Task } from "./api/types";
+import {
+  changeFeedUrl,
+  createTaskForDevice,
+  fetchDeviceTasks,
+  fetchDevices,
+  fetchTaskOutput,
+  taskLogStreamUrl,
+} from "./api/client";
+import type { Device, DeviceChange, Task, TaskChange, TaskStatus } from "./api/types";
 
 const DEFAULT_USER_KEY = import.meta.env.VITE_DEFAULT_USER_KEY ?? "demo-user";
+const TASK_PAGE_SIZE = 20;
+// 变更推送断开时才轮询；列表带 ETag，数据未变化时只得到 304
+const POLL_INTERVAL_MS = 10_000;
+const FINISHED_STATUSES: TaskStatus[] = ["Succeeded", "Failed", "Cancelled"];
 
 export function App() {
   const [devices, setDevices] = useState<Device[]>([]);
   const [devicesLoading, setDevicesLoading] = useState(false);
   const [tasks, setTasks] = useState<Task[]>([]);
   const [tasksLoading, setTasksLoading] = useState(false);
+  const [tasksCursor, setTasksCursor] = useState<string | null>(null);
+  const [showArchived, setShowArchived] = useState(false);
   const [selectedDeviceId, setSelectedDeviceId] = useState<string | null>(null);
   const [stageInput, setStageInput] = useState("");
   const [actionLoading, setActionLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [feedConnected, setFeedConnected] = useState(false);
+
+  // 推送回调只注册一次，通过 ref 读取最新状态
+  const selectedRef = useRef<string | null>(null);
+  const tasksRef = useRef<Task[]>([]);
+  const devicesRef = useRef<Device[]>([]);
+  selectedRef.current = selectedDeviceId;
+  tasksRef.current = tasks;
+  devicesRef.current = devices;
 
   const selectedDevice = useMemo(
     () => devices.find((d) => d.device_id === selectedDeviceId) ?? null,
@@ -30,15 +52,110 @@ export function App() {
       refreshTasks(selectedDeviceId);
     } else {
       setTasks([]);
+      setTasksCursor(null);
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [selectedDeviceId]);
+  }, [selectedDeviceId, showArchived]);
 
-  async function refreshDevices() {
-    setDevicesLoading(true);
-    setError(null);
+  useEffect(() => {
+    if (feedConnected) {
+      return;
+    }
+    const timer = window.setInterval(() => {
+      refreshDevices(true);
+      if (selectedDeviceId) {
+        refreshTasks(selectedDeviceId, true);
+      }
+    }, POLL_INTERVAL_MS);
+    return () => window.clearInterval(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedDeviceId, feedConnected]);
+
+  useEffect(() => {
+    const resync = () => {
+      refreshDevices(true);
+      if (selectedRef.current) {
+        refreshTasks(selectedRef.current, true);
+      }
+    };
+    // 服务端在订阅者积压过多时发送 overflow 并断开，EventSource 自动重连后在 open 中重新拉取
+    const source = new EventSource(changeFeedUrl(DEFAULT_USER_KEY));
+    source.onopen = () => {
+      setFeedConnected(true);
+      resync();
+    };
+    source.onerror = () => setFeedConnected(false);
+    source.addEventListener("resync", resync);
+    source.addEventListener("task", (event) => {
+      const change = JSON.parse((event as MessageEvent<string>).data) as TaskChange;
+      if (change.device_id !== selectedRef.current) {
+        return;
+      }
+      // 新任务或已结束的任务（日志、结果在服务端）重新拉取，其余就地更新状态
+      if (
+        FINISHED_STATUSES.includes(change.status) ||
+        !tasksRef.current.some((t) => t.task_uuid === change.task_uuid)
+      ) {
+        refreshTasks(change.device_id, true);
+        return;
+      }
+      setTasks((prev) =>
+        prev.map((t) =>
+          t.task_uuid === change.task_uuid
+            ? {
+                ...t,
+                status: change.status,
+                started_at: change.started_at,
+                finished_at: change.finished_at,
+              }
+            : t,
+        ),
+      );
+    });
+    source.addEventListener("device", (event) => {
+      const change = JSON.parse((event as MessageEvent<string>).data) as DeviceChange;
+      if (!devicesRef.current.some((d) => d.device_id === change.device_id)) {
+        refreshDevices(true);
+        return;
+      }
+      setDevices((prev) =>
+        prev.map((d) =>
+          d.device_id === change.device_id
+            ? {
+                ...d,
+                status: change.status,
+                last_seen_at: change.last_seen_at,
+                agent_version: change.agent_version ?? d.agent_version,
+              }
+            : d,
+        ),
+      );
+    });
+    return () => source.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  async function loadAllDevices(): Promise<Device[]> {
+    let page = await fetchDevices(DEFAULT_USER_KEY);
+    if (!page.nextCursor) {
+      // 304 时返回缓存的同一个数组，React 不会重新渲染
+      return page.items;
+    }
+    const list = [...page.items];
+    while (page.nextCursor) {
+      page = await fetchDevices(DEFAULT_USER_KEY, page.nextCursor);
+      list.push(...page.items);
+    }
+    return list;
+  }
+
+  async function refreshDevices(silent = false) {
+    if (!silent) {
+      setDevicesLoading(true);
+      setError(null);
+    }
     try {
-      const list = await fetchDevices(DEFAULT_USER_KEY);
+      const list = await loadAllDevices();
       setDevices(list);
       if (!selectedDeviceId && list.length > 0) {
         setSelectedDeviceId(list[0].device_id);
@@ -56,12 +173,49 @@ export function App() {
     }
   }
 
-  async function refreshTasks(deviceId: string) {
+  async function refreshTasks(deviceId: string, silent = false) {
+    if (!silent) {
+      setTasksLoading(true);
+      setError(null);
+    }
+    try {
+      const page = await fetchDeviceTasks(
+        deviceId,
+        DEFAULT_USER_KEY,
+        TASK_PAGE_SIZE,
+        undefined,
+        showArchived,
+      );
+      if (silent && page.notModified) {
+        // 保留已经加载的更早页
+        return;
+      }
+      setTasks(page.items);
+      setTasksCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+      setError(err instanceof Error ? err.message : "获取任务失败");
+    } finally {
+      setTasksLoading(false);
+    }
+  }
+
+  async function loadMoreTasks(deviceId: string) {
+    if (!tasksCursor) {
+      return;
+    }
     setTasksLoading(true);
     setError(null);
     try {
-      const list = await fetchDeviceTasks(deviceId, DEFAULT_USER_KEY, 20);
-      setTasks(list);
+      const page = await fetchDeviceTasks(
+        deviceId,
+        DEFAULT_USER_KEY,
+        TASK_PAGE_SIZE,
+        tasksCursor,
+        showArchived,
+      );
+      setTasks((prev) => [...prev, ...page.items]);
+      setTasksCursor(page.nextCursor);
     } catch (err) {
       console.error(err);
       setError(err instanceof Error ? err.message : "获取任务失败");
@@ -110,7 +264,7 @@ export function App() {
           <h1>MAA 远程控制台</h1>
           <p className="subtitle">用户：{DEFAULT_USER_KEY}</p>
         </div>
-        <button className="ghost" onClick={refreshDevices} disabled={devicesLoading}>
+        <button className="ghost" onClick={() => refreshDevices()} disabled={devicesLoading}>
           {devicesLoading ? "刷新中…" : "刷新设备"}
         </button>
       </header>
@@ -205,8 +359,15 @@ export function App() {
                           创建：{formatTimestamp(task.created_at)} ·
                           状态更新时间：{formatTimestamp(task.finished_at || task.started_at)}
                         </p>
-                        {task.log ? (
-                          <pre className="task-log">{task.log.slice(-400)}</pre>
+                        {task.status === "Running" ? (
+                          <LiveTaskLog
+                            taskUuid={task.task_uuid}
+                            onEnd={() => refreshTasks(selectedDevice.device_id)}
+                          />
+                        ) : task.archived ? (
+                          <p className="task-meta muted">已归档</p>
+                        ) : task.has_log ? (
+                          <TaskFinalLog taskUuid={task.task_uuid} />
                         ) : (
                           <p className="task-meta muted">暂无日志</p>
                         )}
@@ -214,6 +375,20 @@ export function App() {
                     ))}
                   </ul>
                 )}
+                {tasksCursor ? (
+                  <button
+                    className="ghost"
+                    onClick={() => loadMoreTasks(selectedDevice.device_id)}
+                    disabled={tasksLoading}
+                  >
+                    {tasksLoading ? "加载中…" : "加载更早的任务"}
+                  </button>
+                ) : !showArchived && !tasksLoading ? (
+                  // 在线任务已经翻完，再往前才读取归档历史
+                  <button className="ghost" onClick={() => setShowArchived(true)}>
+                    加载归档历史
+                  </button>
+                ) : null}
               </div>
             </>
           ) : (
@@ -225,6 +400,59 @@ export function App() {
   );
 }
 
+function TaskFinalLog({ taskUuid }: { taskUuid: string }) {
+  const [log, setLog] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
+
+  // 日志压缩存储在服务端，按需加载
+  async function load() {
+    setLoading(true);
+    try {
+      const output = await fetchTaskOutput(taskUuid);
+      setLog(output.log ?? "");
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  }
+
+  return log !== null ? (
+    <pre className="task-log">{log.slice(-400)}</pre>
+  ) : (
+    <button className="ghost" onClick={load} disabled={loading}>
+      {loading ? "加载中…" : "查看日志"}
+    </button>
+  );
+}
+
+const LIVE_LOG_CHARS = 4000;
+
+function LiveTaskLog({ taskUuid, onEnd }: { taskUuid: string; onEnd: () => void }) {
+  const [text, setText] = useState("");
+
+  useEffect(() => {
+    // EventSource 断线重连时会带上 Last-Event-ID，服务端从下一段继续推送
+    const source = new EventSource(taskLogStreamUrl(taskUuid));
+    source.addEventListener("chunk", (event) => {
+      const { data } = JSON.parse((event as MessageEvent<string>).data) as { data: string };
+      setText((prev) => (prev + data).slice(-LIVE_LOG_CHARS));
+    });
+    source.addEventListener("end", () => {
+      source.close();
+      onEnd();
+    });
+    return () => source.close();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [taskUuid]);
+
+  return text ? (
+    <pre className="task-log">{text}</pre>
+  ) : (
+    <p className="task-meta muted">等待实时日志…</p>
+  );
+}
+
 function formatTimestamp(value?: string | null): string | null {
   if (!value) {
     return null;
@@ -1,4 +1,4 @@
-import type { Device, Task, TaskCreatePayload } from "./types";
+import type { Device, Task, TaskCreatePayload, TaskOutput } from "./types";
 
 const API_BASE = (import.meta.env.VITE_API_BASE ?? "http://127.0.0.1:8000").replace(
   /\/$/,
@@ -26,26 +26,76 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
   return (await resp.json()) as T;
 }
 
-export async function fetchDevices(userKey?: string): Promise<Device[]> {
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+  // true when the server answered 304 and `items` is the cached copy
+  notModified: boolean;
+}
+
+interface CachedPage {
+  etag: string;
+  items: unknown[];
+  nextCursor: string | null;
+}
+
+// 按 URL 缓存列表响应及其 ETag，轮询时带 If-None-Match，未变化时服务端返回 304
+const pageCache = new Map<string, CachedPage>();
+
+async function requestPage<T>(path: string): Promise<Page<T>> {
+  const cached = pageCache.get(path);
+  const resp = await fetch(`${API_BASE}${path}`, {
+    // 自行处理条件请求，避免浏览器缓存把 304 透明地转换成 200
+    cache: "no-store",
+    headers: cached ? { "If-None-Match": cached.etag } : {},
+  });
+
+  if (resp.status === 304 && cached) {
+    return { items: cached.items as T[], nextCursor: cached.nextCursor, notModified: true };
+  }
+  if (!resp.ok) {
+    const text = await resp.text();
+    throw new Error(text || resp.statusText);
+  }
+
+  const items = (await resp.json()) as T[];
+  const nextCursor = resp.headers.get("X-Next-Cursor");
+  const etag = resp.headers.get("ETag");
+  if (etag) {
+    pageCache.set(path, { etag, items, nextCursor });
+  }
+  return { items, nextCursor, notModified: false };
+}
+
+export async function fetchDevices(userKey?: string, cursor?: string): Promise<Page<Device>> {
   const params = new URLSearchParams();
   if (userKey) {
     params.append("user", userKey);
   }
+  if (cursor) {
+    params.append("cursor", cursor);
+  }
   const query = params.toString();
   const path = query ? `/api/devices?${query}` : "/api/devices";
-  return request<Device[]>(path);
+  return requestPage<Device>(path);
 }
 
 export async function fetchDeviceTasks(
   deviceId: string,
   userKey: string,
   limit = 20,
-): Promise<Task[]> {
-  const params = new URLSearchParams({
-    user: userKey,
-    limit: String(limit),
-  });
-  return request<Task[]>(`/api/devices/${encodeURIComponent(deviceId)}/tasks?${params}`);
+  cursor?: string,
+  includeArchived = false,
+): Promise<Page<Task>> {
+  const params = new URLSearchParams({ user: userKey, limit: String(limit) });
+  if (cursor) {
+    params.append("cursor", cursor);
+  }
+  // 归档历史按需读取：服务端仅在在线任务填不满一页时才读取归档文件
+  if (includeArchived) {
+    params.append("include_archived", "true");
+  }
+  return requestPage<Task>(`/api/devices/${encodeURIComponent(deviceId)}/tasks?${params}`);
 }
 
 export async function createTaskForDevice(
@@ -64,3 +114,17 @@ export async function createTaskForDevice(
   });
 }
 
+
+export async function fetchTaskOutput(taskUuid: string): Promise<TaskOutput> {
+  return request<TaskOutput>(`/api/tasks/${encodeURIComponent(taskUuid)}/output`);
+}
+
+export function taskLogStreamUrl(taskUuid: string, offset = 0): string {
+  const params = new URLSearchParams({ offset: String(offset) });
+  return `${API_BASE}/api/tasks/${encodeURIComponent(taskUuid)}/log/stream?${params}`;
+}
+
+export function changeFeedUrl(userKey: string): string {
+  const params = new URLSearchParams({ user: userKey });
+  return `${API_BASE}/api/events?${params}`;
+}
@@ -21,11 +21,13 @@ export interface Task {
   payload: Record<string, unknown>;
   status: TaskStatus;
   priority: number;
+  retry_count: number;
   created_at: string;
   started_at?: string | null;
   finished_at?: string | null;
-  log?: string | null;
+  has_log: boolean;
   error_message?: string | null;
+  archived?: boolean;
 }
 
 export interface TaskCreatePayload {
@@ -34,3 +36,25 @@ export interface TaskCreatePayload {
   priority?: number;
 }
 
+export interface TaskOutput {
+  task_uuid: string;
+  log?: string | null;
+  result?: Record<string, unknown> | null;
+  stats?: Record<string, unknown> | null;
+}
+
+// /api/events 推送的变更；未知的 task_uuid 表示新任务
+export interface TaskChange {
+  task_uuid: string;
+  device_id: string;
+  status: TaskStatus;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
+export interface DeviceChange {
+  device_id: string;
+  status: string;
+  last_seen_at?: string | null;
+  agent_version?: string | null;
+}